@@ -0,0 +1,100 @@
+"""
+Compares sessionize.create_engine profiles with a default engine on SQLite.
+
+For each engine: inserts rows in small transactions (oltp style),
+inserts rows in large batches (bulk style), and selects rows by
+primary key from several threads (read style).
+
+Usage: python benchmarks/bench_engine_profiles.py [row_count]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+import sqlalchemy as sa
+
+from sessionize import create_engine, insert_records
+
+
+def create_people(engine: sa.engine.Engine) -> None:
+    metadata = sa.MetaData()
+    sa.Table('people', metadata,
+             sa.Column('id', sa.Integer, primary_key=True),
+             sa.Column('name', sa.String(20)),
+             sa.Column('age', sa.Integer))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+
+def records(start: int, stop: int):
+    return [{'id': i, 'name': f'name_{i}', 'age': i % 100} for i in range(start, stop)]
+
+
+def small_transactions(engine: sa.engine.Engine, row_count: int) -> None:
+    for i in range(0, row_count, 10):
+        insert_records('people', records(i, i + 10), engine)
+
+
+def large_batches(engine: sa.engine.Engine, row_count: int) -> None:
+    for i in range(0, row_count, 10000):
+        insert_records('people', records(i, min(i + 10000, row_count)), engine)
+
+
+def concurrent_reads(engine: sa.engine.Engine, row_count: int) -> None:
+    people = sa.Table('people', sa.MetaData(), autoload_with=engine)
+
+    def read(i: int) -> None:
+        with engine.connect() as connection:
+            connection.execute(sa.select(people).where(people.c.id == i)).fetchall()
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(read, range(0, row_count, 10)))
+
+
+def time_workload(url: str, make_engine: Callable[[str], sa.engine.Engine],
+                  workload: Callable, row_count: int) -> float:
+    engine = make_engine(url)
+    start = time.perf_counter()
+    workload(engine, row_count)
+    seconds = time.perf_counter() - start
+    engine.dispose()
+    return seconds
+
+
+def main(row_count: int = 20000) -> None:
+    engines: Dict[str, Callable[[str], sa.engine.Engine]] = {
+        'default': sa.create_engine,
+        'oltp': lambda url: create_engine(url, profile='oltp'),
+        'bulk': lambda url: create_engine(url, profile='bulk'),
+        'readonly': lambda url: create_engine(url, profile='readonly'),
+    }
+    workloads = {
+        'small transactions': small_transactions,
+        'large batches': large_batches,
+        'concurrent reads': concurrent_reads,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'':>20}" + ''.join(f'{name:>12}' for name in engines))
+        for workload_name, workload in workloads.items():
+            row = f'{workload_name:>20}'
+            for engine_name, make_engine in engines.items():
+                if engine_name == 'readonly' and workload is not concurrent_reads:
+                    row += f"{'-':>12}"
+                    continue
+                # A new database file per run, journal_mode=WAL persists in the file.
+                url = f"sqlite:///{os.path.join(directory, f'{workload.__name__}_{engine_name}.db')}"
+                setup_engine = sa.create_engine(url)
+                create_people(setup_engine)
+                if workload is concurrent_reads:
+                    large_batches(setup_engine, row_count)
+                setup_engine.dispose()
+                seconds = time_workload(url, make_engine, workload, row_count)
+                row += f'{seconds:>11.3f}s'
+            print(row)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
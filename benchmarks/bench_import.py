@@ -0,0 +1,87 @@
+"""
+Measures sessionize import time with python -X importtime.
+
+Times a bare import sessionize and the first use of a few public names,
+each in a fresh interpreter, minus the interpreter's own startup imports,
+and lists the slowest modules loaded by import sessionize.
+Exits with status 1 if import sessionize is slower than --max-ms
+or loads alembic.
+
+Usage: python benchmarks/bench_import.py [--max-ms 100] [--repeat 5] [--top 10]
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+STATEMENTS = {
+    'import sessionize': 'import sessionize',
+    'insert_records': 'from sessionize import insert_records',
+    'SessionTable': 'from sessionize import SessionTable',
+    'migrate': 'from sessionize import migrate',
+}
+
+
+def import_times(statement: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Runs statement in a fresh interpreter.
+    Returns module name: (self us, cumulative us) from -X importtime.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        # Keep the indentation, nested imports are indented under their importer.
+        times[module.rstrip()[1:]] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def total_ms(times: Dict[str, Tuple[int, int]]) -> float:
+    # Top level imports are not indented, their cumulative times add up to the total.
+    return sum(cumulative for module, (_, cumulative) in times.items()
+               if not module.startswith(' ')) / 1000
+
+
+def slowest(times: Dict[str, Tuple[int, int]], top: int) -> List[Tuple[str, int]]:
+    return sorted(((module.strip(), self_us) for module, (self_us, _) in times.items()),
+                  key=lambda item: item[1], reverse=True)[:top]
+
+
+def best_times(statement: str, repeat: int) -> Dict[str, Tuple[int, int]]:
+    return min((import_times(statement) for _ in range(repeat)), key=total_ms)
+
+
+def main(max_ms: float, repeat: int, top: int) -> int:
+    startup = best_times('pass', repeat)
+    startup_ms = total_ms(startup)
+    failed = False
+    for name, statement in STATEMENTS.items():
+        best = best_times(statement, repeat)
+        ms = total_ms(best) - startup_ms
+        print(f'{name:>20}: {ms:.1f} ms')
+        if name == 'import sessionize':
+            if ms > max_ms:
+                print(f'{"":>20}  slower than {max_ms} ms')
+                failed = True
+            modules = {module.strip() for module in best}
+            if 'alembic' in modules:
+                print(f'{"":>20}  alembic loaded by import sessionize')
+                failed = True
+            new = {module: times for module, times in best.items() if module not in startup}
+            for module, self_us in slowest(new, top):
+                print(f'{"":>22}{module}: {self_us / 1000:.1f} ms')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-ms', type=float, default=100.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(main(args.max_ms, args.repeat, args.top))
@@ -0,0 +1,87 @@
+"""
+Tracks resident memory of a long SessionTable update job.
+
+Updates every row of a table one record at a time through one SessionTable,
+sampling RSS as it goes. Writes are Core statements, so the session's
+identity map stays empty either way. Without options the whole job is one
+database transaction that grows until the final commit. autocommit_every
+commits every so many records and keeps the transaction small,
+autoflush_every alone is expected to change little.
+
+Usage: python benchmarks/bench_memory.py [row_count] [database_url]
+    e.g. python benchmarks/bench_memory.py 10000000
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import sqlalchemy as sa
+
+from sessionize import SessionTable, create_engine, insert_records_parallel
+
+
+def rss_mb() -> float:
+    # Current RSS from /proc on Linux, otherwise peak RSS from getrusage.
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 2 ** 10
+
+
+def create_people(engine: sa.engine.Engine, row_count: int) -> None:
+    metadata = sa.MetaData()
+    sa.Table('people', metadata,
+             sa.Column('id', sa.Integer, primary_key=True),
+             sa.Column('name', sa.String(20)),
+             sa.Column('age', sa.Integer))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    records = ({'id': i, 'name': f'name_{i}', 'age': i % 100} for i in range(row_count))
+    insert_records_parallel('people', records, engine, batch_size=10000)
+
+
+def update_job(
+    engine: sa.engine.Engine,
+    row_count: int,
+    samples: int = 10,
+    autoflush_every: Optional[int] = None,
+    autocommit_every: Optional[int] = None
+) -> List[float]:
+    # Returns RSS in MB sampled evenly through the job, and at the final commit.
+    every = max(row_count // samples, 1)
+    curve = []
+    with SessionTable('people', engine, autoflush_every=autoflush_every,
+                      autocommit_every=autocommit_every) as st:
+        for i in range(row_count):
+            st.update_one_record({'id': i, 'age': i % 100 + 1})
+            if (i + 1) % every == 0:
+                curve.append(rss_mb())
+    curve.append(rss_mb())
+    return curve
+
+
+def main(row_count: int = 100000, url: str = '') -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(url, profile='bulk')
+        options = [
+            ('no options', {}),
+            ('autoflush_every=10000', {'autoflush_every': 10000}),
+            ('autocommit_every=10000', {'autocommit_every': 10000}),
+        ]
+        for label, kwargs in options:
+            create_people(engine, row_count)
+            start = time.perf_counter()
+            curve = update_job(engine, row_count, **kwargs)
+            seconds = time.perf_counter() - start
+            print(f'{label:>24}: {seconds:8.1f}s  RSS MB ' + ' '.join(f'{mb:.0f}' for mb in curve))
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]], *sys.argv[2:3])
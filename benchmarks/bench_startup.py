@@ -0,0 +1,55 @@
+"""
+Measures SessionTable construction latency per table.
+
+Compares eager construction, lazy construction, and construction
+from an already reflected MetaData snapshot.
+
+Usage: python benchmarks/bench_startup.py [table_count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+
+from sessionize import SessionTable
+
+
+def create_tables(engine: sa.engine.Engine, table_count: int) -> None:
+    metadata = sa.MetaData()
+    for i in range(table_count):
+        sa.Table(f'table_{i}', metadata,
+                 sa.Column('id', sa.Integer, primary_key=True),
+                 sa.Column('name', sa.String(20)),
+                 sa.Column('value', sa.Float))
+    metadata.create_all(engine)
+
+
+def time_per_table(engine: sa.engine.Engine, table_count: int, **kwargs) -> float:
+    start = time.perf_counter()
+    for i in range(table_count):
+        st = SessionTable(f'table_{i}', engine, **kwargs)
+        st.session.close()
+    return (time.perf_counter() - start) / table_count
+
+
+def main(table_count: int = 200) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = sa.create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        create_tables(engine, table_count)
+        metadata = sa.MetaData()
+        metadata.reflect(bind=engine)
+
+        results = {
+            'eager': time_per_table(engine, table_count),
+            'lazy': time_per_table(engine, table_count, lazy=True),
+            'metadata snapshot': time_per_table(engine, table_count, metadata=metadata),
+        }
+        for name, seconds in results.items():
+            print(f'{name:>20}: {seconds * 1000:.3f} ms per table')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
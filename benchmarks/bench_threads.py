@@ -0,0 +1,74 @@
+"""
+Measures SessionTable read throughput as threads are added.
+
+Compares a new SessionTable per request, which reflects the table
+every time, with views from one SessionTableFactory, which reflects once
+and gives each thread its own scoped session.
+SQLite runs in-process and mostly holds the GIL, pass a PostgreSQL
+url to see throughput scale with threads waiting on the network.
+
+Usage: python benchmarks/bench_threads.py [requests_per_thread] [database_url]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable
+
+import sqlalchemy as sa
+
+from sessionize import SessionTable, SessionTableFactory, create_engine, insert_records
+
+
+def create_people(engine: sa.engine.Engine, row_count: int = 1000) -> None:
+    metadata = sa.MetaData()
+    sa.Table('people', metadata,
+             sa.Column('id', sa.Integer, primary_key=True),
+             sa.Column('name', sa.String(20)),
+             sa.Column('age', sa.Integer))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    insert_records('people', [{'id': i, 'name': f'name_{i}', 'age': i % 100} for i in range(row_count)], engine)
+
+
+def requests_per_second(request: Callable[[], None], threads: int, requests: int) -> float:
+    def work():
+        for _ in range(requests):
+            request()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * requests / (time.perf_counter() - start)
+
+
+def main(requests: int = 200, url: str = '') -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(url, profile='readonly' if url.startswith('sqlite') else 'oltp',
+                               pool_size=16, max_overflow=0)
+        create_people(sa.create_engine(url))
+        factory = SessionTableFactory(engine, 'people')
+
+        def per_request_table():
+            with SessionTable('people', engine) as st:
+                st.head(5)
+
+        def factory_view():
+            with factory.scope() as st:
+                st.head(5)
+
+        print(f"{'threads':>8}{'new SessionTable':>20}{'factory view':>20}  requests/s")
+        for threads in [1, 2, 4, 8, 16]:
+            print(f'{threads:>8}'
+                  f'{requests_per_second(per_request_table, threads, requests):>20.0f}'
+                  f'{requests_per_second(factory_view, threads, requests):>20.0f}')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]], *sys.argv[2:3])
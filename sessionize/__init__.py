@@ -2,20 +2,117 @@ __version__ = '0.0.18'
 
 #from sessionize.sa_versions.sa_1_4_29 import sa
 
-# Sessionized
-from sessionize.orm.session_table import SessionTable
-from sessionize.orm.session_db import SessionDatabase
-from sessionize.orm.filter import Filter
-from sessionize.utils.insert import insert_records_session
-from sessionize.utils.delete import delete_records_session, delete_all_records_session
-from sessionize.utils.update import update_records_session
-from sessionize.utils.select import select_records, select_column_values, select_existing_values
-from sessionize.utils.features import get_table
-
-# Not Sessionized
-
-from sessionize.utils.insert import insert_records
-from sessionize.utils.delete import delete_records, delete_all_records
-from sessionize.utils.update import update_records
-from sessionize.utils.drop import drop_table
-from sessionize.utils.create import create_table
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING
+
+# Public names are imported on first use by __getattr__,
+# so importing sessionize does not load the ORM, alembic or alter.
+_lazy_imports = {
+    # Sessionized
+    'SessionTable': 'sessionize.orm.session_table',
+    'SessionDatabase': 'sessionize.orm.session_db',
+    'SessionTableFactory': 'sessionize.orm.session_factory',
+    'Filter': 'sessionize.orm.filter',
+    'insert_records_session': 'sessionize.utils.insert',
+    'delete_records_session': 'sessionize.utils.delete',
+    'delete_all_records_session': 'sessionize.utils.delete',
+    'update_records_session': 'sessionize.utils.update',
+    'upsert_records_session': 'sessionize.utils.upsert',
+    'insert_dataframe_session': 'sessionize.utils.pandas_io',
+    'update_dataframe_session': 'sessionize.utils.pandas_io',
+    'upsert_dataframe_session': 'sessionize.utils.pandas_io',
+    'insert_records_batched_session': 'sessionize.utils.savepoint',
+    'update_records_batched_session': 'sessionize.utils.savepoint',
+    'upsert_records_batched_session': 'sessionize.utils.savepoint',
+    'RejectedRecord': 'sessionize.utils.savepoint',
+    'AsyncSessionTable': 'sessionize.orm.async_session',
+    'AsyncSessionDatabase': 'sessionize.orm.async_session',
+    'select_records': 'sessionize.utils.select',
+    'select_column_values': 'sessionize.utils.select',
+    'select_existing_values': 'sessionize.utils.select',
+    'get_table': 'sessionize.utils.features',
+    'enable_schema_snapshot': 'sessionize.utils.snapshot',
+    'disable_schema_snapshot': 'sessionize.utils.snapshot',
+    'enable_index_advisor': 'sessionize.utils.advisor',
+    'disable_index_advisor': 'sessionize.utils.advisor',
+    'enable_spill': 'sessionize.utils.spill',
+    'disable_spill': 'sessionize.utils.spill',
+    'SpilledSequence': 'sessionize.utils.spill',
+
+    # Not Sessionized
+    'insert_records': 'sessionize.utils.insert',
+    'delete_records': 'sessionize.utils.delete',
+    'delete_all_records': 'sessionize.utils.delete',
+    'update_records': 'sessionize.utils.update',
+    'select_records_parallel': 'sessionize.utils.parallel',
+    'insert_records_parallel': 'sessionize.utils.parallel',
+    'upsert_records': 'sessionize.utils.upsert',
+    'load': 'sessionize.utils.load',
+    'read_csv': 'sessionize.utils.csv_io',
+    'to_csv': 'sessionize.utils.csv_io',
+    'from_parquet': 'sessionize.utils.arrow_io',
+    'to_parquet': 'sessionize.utils.arrow_io',
+    'select_dataframe': 'sessionize.utils.pandas_io',
+    'insert_dataframe': 'sessionize.utils.pandas_io',
+    'update_dataframe': 'sessionize.utils.pandas_io',
+    'upsert_dataframe': 'sessionize.utils.pandas_io',
+    'drop_table': 'sessionize.utils.drop',
+    'create_table': 'sessionize.utils.create',
+    'migrate': 'sessionize.utils.migrate',
+    'create_index': 'sessionize.utils.index',
+    'drop_index': 'sessionize.utils.index',
+    'list_indexes': 'sessionize.utils.index',
+    'create_engine': 'sessionize.utils.engine_integration',
+}
+
+__all__ = list(_lazy_imports)
+
+
+def __getattr__(name):
+    if name not in _lazy_imports:
+        raise AttributeError(f"module 'sessionize' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_lazy_imports[name]), name)
+    # Cache so __getattr__ is only called once per name.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    # Sessionized
+    from sessionize.orm.session_table import SessionTable
+    from sessionize.orm.session_db import SessionDatabase
+    from sessionize.orm.session_factory import SessionTableFactory
+    from sessionize.orm.filter import Filter
+    from sessionize.utils.insert import insert_records_session
+    from sessionize.utils.delete import delete_records_session, delete_all_records_session
+    from sessionize.utils.update import update_records_session
+    from sessionize.utils.upsert import upsert_records_session
+    from sessionize.utils.pandas_io import insert_dataframe_session, update_dataframe_session, upsert_dataframe_session
+    from sessionize.utils.savepoint import (insert_records_batched_session, update_records_batched_session,
+                                            upsert_records_batched_session, RejectedRecord)
+    from sessionize.orm.async_session import AsyncSessionTable, AsyncSessionDatabase
+    from sessionize.utils.select import select_records, select_column_values, select_existing_values
+    from sessionize.utils.features import get_table
+    from sessionize.utils.snapshot import enable_schema_snapshot, disable_schema_snapshot
+    from sessionize.utils.advisor import enable_index_advisor, disable_index_advisor
+    from sessionize.utils.spill import enable_spill, disable_spill, SpilledSequence
+
+    # Not Sessionized
+    from sessionize.utils.insert import insert_records
+    from sessionize.utils.delete import delete_records, delete_all_records
+    from sessionize.utils.update import update_records
+    from sessionize.utils.parallel import select_records_parallel, insert_records_parallel
+    from sessionize.utils.upsert import upsert_records
+    from sessionize.utils.load import load
+    from sessionize.utils.csv_io import read_csv, to_csv
+    from sessionize.utils.arrow_io import from_parquet, to_parquet
+    from sessionize.utils.pandas_io import select_dataframe, insert_dataframe, update_dataframe, upsert_dataframe
+    from sessionize.utils.drop import drop_table
+    from sessionize.utils.create import create_table
+    from sessionize.utils.migrate import migrate
+    from sessionize.utils.index import create_index, drop_index, list_indexes
+    from sessionize.utils.engine_integration import create_engine
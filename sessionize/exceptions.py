@@ -10,6 +10,17 @@ class SliceError(IndexError):
     pass
 
 
+class OnlineMigrationError(Exception):
+    pass
+
+
+class BackfillError(Exception):
+    # last_key holds the primary key values of the last committed batch.
+    def __init__(self, message, last_key=None):
+        super().__init__(message)
+        self.last_key = last_key
+
+
 def rollback_on_exception(method):
     def inner_method(self, *args, **kwargs):
         try:
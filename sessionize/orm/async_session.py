@@ -0,0 +1,247 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+import sessionize.exceptions as exceptions
+import sessionize.utils.advisor as advisor
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+import sessionize.utils.types as types
+
+
+class AsyncSessionParent:
+    """
+    asyncio version of SessionParent, holds one AsyncSession.
+
+    Used as an async context manager, commits on exit
+    or rolls back if an exception was raised, then closes the session.
+    """
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session = AsyncSession(engine)
+        # Reflected tables shared by every AsyncTableSelection made from this parent.
+        self.sa_tables: Dict[Tuple[Optional[str], str], sa.Table] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type:
+                await self.rollback()
+            else:
+                await self.commit()
+        finally:
+            await self.close()
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def get_sa_table(self, table_name: str, schema: Optional[str] = None) -> sa.Table:
+        # Only reflects the table the first time it is requested.
+        key = (schema, table_name)
+        if key not in self.sa_tables:
+            connection = await self.session.connection()
+            self.sa_tables[key] = await connection.run_sync(
+                lambda sync_connection: features.get_table(table_name, sync_connection, schema=schema))
+        return self.sa_tables[key]
+
+
+class AsyncTableSelection:
+    """
+    Awaitable select, insert, update, delete and upsert for one table,
+    run in parent's AsyncSession.
+    Statements come from sessionize.utils.statements, like the sync tables.
+
+    Iterate with async for to stream records in primary key order,
+    one keyset chunk at a time.
+    """
+    def __init__(
+        self,
+        parent: AsyncSessionParent,
+        table_name: str,
+        schema: Optional[str] = None,
+        chunksize: int = 1000
+    ) -> None:
+        self.parent = parent
+        self.table_name = table_name
+        self.schema = schema
+        # Number of records selected per query by async for.
+        self.chunksize = chunksize
+        self._primary_key_checked = False
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(table_name='{self.table_name}', schema={self.schema!r})"
+
+    def __aiter__(self) -> AsyncIterator[types.Record]:
+        return self._iterate_records()
+
+    async def _iterate_records(self) -> AsyncIterator[types.Record]:
+        async for chunk in self.select_chunks(self.chunksize):
+            for record in chunk:
+                yield record
+
+    async def get_table(self) -> sa.Table:
+        # Reflected SqlAlchemy Table, primary key is checked once.
+        sa_table = await self.parent.get_sa_table(self.table_name, self.schema)
+        if not self._primary_key_checked:
+            if not features.has_primary_key(sa_table):
+                raise exceptions.MissingPrimaryKey(
+                'Sessionize requires sql table to have a primary key to work properly.\n' +
+                'Use sessionize.create_primary_key to add a primary key to your table.')
+            self._primary_key_checked = True
+        return sa_table
+
+    async def _fetch_records(self, query) -> List[types.Record]:
+        result = await self.parent.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def _execute_many(self, statement_parameters) -> None:
+        for statement, parameters in statement_parameters:
+            await self.parent.session.execute(statement, parameters)
+
+    async def count(self) -> int:
+        sa_table = await self.get_table()
+        result = await self.parent.session.execute(statements.row_count_statement(sa_table))
+        return result.scalar()
+
+    async def columns(self) -> List[str]:
+        return features.get_column_names(await self.get_table())
+
+    async def primary_keys(self) -> List[str]:
+        return features.primary_keys(await self.get_table())
+
+    async def select_records(
+        self,
+        include_columns: Optional[List[str]] = None,
+        sorted: bool = False
+    ) -> List[types.Record]:
+        sa_table = await self.get_table()
+        return await self._fetch_records(
+            statements.select_records_statement(sa_table, include_columns, sorted=sorted))
+
+    async def select_chunks(
+        self,
+        chunksize: int = 1000,
+        include_columns: Optional[List[str]] = None
+    ) -> AsyncIterator[List[types.Record]]:
+        # Keyset chunks in primary key order, see select.select_records_keyset_chunks.
+        sa_table = await self.get_table()
+        keys = features.primary_keys(sa_table)
+        last_key = None
+        while True:
+            query, extra_keys = statements.select_keyset_chunk_statement(
+                sa_table, chunksize, include_columns, start_after=last_key)
+            records = await self._fetch_records(query)
+            if not records:
+                return
+            last_key = {key: records[-1][key] for key in keys}
+            for record in records:
+                for column in extra_keys:
+                    del record[column.name]
+            yield records
+            if len(records) < chunksize:
+                return
+
+    async def head(self, size: int = 5) -> List[types.Record]:
+        sa_table = await self.get_table()
+        return await self._fetch_records(statements.select_end_statement(sa_table, size))
+
+    async def tail(self, size: int = 5) -> List[types.Record]:
+        sa_table = await self.get_table()
+        records = await self._fetch_records(statements.select_end_statement(sa_table, size, descending=True))
+        records.reverse()
+        return records
+
+    async def insert_records(self, records: List[types.Record]) -> None:
+        sa_table = await self.get_table()
+        for statement, parameters in statements.insert_records_statements(sa_table, records):
+            await self.parent.session.execute(statement, parameters)
+
+    async def insert_one_record(self, record: types.Record) -> None:
+        await self.insert_records([record])
+
+    async def update_records(self, records: List[types.Record]) -> None:
+        sa_table = await self.get_table()
+        await self._execute_many(statements.update_records_statements(sa_table, records))
+
+    async def update_one_record(self, record: types.Record) -> None:
+        await self.update_records([record])
+
+    async def delete_records(self, column_name: str, values: List[Any]) -> None:
+        sa_table = await self.get_table()
+        advisor.record_column_usage(sa_table, [column_name])
+        await self.parent.session.execute(statements.delete_records_statement(sa_table, column_name, values))
+
+    async def delete_one_record(self, column_name: str, value: Any) -> None:
+        await self.delete_records(column_name, [value])
+
+    async def upsert_records(self, records: List[types.Record]) -> None:
+        sa_table = await self.get_table()
+        await self._execute_many(
+            statements.upsert_records_statements(sa_table, records, self.parent.engine.dialect.name))
+
+    async def upsert_one_record(self, record: types.Record) -> None:
+        await self.upsert_records([record])
+
+
+class AsyncSessionTable(AsyncSessionParent, AsyncTableSelection):
+    """
+    asyncio version of SessionTable, built on AsyncSession.
+
+        async with AsyncSessionTable('people', async_engine) as table:
+            await table.insert_records([{'name': 'Ava', 'age': 21}])
+            async for record in table:
+                ...
+    """
+    def __init__(
+        self,
+        name: str,
+        engine: AsyncEngine,
+        schema: Optional[str] = None,
+        chunksize: int = 1000
+    ) -> None:
+        AsyncSessionParent.__init__(self, engine)
+        AsyncTableSelection.__init__(self, self, name, schema=schema, chunksize=chunksize)
+
+
+class AsyncSessionDatabase(AsyncSessionParent):
+    """
+    asyncio version of SessionDatabase, built on AsyncSession.
+    AsyncSessionDatabase[table_name] returns an AsyncTableSelection
+    that runs in the database's session.
+    """
+    def __init__(self, engine: AsyncEngine):
+        AsyncSessionParent.__init__(self, engine)
+        self.tables: Dict[str, AsyncTableSelection] = {}
+
+    def __repr__(self) -> str:
+        return f"AsyncSessionDatabase(url={self.engine.url!r})"
+
+    def __getitem__(self, key: str) -> AsyncTableSelection:
+        # AsyncSessionDatabase[table_name]
+        if isinstance(key, str):
+            # Pull out schema if key has period.
+            if '.' in key:
+                schema, name = key.split('.')
+            else:
+                schema, name = None, key
+            if key not in self.tables:
+                self.tables[key] = AsyncTableSelection(self, name, schema=schema)
+            return self.tables[key]
+        raise KeyError('AsyncSessionDatabase key type can only be str.')
+
+    async def table_names(self, schema: Optional[str] = None) -> List[str]:
+        connection = await self.session.connection()
+        names = await connection.run_sync(
+            lambda sync_connection: sa.inspect(sync_connection).get_table_names(schema=schema))
+        if schema is None:
+            return names
+        return [f'{schema}.{name}' for name in names]
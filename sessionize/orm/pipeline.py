@@ -0,0 +1,165 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import sqlalchemy.engine as sa_engine
+import sqlalchemy.orm.session as sa_session
+
+
+class _Barrier:
+    # Queued by flush and rollback, done is set once the writer reaches it.
+    def __init__(self, rollback: bool = False):
+        self.rollback = rollback
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+# Queued by close, stops the writer thread.
+_STOP = object()
+
+
+class PipelinedWriter:
+    """
+    Applies writes on a background thread with its own Session,
+    so the producer can build the next batch while the last one is written.
+
+    Writes are queued in a bounded queue, submit blocks when it is full.
+    The writer commits every commit_every writes and at every flush.
+    The first error rolls back the writer's open transaction and the
+    writer stays failed: every later queued write is dropped and submit
+    raises the error, until the next flush, which raises it too, or rollback.
+    Only the writer thread clears the failed state, when it reaches the
+    flush or rollback barrier, so no write queued behind a failed one
+    is ever applied.
+    """
+    def __init__(
+        self,
+        engine: sa_engine.Engine,
+        commit_every: int = 1000,
+        queue_size: int = 100
+    ) -> None:
+        self.engine = engine
+        self.commit_every = commit_every
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Set by the writer on the first failed write, cleared by the writer at the next barrier.
+        self.error: Optional[BaseException] = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name='sessionize-writer', daemon=True)
+        self.thread.start()
+
+    def __repr__(self) -> str:
+        return f'PipelinedWriter(commit_every={self.commit_every}, queued={self.queue.qsize()})'
+
+    def _fail(self, error: BaseException) -> None:
+        with self.lock:
+            if self.error is None:
+                self.error = error
+
+    def _run(self) -> None:
+        session = sa_session.Session(self.engine)
+        pending = 0
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    if self.error is None:
+                        session.commit()
+                    break
+                if isinstance(item, _Barrier):
+                    with self.lock:
+                        item.error, self.error = self.error, None
+                    if item.rollback or item.error is not None:
+                        session.rollback()
+                    else:
+                        session.commit()
+                    pending = 0
+                    continue
+                if self.error is not None:
+                    # Dropped until a flush or rollback barrier.
+                    continue
+                func, args, kwargs = item
+                func(*args, session=session, **kwargs)
+                pending += 1
+                if pending >= self.commit_every:
+                    session.commit()
+                    pending = 0
+            except Exception as e:
+                session.rollback()
+                pending = 0
+                if isinstance(item, _Barrier):
+                    item.error = e
+                else:
+                    self._fail(e)
+            finally:
+                if isinstance(item, _Barrier):
+                    item.done.set()
+        session.close()
+
+    def raise_error(self) -> None:
+        # Raises the writer's error while it is failed, does not clear it.
+        with self.lock:
+            error = self.error
+        if error is not None:
+            raise error
+
+    def submit(
+        self,
+        func: Callable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any]
+    ) -> None:
+        """
+        Queues func(*args, session=writer_session, **kwargs).
+        Arguments must not be changed after they are submitted.
+        Raises the writer's error while it is failed.
+        """
+        self.raise_error()
+        if not self.thread.is_alive():
+            raise RuntimeError('PipelinedWriter is closed.')
+        self.queue.put((func, args, kwargs))
+
+    def _wait(self, barrier: _Barrier) -> _Barrier:
+        self.queue.put(barrier)
+        barrier.done.wait()
+        return barrier
+
+    def flush(self) -> None:
+        """
+        Waits until every queued write is applied and committed,
+        then raises the writer's error, if any, and clears it.
+        """
+        if self.thread.is_alive():
+            error = self._wait(_Barrier()).error
+        else:
+            with self.lock:
+                error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def rollback(self) -> None:
+        """
+        Drops queued writes, rolls back the writer's open transaction
+        and clears its error. Writes that were already committed are kept.
+        """
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Barrier):
+                item.done.set()
+        if self.thread.is_alive():
+            self._wait(_Barrier(rollback=True))
+        else:
+            with self.lock:
+                self.error = None
+
+    def close(self) -> None:
+        # Commits queued writes, stops the writer and raises its error, if any.
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        with self.lock:
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
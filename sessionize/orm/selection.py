@@ -1,8 +1,11 @@
+import operator
 from collections.abc import Iterable
+from itertools import repeat
 from typing import List, Optional, Sequence
 from numbers import Number
 
 from chaingang import selection_chaining
+from sqlalchemy import Table
 
 import sessionize.utils.types as types
 import sessionize.utils.select as select
@@ -16,24 +19,36 @@ import sessionize.orm.session_parent as parent
 
 
 class Selection:
-    def __init__(self, parent: parent.SessionParent, table_name: str, schema: Optional[str] = None):
+    def __init__(
+        self,
+        parent: parent.SessionParent,
+        table_name: str,
+        schema: Optional[str] = None,
+        sa_table: Optional[Table] = None
+    ) -> None:
         self.parent = parent
         self.session = parent.session
         self.table_name = table_name
         self.schema = schema
-        self.sa_table = features.get_table(table_name, self.session, schema=schema)
+        # Skip reflection when the caller or the parent already has the mapped table.
+        if sa_table is None:
+            sa_table = parent.get_sa_table(table_name, schema=schema)
+        self.sa_table = sa_table
 
 
 @selection_chaining
 class TableSelection(Selection):
-    def __init__(self, parent: parent.SessionParent, table_name: str, schema: Optional[str] = None):
-        Selection.__init__(self, parent, table_name, schema=schema)
+    def __init__(
+        self,
+        parent: parent.SessionParent,
+        table_name: str,
+        schema: Optional[str] = None,
+        sa_table: Optional[Table] = None
+    ) -> None:
+        Selection.__init__(self, parent, table_name, schema=schema, sa_table=sa_table)
 
     def __repr__(self):
-        if len(self) == 0:
-            first_record = None
-        else:
-            first_record = select.select_record_by_index(self.sa_table, self.session, 0)
+        first_record = self.parent.get_table_info(self.sa_table).first_record
         if self.schema is None:
             return f"TableSelection(name='{self.table_name}', first_record={first_record})"
         return f"TableSelection(name='{self.table_name}', first_record={first_record}, schema='{self.schema}')"
@@ -159,14 +174,20 @@ class TableSelection(Selection):
         return select.select_records_all(self.sa_table, self.session)
 
     def head(self, size=5):
+        # One ORDER BY primary key LIMIT size query, records are kept by the selection.
         if size < 0:
             raise ValueError('size must be a positive number')
-        return self[:size]
+        records = select.select_head_records(self.sa_table, self.session, size)
+        return FetchedSubTableSelection(self.parent, records, self.table_name,
+                                        schema=self.schema, sa_table=self.sa_table)
 
     def tail(self, size=5):
+        # One ORDER BY primary key DESC LIMIT size query, records are kept by the selection.
         if size < 0:
             raise ValueError('size must be a positive number')
-        return self[-size:]
+        records = select.select_tail_records(self.sa_table, self.session, size)
+        return FetchedSubTableSelection(self.parent, records, self.table_name,
+                                        schema=self.schema, sa_table=self.sa_table)
 
     def get_primary_keys_by_index(self, index: int) -> types.Record:
         return select.select_primary_key_record_by_index(self.sa_table, self.session, index)
@@ -184,15 +205,17 @@ class TableSelection(Selection):
 
     def update(self, records: List[types.Record]) -> None:
         # TODO: check if records match primary key values
-        update.update_records_session(self.sa_table, records, self.session)
+        self.parent._write_records(update.update_records_session, self.sa_table, records)
 
     def insert(self, records: Sequence[types.Record]) -> None:
         # TODO: check if records don't match any primary key values
-        insert.insert_records_session(self.sa_table, records, self.session)
+        self.parent._write_records(insert.insert_records_session, self.sa_table, records)
 
     def delete(self) -> None:
         # delete all records in sub table
-        delete.delete_records_by_values_session(self.sa_table, self.get_primary_key_values(), self.session)
+        primary_key_values = self.get_primary_key_values()
+        self.parent._write(delete.delete_records_by_values_session, self.sa_table, primary_key_values,
+                           rows=len(primary_key_values))
 
 
 @selection_chaining
@@ -305,8 +328,15 @@ class TableSubColumnSelection(TableSelection):
 @selection_chaining
 class SubTableSelection(TableSelection):
     # returned when a subset of records is selecected
-    def __init__(self, parent: parent.SessionParent, primary_key_values: List[types.Record], table_name: str):
-        super().__init__(self, parent, table_name)
+    def __init__(
+        self,
+        parent: parent.SessionParent,
+        primary_key_values: List[types.Record],
+        table_name: str,
+        schema: Optional[str] = None,
+        sa_table: Optional[Table] = None
+    ) -> None:
+        super().__init__(parent, table_name, schema=schema, sa_table=sa_table)
         self.primary_key_values = primary_key_values
 
     def __repr__(self):
@@ -421,6 +451,19 @@ class SubTableSelection(TableSelection):
     def records(self) -> List[types.Record]:
         return select.select_records_by_primary_keys(self.sa_table, self.session, self.primary_key_values)
 
+    def head(self, size=5):
+        if size < 0:
+            raise ValueError('size must be a positive number')
+        return SubTableSelection(self.parent, self.primary_key_values[:size], self.table_name,
+                                 schema=self.schema, sa_table=self.sa_table)
+
+    def tail(self, size=5):
+        if size < 0:
+            raise ValueError('size must be a positive number')
+        primary_key_values = self.primary_key_values[-size:] if size else []
+        return SubTableSelection(self.parent, primary_key_values, self.table_name,
+                                 schema=self.schema, sa_table=self.sa_table)
+
     def get_primary_key_values(self):
         return self.primary_key_values
 
@@ -433,6 +476,44 @@ class SubTableSelection(TableSelection):
     def get_primary_keys_by_filter(self, filter: Iterable[bool]):
         return [record for record, b in zip(self.primary_key_values, filter) if b]
 
+@selection_chaining
+class FetchedSubTableSelection(SubTableSelection):
+    # returned by head and tail, holds the records fetched by a single query
+    def __init__(
+        self,
+        parent: parent.SessionParent,
+        records: List[types.Record],
+        table_name: str,
+        schema: Optional[str] = None,
+        sa_table: Optional[Table] = None
+    ) -> None:
+        Selection.__init__(self, parent, table_name, schema=schema, sa_table=sa_table)
+        keys = features.primary_keys(self.sa_table)
+        self.primary_key_values = [{key: record[key] for key in keys} for record in records]
+        self.fetched_records = records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    @property
+    def records(self) -> List[types.Record]:
+        # Snapshot taken when the selection was made, does not query again.
+        return [record.copy() for record in self.fetched_records]
+
+    def head(self, size=5):
+        if size < 0:
+            raise ValueError('size must be a positive number')
+        return FetchedSubTableSelection(self.parent, self.fetched_records[:size], self.table_name,
+                                        schema=self.schema, sa_table=self.sa_table)
+
+    def tail(self, size=5):
+        if size < 0:
+            raise ValueError('size must be a positive number')
+        records = self.fetched_records[-size:] if size else []
+        return FetchedSubTableSelection(self.parent, records, self.table_name,
+                                        schema=self.schema, sa_table=self.sa_table)
+
+
 @selection_chaining
 class SubTableSubColumnSelection(SubTableSelection):
     # returned when a subset of records is selected and a subset of columns is selected
@@ -549,29 +630,34 @@ class ColumnSelection(Selection):
 
     def __add__(self, value) -> None:
         # update values by adding value
-        records = self.get_records()
-        if isinstance(value, Number):
-            for record in records:
-                record[self.column_name] += value
-
-        elif isinstance(value, Iterable) and not isinstance(value, str):
-            for record, val in zip(records, value):
-                record[self.column_name] += val
-
-        update.update_records_session(self.sa_table, records, self.session)
+        self._update_by(operator.add, value)
 
     def __sub__(self, value) -> None:
         # update values by subtracting value
-        records = self.get_records()
-        if isinstance(value, Number):
-            for record in records:
-                record[self.column_name] -= value
+        self._update_by(operator.sub, value)
 
-        elif isinstance(value, Iterable) and not isinstance(value, str):
-            for record, val in zip(records, value):
-                record[self.column_name] -= val
+    def __iadd__(self, value):
+        # sst['age'] += value, the table then sets the column to this selection.
+        self._update_by(operator.add, value)
+        return self
+
+    def __isub__(self, value):
+        self._update_by(operator.sub, value)
+        return self
 
-        update.update_records_session(self.sa_table, records, self.session)
+    def _update_by(self, op, value) -> None:
+        # Update records are built while iterating, records of a spilled
+        # SpilledSequence are fresh copies every time they are read.
+        if isinstance(value, Number):
+            values = repeat(value)
+        elif isinstance(value, Iterable) and not isinstance(value, str):
+            values = value
+        else:
+            return
+        keys = features.primary_keys(self.sa_table)
+        records = [dict({key: record[key] for key in keys}, **{self.column_name: op(record[self.column_name], val)})
+                   for record, val in zip(self.get_records(), values)]
+        self.parent._write_records(update.update_records_session, self.sa_table, records)
 
     def __eq__(self, other) -> filter.Filter:
         # ColumnSelection == value
@@ -644,6 +730,10 @@ class ColumnSelection(Selection):
         return primary_keys[_slice]
 
     def update(self, values):
+        if type(values) is type(self) is ColumnSelection and \
+                (values.table_name, values.column_name) == (self.table_name, self.column_name):
+            # Already holds the values, after sst['age'] += value.
+            return
         primary_key_values = self.get_primary_key_values()
         if isinstance(values, Iterable) and not isinstance(values, str):
             for record, value in zip(primary_key_values, values):
@@ -653,7 +743,7 @@ class ColumnSelection(Selection):
             for record in primary_key_values:
                 record[self.column_name] = values
 
-        update.update_records_session(self.sa_table, primary_key_values, self.session)
+        self.parent._write_records(update.update_records_session, self.sa_table, primary_key_values)
 
 @selection_chaining
 class SubColumnSelection(ColumnSelection):
@@ -717,11 +807,11 @@ class RecordSelection(Selection):
 
     def update(self, record: types.Record) -> None:
         # update record with new values
-        update.update_records_session(self.sa_table, [record], self.session)
+        self.parent._write_records(update.update_records_session, self.sa_table, [record])
 
     def delete(self) -> None:
         # delete the record
-        delete.delete_record_by_values_session(self.sa_table, self.primary_key_values, self.session)
+        self.parent._write(delete.delete_record_by_values_session, self.sa_table, self.primary_key_values)
 
 
 class SubRecordSelection(RecordSelection):
@@ -786,13 +876,13 @@ class ValueSelection(Selection):
         # update value subtracting value
         record = self.primary_key_values.copy()
         record[self.column_name] = value - self.value
-        update.update_records_session(self.sa_table, [record], self.session)
+        self.parent._write_records(update.update_records_session, self.sa_table, [record])
 
     def __add__(self, value):
         # update value adding value
         record = self.primary_key_values.copy()
         record[self.column_name] = value + self.value
-        update.update_records_session(self.sa_table, [record], self.session)
+        self.parent._write_records(update.update_records_session, self.sa_table, [record])
 
     @property
     def value(self):
@@ -802,4 +892,4 @@ class ValueSelection(Selection):
         # update the value in the table.
         record = self.primary_key_values.copy()
         record[self.column_name] = value
-        update.update_records_session(self.sa_table, [record], self.session)
\ No newline at end of file
+        self.parent._write_records(update.update_records_session, self.sa_table, [record])
\ No newline at end of file
@@ -1,12 +1,32 @@
+from typing import Dict, Optional
+
+import sqlalchemy as sa
+
 import sessionize.orm.selection as selection
 import sessionize.orm.session_parent as parent
-import sqlalchemize.features as features
+import sessionize.utils.features as features
+import sessionize.utils.snapshot as snapshot
+from sessionize.orm.table_info import TableInfo
 
 
 class SessionDatabase(parent.SessionParent):
-    def __init__(self, engine):
-        parent.SessionParent.__init__(self, engine)
+    def __init__(
+        self,
+        engine,
+        approximate_row_count: bool = False,
+        pipelined: bool = False,
+        commit_every: int = 1000,
+        queue_size: int = 100,
+        autoflush_every: Optional[int] = None,
+        autocommit_every: Optional[int] = None
+    ):
+        parent.SessionParent.__init__(self, engine, approximate_row_count=approximate_row_count,
+                                      pipelined=pipelined, commit_every=commit_every,
+                                      queue_size=queue_size, autoflush_every=autoflush_every,
+                                      autocommit_every=autocommit_every)
         self.tables = {}
+        # MetaData from reflect, by schema.
+        self.metadatas: Dict[Optional[str], sa.MetaData] = {}
 
     def __repr__(self) -> str:
         return f"""SessionDatabase(table_names={self.table_names()})"""
@@ -24,13 +44,72 @@ class SessionDatabase(parent.SessionParent):
             return self.tables[key]
         raise KeyError('SessionDataBase key type can only be str.')
 
+    def reflect(self, schema: Optional[str] = None) -> Dict[str, selection.TableSelection]:
+        """
+        Reflects every table in schema with a single MetaData.reflect call
+        and caches a TableSelection per table in self.tables.
+        Uses the schema snapshot when enabled.
+
+        Returns dict of table key: TableSelection for the schema.
+        """
+        schema_snapshot = snapshot.get_schema_snapshot()
+        metadata = None
+        if schema_snapshot is not None:
+            # None on databases without a schema fingerprint.
+            metadata = schema_snapshot.get_metadata(self.engine, schema)
+        if metadata is None:
+            metadata = sa.MetaData()
+            metadata.reflect(bind=self.engine, schema=schema)
+        self.metadatas[schema] = metadata
+        reflected = {}
+        for sa_table in metadata.tables.values():
+            if sa_table.schema != schema:
+                # Tables from other schemas pulled in by foreign keys.
+                continue
+            self.add_sa_table(sa_table)
+            key = sa_table.name if schema is None else f'{schema}.{sa_table.name}'
+            self.tables[key] = selection.TableSelection(self, sa_table.name, schema=schema, sa_table=sa_table)
+            reflected[key] = self.tables[key]
+        return reflected
+
+    def describe_all(self, schema: Optional[str] = None) -> Dict[str, TableInfo]:
+        """
+        Returns TableInfo for every table in schema.
+        Reflects the schema once and counts every table's rows with
+        a single UNION ALL query, so the number of queries does not
+        grow with the number of tables.
+        first_record is not selected and is always None.
+        """
+        if schema not in self.metadatas:
+            self.reflect(schema)
+        sa_tables = [sa_table for sa_table in self.metadatas[schema].tables.values()
+                     if sa_table.schema == schema]
+        row_counts = features.get_row_counts(sa_tables, self.session)
+        return {
+            sa_table.name if schema is None else f'{schema}.{sa_table.name}':
+            TableInfo(sa_table.name,
+                      features.get_column_types(sa_table),
+                      row_count,
+                      features.primary_keys(sa_table),
+                      None,
+                      sa_table.schema)
+            for sa_table, row_count in zip(sa_tables, row_counts)
+        }
+
     def table_names(self, schema=None):
         if schema is not None:
-            names = features.get_table_names(self.engine, schema)
+            names = self._get_table_names(schema)
             return [f'{schema}.{name}' for name in names]
         out = []
         for schema in features.get_schemas(self.engine):
-            names = features.get_table_names(self.engine, schema)
+            names = self._get_table_names(schema)
             names = [f'{schema}.{name}' for name in names]
             out.extend(names)
-        return out
\ No newline at end of file
+        return out
+
+    def _get_table_names(self, schema: Optional[str]):
+        # Reflected schemas do not need to query the database again.
+        if schema in self.metadatas:
+            return [sa_table.name for sa_table in self.metadatas[schema].tables.values()
+                    if sa_table.schema == schema]
+        return features.get_table_names(self.engine, schema)
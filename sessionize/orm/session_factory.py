@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import sqlalchemy.engine as sa_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+import sessionize.exceptions as exceptions
+import sessionize.utils.features as features
+from sessionize.orm.session_table import SessionTable
+
+
+class SessionTableFactory:
+    """
+    Hands out SessionTables for one table that are safe to use from many threads.
+
+    The table is reflected once, when the factory is created.
+    Each SessionTable is a lightweight view that shares the reflected
+    table and uses the scoped_session for the current thread,
+    or for the current request when scopefunc is given.
+    Sessions check out connections from engine's pool.
+
+        people = SessionTableFactory(engine, 'people')
+
+        def handle_request():
+            with people.scope() as st:
+                st.insert_one_record({'name': 'Ava'})
+    """
+    def __init__(
+        self,
+        engine: sa_engine.Engine,
+        name: str,
+        schema: Optional[str] = None,
+        scopefunc: Optional[Callable[[], object]] = None,
+        approximate_row_count: bool = False
+    ) -> None:
+        """
+        scopefunc: returns the current scope key, such as a request id,
+            default is the current thread.
+        """
+        self.engine = engine
+        self.name = name
+        self.schema = schema
+        self.approximate_row_count = approximate_row_count
+        self.sa_table = features.get_table(name, engine, schema=schema)
+        if not features.has_primary_key(self.sa_table):
+            raise exceptions.MissingPrimaryKey(
+                'Sessionize requires sql table to have a primary key to work properly.\n' +
+                'Use sessionize.create_primary_key to add a primary key to your table.')
+        self.sessions = scoped_session(sessionmaker(bind=engine), scopefunc=scopefunc)
+
+    def __repr__(self) -> str:
+        return f"SessionTableFactory(name='{self.name}', schema={self.schema!r})"
+
+    def __call__(self) -> SessionTable:
+        """
+        Returns a SessionTable using the current scope's session.
+        Call remove at the end of the scope to close the session.
+        """
+        return SessionTable(self.sa_table, self.engine, schema=self.schema,
+                            approximate_row_count=self.approximate_row_count,
+                            session=self.sessions())
+
+    def remove(self) -> None:
+        # Closes the current scope's session and returns its connection to the pool.
+        self.sessions.remove()
+
+    @contextmanager
+    def scope(self) -> Iterator[SessionTable]:
+        """
+        SessionTable for a unit of work, commits on exit
+        or rolls back if an exception was raised, then removes the session.
+        """
+        session_table = self()
+        try:
+            with session_table:
+                yield session_table
+        finally:
+            self.remove()
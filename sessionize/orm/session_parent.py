@@ -1,23 +1,159 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
 import sqlalchemy.orm.session as sa_session
 
+import sessionize.orm.pipeline as pipeline
+import sessionize.orm.table_info as table_info
+import sessionize.utils.features as features
+
 
 class SessionParent:
-    def __init__(self, engine):
+    def __init__(
+        self,
+        engine,
+        approximate_row_count: bool = False,
+        session: Optional[sa_session.Session] = None,
+        pipelined: bool = False,
+        commit_every: int = 1000,
+        queue_size: int = 100,
+        autoflush_every: Optional[int] = None,
+        autocommit_every: Optional[int] = None
+    ):
+        """
+        pipelined: if True, writes are applied by a background writer thread
+            with its own session, committed every commit_every writes,
+            see pipeline.PipelinedWriter. Reads only see the writes after
+            flush or commit. Call close when done.
+        autoflush_every: flush the session and expunge every object from it
+            every autoflush_every records written.
+        autocommit_every: commit the session and expunge every object from it
+            every autocommit_every records written, so the database transaction
+            and its locks do not grow for the whole life of a long running session.
+            rollback only undoes the records written since the last commit.
+            Record lists are split into writes that end on these counts.
+            Writes of unknown size, such as apply or batched writes
+            from an iterator, count as one record.
+            sessionize writes are Core statements executed straight away,
+            they add no objects to the identity map, so flush and expunge
+            only release ORM objects added to the session by the caller.
+        """
         self.engine = engine
-        self.session = sa_session.Session(engine)
+        # session is passed in by SessionTableFactory, one per thread or request.
+        self.session = sa_session.Session(engine) if session is None else session
+        self.writer = pipeline.PipelinedWriter(engine, commit_every, queue_size) if pipelined else None
+        self.autoflush_every = autoflush_every
+        self.autocommit_every = autocommit_every
+        # Records written since the session was created.
+        self.row_count = 0
+        self.approximate_row_count = approximate_row_count
+        # TableInfo per table, cleared after every write or rollback in this session.
+        self.table_info_cache: Dict[Tuple[Optional[str], str], table_info.TableInfo] = {}
+        # Reflected tables shared by every Selection made from this parent.
+        self.sa_tables: Dict[Tuple[Optional[str], str], sa.Table] = {}
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         if exc_type:
-            self.session.rollback()
+            self.rollback()
+            if self.writer is not None:
+                self.writer.close()
             raise exc_value
         else:
             self.commit()
+            if self.writer is not None:
+                self.writer.close()
 
     def commit(self):
-        self.session.commit()
+        if self.writer is not None:
+            self.flush()
+        else:
+            self.session.commit()
 
     def rollback(self):
-        self.session.rollback()
\ No newline at end of file
+        if self.writer is not None:
+            self.writer.rollback()
+        self.session.rollback()
+        self.clear_table_info()
+
+    def flush(self) -> None:
+        """
+        Pipelined mode: waits until every queued write is committed,
+        so the writes are visible to reads. Raises the writer's error, if any.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+            self.clear_table_info()
+            # End the read transaction so later reads see the new writes.
+            self.session.commit()
+
+    def close(self) -> None:
+        # Pipelined mode: commits queued writes and stops the writer thread.
+        if self.writer is not None:
+            self.writer.close()
+        self.session.close()
+
+    def get_sa_table(self, table_name: str, schema: Optional[str] = None) -> sa.Table:
+        # Only reflects the table the first time it is requested.
+        key = (schema, table_name)
+        if key not in self.sa_tables:
+            self.sa_tables[key] = features.get_table(table_name, self.session, schema=schema)
+        return self.sa_tables[key]
+
+    def add_sa_table(self, sa_table: sa.Table) -> None:
+        self.sa_tables[(sa_table.schema, sa_table.name)] = sa_table
+
+    def get_table_info(self, sa_table: sa.Table) -> table_info.TableInfo:
+        # Only queries the database when the table has no cached info.
+        key = (sa_table.schema, sa_table.name)
+        if key not in self.table_info_cache:
+            self.table_info_cache[key] = table_info.select_table_info(
+                sa_table, self.session, approximate=self.approximate_row_count)
+        return self.table_info_cache[key]
+
+    def clear_table_info(self) -> None:
+        self.table_info_cache.clear()
+
+    def _write(self, func, *args, rows: int = 1, **kwargs):
+        # Every SessionTable and Selection write goes through here.
+        # rows is the number of records written, for autoflush_every and autocommit_every.
+        # Returns func's result, or None when pipelined.
+        self.clear_table_info()
+        if self.writer is not None:
+            self.writer.submit(func, args, kwargs)
+            return None
+        result = func(*args, session=self.session, **kwargs)
+        self._release(rows)
+        return result
+
+    def _write_records(self, func, sa_table: sa.Table, records: Sequence, **kwargs) -> None:
+        # Splits records so flushes and commits fall on exact record counts.
+        every = [n for n in (self.autoflush_every, self.autocommit_every) if n]
+        if self.writer is not None or not every:
+            self._write(func, sa_table, records, rows=len(records), **kwargs)
+            return
+        start = 0
+        while True:
+            size = min(n - self.row_count % n for n in every)
+            chunk = records[start:start + size]
+            self._write(func, sa_table, chunk, rows=len(chunk), **kwargs)
+            start += size
+            if start >= len(records):
+                return
+
+    def _release(self, rows: int) -> None:
+        # Periodic flush, expunge and commit for autoflush_every and autocommit_every.
+        before = self.row_count
+        self.row_count += rows
+
+        def reached(every: Optional[int]) -> bool:
+            return bool(every) and before // every != self.row_count // every
+
+        if reached(self.autocommit_every):
+            self.session.commit()
+            self.session.expunge_all()
+        elif reached(self.autoflush_every):
+            self.session.flush()
+            self.session.expunge_all()
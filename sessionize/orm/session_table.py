@@ -1,6 +1,5 @@
-from typing import Any, Dict, Generator, List, Optional, Union
-from dataclasses import dataclass
-from collections.abc import Iterable
+from typing import Any, Generator, List, Optional, Union
+from collections.abc import Iterable, Sized
 
 import sqlalchemy as sa
 import sqlalchemy.engine as sa_engine
@@ -8,33 +7,96 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm.session import Session
 from chaingang import selection_chaining
 
+import sessionize.utils.apply as apply
+import sessionize.utils.arrow_io as arrow_io
+import sessionize.utils.csv_io as csv_io
 import sessionize.utils.delete as delete
 import sessionize.utils.insert as insert
 import sessionize.utils.update as update
+import sessionize.utils.upsert as upsert
+import sessionize.utils.pandas_io as pandas_io
+import sessionize.utils.savepoint as savepoint
 import sessionize.utils.select as select
 import sessionize.utils.features as features
 import sessionize.exceptions as exceptions
 import sessionize.orm.session_parent as parent
 import sessionize.utils.types as types
 import sessionize.orm.selection as selection
+from sessionize.orm.table_info import TableInfo, select_table_info
 
 
 @selection_chaining
 class SessionTable(parent.SessionParent):
-    def __init__(self, name: str, engine: sa_engine.Engine, schema: Optional[str] = None):
-        parent.SessionParent.__init__(self, engine)
-        self.name = name
-        self.schema = schema
-        self.sa_table = features.get_table(self.name, self.session, self.schema)
-        if not features.has_primary_key(self.sa_table):
-            raise exceptions.MissingPrimaryKey(
-            'Sessionize requires sql table to have a primary key to work properly.\n' +
-            'Use sessionize.create_primary_key to add a primary key to your table.')
+    def __init__(
+        self,
+        name: Union[str, sa.Table],
+        engine: sa_engine.Engine,
+        schema: Optional[str] = None,
+        approximate_row_count: bool = False,
+        lazy: bool = False,
+        metadata: Optional[sa.MetaData] = None,
+        session: Optional[Session] = None,
+        pipelined: bool = False,
+        commit_every: int = 1000,
+        queue_size: int = 100,
+        autoflush_every: Optional[int] = None,
+        autocommit_every: Optional[int] = None
+    ) -> None:
+        """
+        name: name of sql table or an already reflected SqlAlchemy Table.
+        lazy: if True, reflection and primary key validation
+            are deferred until the table is first used.
+        metadata: MetaData holding previously reflected tables (e.g. a schema snapshot),
+            used instead of reflecting when it contains the table.
+        session: SqlAlchemy Session to use instead of creating a new one.
+        pipelined: if True, writes are committed by a background writer thread
+            every commit_every writes, see SessionParent.
+        autoflush_every, autocommit_every: flush and expunge, or commit,
+            the session every so many records written, see SessionParent.
+        """
+        parent.SessionParent.__init__(self, engine, approximate_row_count=approximate_row_count,
+                                      session=session, pipelined=pipelined,
+                                      commit_every=commit_every, queue_size=queue_size,
+                                      autoflush_every=autoflush_every,
+                                      autocommit_every=autocommit_every)
+        if isinstance(name, sa.Table):
+            self.name = name.name
+            self.schema = name.schema if schema is None else schema
+            self.add_sa_table(name)
+        else:
+            self.name = name
+            self.schema = schema
+            if metadata is not None:
+                key = name if schema is None else f'{schema}.{name}'
+                if key in metadata.tables:
+                    self.add_sa_table(metadata.tables[key])
+        self._table_selection = None
+        self._primary_key_checked = False
+        if not lazy:
+            self.table_selection
+
+    @property
+    def sa_table(self) -> sa.Table:
+        # Reflected once per SessionTable and shared with every selection.
+        sa_table = self.get_sa_table(self.name, self.schema)
+        if not self._primary_key_checked:
+            if not features.has_primary_key(sa_table):
+                raise exceptions.MissingPrimaryKey(
+                'Sessionize requires sql table to have a primary key to work properly.\n' +
+                'Use sessionize.create_primary_key to add a primary key to your table.')
+            self._primary_key_checked = True
+        return sa_table
+
+    @property
+    def table_selection(self) -> selection.TableSelection:
         # Used when SessionTable is selected (__getitem__, __setitem__, __delitem__)
-        self.table_selection = selection.TableSelection(self, self.name, schema=self.schema)
+        if self._table_selection is None:
+            self._table_selection = selection.TableSelection(self, self.name, schema=self.schema,
+                                                             sa_table=self.sa_table)
+        return self._table_selection
 
     def __repr__(self) -> str:
-        return repr_session_table(self.sa_table, self.session)
+        return repr_session_table(self.sa_table, self.session, self.get_table_info(self.sa_table))
 
     def __iter__(self):
         return iter(self.table_selection)
@@ -77,62 +139,145 @@ class SessionTable(parent.SessionParent):
     def primary_keys(self):
         return features.primary_keys(self.sa_table)
 
-    def info(self):
-        return select_table_info(self.sa_table, self.session)
+    def info(self) -> TableInfo:
+        return self.get_table_info(self.sa_table)
 
     def insert_records(self, records: List[types.Record]) -> None:
-        insert.insert_records_session(self.sa_table, records, self.session, schema=self.schema)
+        self._write_records(insert.insert_records_session, self.sa_table, records, schema=self.schema)
 
     def insert_one_record(self, record: types.Record) -> None:
         self.insert_records([record])
 
     def update_records(self, records: List[types.Record]) -> None:
-        update.update_records_session(self.sa_table, records, self.session, schema=self.schema)
+        self._write_records(update.update_records_session, self.sa_table, records, schema=self.schema)
 
     def update_one_record(self, record: types.Record) -> None:
         self.update_records([record])
 
+    def upsert_records(self, records: List[types.Record]) -> None:
+        self._write_records(upsert.upsert_records_session, self.sa_table, records, schema=self.schema)
+
+    def upsert_one_record(self, record: types.Record) -> None:
+        self.upsert_records([record])
+
+    def insert_dataframe(self, df, chunksize: int = 10000) -> None:
+        """
+        Inserts the rows of a pandas DataFrame, see
+        sessionize.utils.pandas_io.insert_dataframe_session.
+        """
+        self._write(pandas_io.insert_dataframe_session, self.sa_table, df, rows=len(df),
+                    chunksize=chunksize, schema=self.schema)
+
+    def update_dataframe(self, df, chunksize: int = 10000) -> None:
+        self._write(pandas_io.update_dataframe_session, self.sa_table, df, rows=len(df),
+                    chunksize=chunksize, schema=self.schema)
+
+    def upsert_dataframe(self, df, chunksize: int = 10000) -> None:
+        self._write(pandas_io.upsert_dataframe_session, self.sa_table, df, rows=len(df),
+                    chunksize=chunksize, schema=self.schema)
+
+    def _write_batched(self, func, records, batch_size, quarantine) -> List[savepoint.RejectedRecord]:
+        if self.writer is not None:
+            raise ValueError('Batched writes return their rejected records and can not be pipelined.')
+        rows = len(records) if isinstance(records, Sized) else 1
+        return self._write(func, self.sa_table, records, rows=rows, batch_size=batch_size,
+                           schema=self.schema, quarantine=quarantine)
+
+    def insert_records_batched(
+        self,
+        records: Iterable,
+        batch_size: int = 1000,
+        quarantine: Union[sa.Table, str, None] = None
+    ) -> List[savepoint.RejectedRecord]:
+        """
+        Inserts records in batches, each in its own savepoint, bad records are
+        isolated and returned instead of rolling back the whole session,
+        see sessionize.utils.savepoint.insert_records_batched_session.
+        """
+        return self._write_batched(savepoint.insert_records_batched_session, records, batch_size, quarantine)
+
+    def update_records_batched(
+        self,
+        records: Iterable,
+        batch_size: int = 1000,
+        quarantine: Union[sa.Table, str, None] = None
+    ) -> List[savepoint.RejectedRecord]:
+        return self._write_batched(savepoint.update_records_batched_session, records, batch_size, quarantine)
+
+    def upsert_records_batched(
+        self,
+        records: Iterable,
+        batch_size: int = 1000,
+        quarantine: Union[sa.Table, str, None] = None
+    ) -> List[savepoint.RejectedRecord]:
+        return self._write_batched(savepoint.upsert_records_batched_session, records, batch_size, quarantine)
+
     def delete_records(self, column_name: str, values: List[Any]) -> None:
-        delete.delete_records_session(self.sa_table, column_name, values, self.session, schema=self.schema)
+        self._write(delete.delete_records_session, self.sa_table, column_name, values,
+                    rows=len(values), schema=self.schema)
 
     def delete_one_record(self, column_name: str, value: Any) -> None:
         self.delete_records(column_name, [value])
 
+    def apply(
+        self,
+        func,
+        out_column: str,
+        columns: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        chunksize: int = 1000
+    ) -> None:
+        """
+        Sets out_column of every record to func(record) in a process pool,
+        see sessionize.utils.apply.apply_column_session.
+        """
+        self._write(apply.apply_column_session, self.sa_table, func, out_column,
+                    columns=columns, workers=workers, chunksize=chunksize, schema=self.schema)
+
     def select_records(
         self,
         chunksize=None) -> Union[List[types.Record], Generator[List[types.Record], None, None]]:
         return select.select_records(self.sa_table, self.session, chunksize=chunksize, schema=self.schema)
 
-    def head(self, size=5):
-        return self[:size]
-
-    def tail(self, size=5):
-        return self[-size:]
+    def to_dataframe(self, chunksize: Optional[int] = None, columns: Optional[List[str]] = None):
+        """
+        Returns the records as a pandas DataFrame, or a generator of
+        chunksized DataFrames, see sessionize.utils.pandas_io.select_dataframe.
+        """
+        return pandas_io.select_dataframe(self.sa_table, self.session, chunksize=chunksize,
+                                          schema=self.schema, include_columns=columns)
 
+    def to_csv(self, path: str, chunksize: int = 10000, progress=None):
+        """
+        Streams every record to a csv file, see sessionize.utils.csv_io.to_csv.
+        Returns a Progress with the rows written and rows_per_second.
+        """
+        return csv_io.to_csv(self.sa_table, path, self.session, chunksize=chunksize,
+                             schema=self.schema, progress=progress)
 
-@dataclass
-class TableInfo():
-    name: str
-    types: dict
-    row_count: int
-    keys: List[str]
-    first_record: Union[Dict[str, Any], None]
-    schema: Optional[str] = None
+    def to_parquet(self, path: str, row_group_size: int = 100000, progress=None):
+        """
+        Streams every record to a Parquet file, needs pyarrow,
+        see sessionize.utils.arrow_io.to_parquet.
+        Returns a Progress with the rows written and rows_per_second.
+        """
+        return arrow_io.to_parquet(self.sa_table, path, self.session, row_group_size=row_group_size,
+                                   schema=self.schema, progress=progress)
 
+    def head(self, size=5):
+        return self.table_selection.head(size)
 
-def select_table_info(table: sa.Table, connection: Union[Engine, Session]) -> TableInfo:
-    types = features.get_column_types(table)
-    row_count = features.get_row_count(table, connection)
-    keys = features.primary_keys(table)
-    first_record = select.select_first_record(table, connection)
-    return TableInfo(table.name, types, row_count, keys, first_record, table.schema)
+    def tail(self, size=5):
+        return self.table_selection.tail(size)
 
 
 def repr_session_table(
     sa_table: sa.Table,
-    connection: Union[Engine, Session]
+    connection: Union[Engine, Session],
+    table_info: Optional[TableInfo] = None
 ) -> str:
-    table_info = select_table_info(sa_table, connection)
+    if table_info is None:
+        table_info = select_table_info(sa_table, connection)
     types = table_info.types
     row_count = table_info.row_count
     keys = table_info.keys
@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Optional, Union
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.select as select
+import sessionize.utils.features as features
+
+
+@dataclass
+class TableInfo():
+    name: str
+    types: dict
+    row_count: int
+    keys: List[str]
+    first_record: Union[Dict[str, Any], None]
+    schema: Optional[str] = None
+
+
+def select_table_info(
+    table: sa.Table,
+    connection: Union[Engine, Session],
+    approximate: bool = False
+) -> TableInfo:
+    """
+    Queries database for table name, column types, row count,
+    primary keys and first record.
+
+    If approximate is True, the row count is read from database
+    statistics when available instead of counting every row.
+    """
+    types = features.get_column_types(table)
+    row_count = None
+    if approximate:
+        row_count = features.get_approximate_row_count(table, connection)
+    if row_count is None:
+        row_count = features.get_row_count(table, connection)
+    keys = features.primary_keys(table)
+    first_record = select.select_first_record(table, connection)
+    return TableInfo(table.name, types, row_count, keys, first_record, table.schema)
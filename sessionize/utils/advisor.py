@@ -0,0 +1,204 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+
+from sessionize.utils.features import _get_table_name
+from sessionize.utils.index import create_index, list_indexes, _index_name
+
+# Comparison operators of recorded predicates, IN is recorded as =.
+OPERATORS = ('=', '<', '<=', '>', '>=')
+
+
+@dataclass
+class IndexSuggestion:
+    table_name: str
+    column_names: List[str]
+    schema: Optional[str]
+    uses: int
+    index_name: str
+    operator: str = '='
+
+
+class IndexAdvisor:
+    """
+    Counts the columns used by sessionize filter predicates
+    that run in the database and suggests indexes for them.
+
+    Columns are recorded by delete_records and select_existing_values,
+    with the comparison operator of their WHERE clause.
+    ColumnSelection comparisons, such as sst['name'] == 'Olivia',
+    are evaluated in Python over every value of the column,
+    an index can not speed them up and they are not recorded.
+
+    Columns already leading an index or the primary key are never suggested.
+    On SQLite each candidate is checked with EXPLAIN QUERY PLAN
+    before it is suggested: the index is created in a transaction
+    that is always rolled back, and only suggested if the planner uses it.
+
+    Use sessionize.enable_index_advisor to start recording:
+
+        advisor = sessionize.enable_index_advisor()
+        ...
+        advisor.suggest(engine)
+        advisor.apply(engine)  # creates suggested indexes
+    """
+    def __init__(self) -> None:
+        # Counter of (schema, table name, column names, operator)
+        self.usage: Counter = Counter()
+
+    def __repr__(self) -> str:
+        return f"IndexAdvisor(usage={dict(self.usage)})"
+
+    def record(
+        self,
+        sa_table: Union[Table, str],
+        column_names: Sequence[str],
+        operator: str = '=',
+        schema: Optional[str] = None
+    ) -> None:
+        if operator not in OPERATORS:
+            raise ValueError(f'operator must be one of {OPERATORS}, not {operator!r}.')
+        if isinstance(sa_table, Table):
+            schema = sa_table.schema
+        key = (schema, _get_table_name(sa_table), tuple(column_names), operator)
+        self.usage[key] += 1
+
+    def clear(self) -> None:
+        self.usage.clear()
+
+    def suggest(
+        self,
+        engine: Engine,
+        min_uses: int = 1,
+        check: bool = True
+    ) -> List[IndexSuggestion]:
+        """
+        Returns IndexSuggestions for recorded columns used at least
+        min_uses times, most used first.
+        Tables that do not exist in engine's database are skipped.
+        """
+        uses: Counter = Counter()
+        operators = {}
+        # Uses of the same columns are added up, checked with their most used operator.
+        for (schema, table_name, column_names, operator), count in self.usage.most_common():
+            uses[(schema, table_name, column_names)] += count
+            operators.setdefault((schema, table_name, column_names), operator)
+        suggestions = []
+        for (schema, table_name, column_names), count in uses.most_common():
+            if count < min_uses:
+                break
+            if self._is_indexed(engine, table_name, column_names, schema):
+                continue
+            suggestion = IndexSuggestion(table_name, list(column_names), schema, count,
+                                         _index_name(table_name, column_names),
+                                         operators[(schema, table_name, column_names)])
+            if check and self.check(suggestion, engine) is False:
+                continue
+            suggestions.append(suggestion)
+        return suggestions
+
+    def apply(
+        self,
+        engine: Engine,
+        min_uses: int = 1,
+        check: bool = True
+    ) -> List[IndexSuggestion]:
+        """
+        Creates an index for every suggestion.
+        Returns the suggestions that were created.
+        """
+        suggestions = self.suggest(engine, min_uses=min_uses, check=check)
+        for suggestion in suggestions:
+            create_index(suggestion.table_name, suggestion.column_names, engine,
+                         index_name=suggestion.index_name, schema=suggestion.schema)
+        return suggestions
+
+    def check(self, suggestion: IndexSuggestion, engine: Engine) -> Optional[bool]:
+        """
+        Checks if the query planner would use the suggested index
+        for a filter on its columns with the suggestion's operator.
+
+        Returns None on databases other than SQLite, which are not checked.
+        """
+        if engine.dialect.name != 'sqlite':
+            return None
+        table = sa.Table(suggestion.table_name, sa.MetaData(), schema=suggestion.schema,
+                         *[sa.Column(name) for name in suggestion.column_names])
+        index = sa.Index(suggestion.index_name, *table.c)
+        where = ' AND '.join(f'{_quote(engine, name)} {suggestion.operator} ?' for name in suggestion.column_names)
+        query = f'EXPLAIN QUERY PLAN SELECT * FROM {_qualified(engine, table)} WHERE {where}'
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                connection.exec_driver_sql('BEGIN')
+                index.create(connection)
+                plan = connection.exec_driver_sql(query, tuple(0 for _ in suggestion.column_names)).fetchall()
+            finally:
+                transaction.rollback()
+        # The last column of each plan row is its detail text.
+        return any(suggestion.index_name in row[-1] for row in plan)
+
+    def _is_indexed(
+        self,
+        engine: Engine,
+        table_name: str,
+        column_names: Sequence[str],
+        schema: Optional[str]
+    ) -> bool:
+        # True if columns lead an existing index or the primary key.
+        # Also True for missing tables so they are skipped.
+        inspector = sa.inspect(engine)
+        if not inspector.has_table(table_name, schema=schema):
+            return True
+        column_names = list(column_names)
+        primary_key = inspector.get_pk_constraint(table_name, schema=schema)['constrained_columns']
+        leading = [primary_key] + [index['column_names'] for index in list_indexes(table_name, engine, schema)]
+        return any(list(columns[:len(column_names)]) == column_names for columns in leading)
+
+
+def _quote(engine: Engine, name: str) -> str:
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _qualified(engine: Engine, table: Table) -> str:
+    return engine.dialect.identifier_preparer.format_table(table)
+
+
+_advisor: Optional[IndexAdvisor] = None
+
+
+def enable_index_advisor() -> IndexAdvisor:
+    """
+    Start recording column usage for index suggestions.
+
+    Returns the IndexAdvisor.
+    """
+    global _advisor
+    if _advisor is None:
+        _advisor = IndexAdvisor()
+    return _advisor
+
+
+def disable_index_advisor() -> None:
+    global _advisor
+    _advisor = None
+
+
+def get_index_advisor() -> Optional[IndexAdvisor]:
+    return _advisor
+
+
+def record_column_usage(
+    sa_table: Union[Table, str],
+    column_names: Sequence[str],
+    operator: str = '=',
+    schema: Optional[str] = None
+) -> None:
+    # Does nothing unless the advisor is enabled.
+    if _advisor is not None:
+        _advisor.record(sa_table, column_names, operator, schema=schema)
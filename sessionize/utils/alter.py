@@ -1,25 +1,36 @@
-from typing import Union, Optional
+import operator
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Union, Optional
 
 from alembic.runtime.migration import MigrationContext
 from alembic.operations import Operations
 
+import sqlalchemy as sa
 # TODO: replace with interfaces
 from sqlalchemy import Table, Column
 from sqlalchemy.engine import Engine
+from sqlalchemy.sql.expression import ClauseElement
 
-from sessionize.utils.features import get_table, get_primary_key_constraints
-from sessionize.utils.insert import insert_from_table
+from sessionize.utils.features import get_table, get_primary_key_constraints, primary_keys
+from sessionize.utils.select import select_records_keyset_chunks
+from sessionize.utils.statements import _keyset_clause
+from sessionize.utils.progress import Progress
+from sessionize.utils.types import Record
+from sessionize.exceptions import BackfillError
 from sessionize.utils.drop import drop_table
-from sessionize.utils.features import _get_table, _get_table_name
+from sessionize.utils.features import _get_table, _get_table_name, _begin, _stream_rows
 from sqlalchemize.type_convert import _type_convert
 
 
+@contextmanager
 def _get_op(
     engine: Engine
-) -> Operations:
-    conn = engine.connect()
-    ctx = MigrationContext.configure(conn)
-    return Operations(ctx)
+) -> Iterator[Operations]:
+    # One pooled connection and transaction, returned to the pool on exit.
+    with _begin(engine) as conn:
+        ctx = MigrationContext.configure(conn)
+        yield Operations(ctx)
 
 
 def rename_column(
@@ -35,9 +46,9 @@ def rename_column(
         Returns newly reflected SqlAlchemy Table.
     """
     table_name = _get_table_name(table_name)
-    op = _get_op(engine)
-    with op.batch_alter_table(table_name, schema=schema) as batch_op:
-        batch_op.alter_column(old_col_name, nullable=True, new_column_name=new_col_name) # type: ignore
+    with _get_op(engine) as op:
+        with op.batch_alter_table(table_name, schema=schema) as batch_op:
+            batch_op.alter_column(old_col_name, nullable=True, new_column_name=new_col_name) # type: ignore
     return get_table(table_name, engine, schema=schema)
 
 
@@ -53,9 +64,9 @@ def drop_column(
         Returns newly reflected SqlAlchemy Table.
     """
     table_name = _get_table_name(table_name)
-    op = _get_op(engine)
-    with op.batch_alter_table(table_name, schema=schema) as batch_op:
-        batch_op.drop_column(col_name) # type: ignore
+    with _get_op(engine) as op:
+        with op.batch_alter_table(table_name, schema=schema) as batch_op:
+            batch_op.drop_column(col_name) # type: ignore
     return get_table(table_name, engine, schema=schema)
 
 
@@ -64,14 +75,112 @@ def add_column(
     column_name: str,
     dtype: type,
     engine: Engine,
-    schema: Optional[str] = None
+    schema: Optional[str] = None,
+    default: Any = None,
+    backfill: Union[Callable[[Record], Any], ClauseElement, str, None] = None,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[Progress], None]] = None
 ) -> Table:
+    """
+        Adds a column to a table.
+
+        default is set as the column's server default, so the database
+        fills existing rows with it without rewriting them in Python.
+
+        backfill computes the new column for existing rows, see backfill_column.
+
+        Returns newly reflected SqlAlchemy Table.
+    """
     table_name = _get_table_name(table_name)
     sa_type = _type_convert[dtype]
-    op = _get_op(engine)
-    col = Column(column_name, sa_type)
-    op.add_column(table_name, col, schema=schema) # type: ignore
-    return get_table(table_name, engine, schema=schema)
+    server_default = None
+    if default is not None:
+        literal = sa.literal(default, sa_type)
+        server_default = sa.text(str(literal.compile(dialect=engine.dialect,
+                                                     compile_kwargs={'literal_binds': True})))
+    col = Column(column_name, sa_type, server_default=server_default)
+    with _get_op(engine) as op:
+        op.add_column(table_name, col, schema=schema) # type: ignore
+    table = get_table(table_name, engine, schema=schema)
+    if backfill is not None:
+        backfill_column(table, column_name, backfill, engine, schema=schema,
+                        batch_size=batch_size, progress=progress)
+    return table
+
+
+def backfill_column(
+    table: Union[str, Table],
+    column_name: str,
+    backfill: Union[Callable[[Record], Any], ClauseElement, str],
+    engine: Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    start_after: Optional[Record] = None,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Optional[Record]:
+    """
+        Sets column_name for every record in primary key ordered batches,
+        each committed in its own transaction.
+
+        backfill can be:
+            a function called with each record that returns the new value,
+            a SqlAlchemy expression or a sql expression string (e.g. 'age * 2'),
+                evaluated by the database for each batch.
+
+        If a batch fails, raises BackfillError with the last committed
+        primary key values in last_key. Pass them as start_after to resume.
+        KeyboardInterrupt and SystemExit are re-raised as they are,
+        with last_key set on them. Progress.last_key also holds the last
+        committed key, so a progress callback can save it as a checkpoint.
+
+        Returns the primary key values of the last updated record.
+    """
+    table = _get_table(table, engine, schema=schema)
+    keys = primary_keys(table)
+    key_columns = [table.columns[key] for key in keys]
+    column = table.columns[column_name]
+    report = Progress()
+    last_key = start_after
+
+    if isinstance(backfill, str):
+        backfill = sa.literal_column(backfill)
+
+    try:
+        if isinstance(backfill, ClauseElement):
+            for key_chunk in select_records_keyset_chunks(table, engine, batch_size,
+                                                          include_columns=keys, start_after=start_after):
+                query = table.update().where(_keyset_clause(key_columns, key_chunk[-1], operator.le))
+                if last_key is not None:
+                    query = query.where(_keyset_clause(key_columns, last_key))
+                with engine.begin() as connection:
+                    connection.execute(query.values({column: backfill}))
+                last_key = key_chunk[-1]
+                report.last_key = last_key
+                report.add(len(key_chunk))
+                if progress is not None:
+                    progress(report)
+        else:
+            query = (table.update()
+                          .where(sa.and_(*[column == sa.bindparam(f'_key_{column.name}') for column in key_columns]))
+                          .values({column: sa.bindparam('_value')}))
+            for chunk in select_records_keyset_chunks(table, engine, batch_size, start_after=start_after):
+                params = [{'_value': backfill(record), **{f'_key_{key}': record[key] for key in keys}}
+                          for record in chunk]
+                with engine.begin() as connection:
+                    connection.execute(query, params)
+                last_key = {key: chunk[-1][key] for key in keys}
+                report.last_key = last_key
+                report.add(len(chunk))
+                if progress is not None:
+                    progress(report)
+    except Exception as e:
+        raise BackfillError(f'Backfill of {column_name} failed after {last_key}, '
+                            'pass last_key as start_after to resume.', last_key) from e
+    except BaseException as e:
+        # Interrupted, keep the exception type so it is not caught as an error.
+        e.last_key = last_key
+        raise
+    return last_key
 
 
 def rename_table(
@@ -86,8 +195,8 @@ def rename_table(
         Returns newly reflected SqlAlchemy Table.
     """
     old_table_name = _get_table_name(old_table_name)
-    op = _get_op(engine)
-    op.rename_table(old_table_name, new_table_name, schema=schema) # type: ignore
+    with _get_op(engine) as op:
+        op.rename_table(old_table_name, new_table_name, schema=schema) # type: ignore
     return get_table(new_table_name, engine, schema=schema)
 
 
@@ -96,21 +205,86 @@ def copy_table(
     new_table_name: str,
     engine: Engine,
     if_exists: str = 'replace',
-    schema: Optional[str] = None
+    schema: Optional[str] = None,
+    target_engine: Optional[Engine] = None,
+    chunksize: Optional[int] = None,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Progress], None]] = None
 ) -> Table:
     """
         Creates a copy of the given table with new_table_name.
         Drops a table with same new_table_name if_exists='replace'
 
+        When the copy is on the same engine and no chunksize is given,
+        rows are copied by the database with a single
+        INSERT INTO new_table SELECT ... FROM table.
+
+        With a chunksize, rows are copied in primary key ordered chunks,
+        each committed in its own transaction, sleeping pause seconds
+        between chunks. Same engine chunks still run as INSERT ... SELECT
+        over a key range. Copies to a different target_engine always
+        stream chunks (default chunksize 10000) through Python.
+
+        Tables without a primary key can not be chunked by key:
+        same engine copies then always run the single INSERT ... SELECT,
+        copies to another engine stream chunks from one server side cursor.
+
+        progress is called with a Progress (rows, seconds, rows_per_second)
+        after every committed chunk.
+
         Returns the new SqlAlchemy Table.
     """
     table = _get_table(table, engine, schema=schema)
-    op = _get_op(engine)
+    if target_engine is None:
+        target_engine = engine
     if if_exists == 'replace':
-        drop_table(new_table_name, engine, schema=schema)
-    op.create_table(new_table_name, *table.c, table.metadata, schema=schema) # type: ignore
-    new_table = get_table(new_table_name, engine, schema=schema)
-    insert_from_table(table, new_table, engine, schema=schema)
+        drop_table(new_table_name, target_engine, schema=schema)
+    with _get_op(target_engine) as op:
+        op.create_table(new_table_name, *table.c, table.metadata, schema=schema) # type: ignore
+    new_table = get_table(new_table_name, target_engine, schema=schema)
+    column_names = [column.name for column in table.columns]
+    keys = primary_keys(table)
+    report = Progress()
+
+    if target_engine is engine and (chunksize is None or not keys):
+        query = new_table.insert().from_select(column_names, sa.select(*table.columns))
+        with engine.begin() as connection:
+            rows = connection.execute(query).rowcount
+        report.add(max(rows, 0))
+        if progress is not None:
+            progress(report)
+        return new_table
+
+    if target_engine is engine:
+        key_columns = [table.columns[key] for key in keys]
+        last_key = None
+        for key_chunk in select_records_keyset_chunks(table, engine, chunksize, include_columns=keys):
+            query = sa.select(*table.columns).where(_keyset_clause(key_columns, key_chunk[-1], operator.le))
+            if last_key is not None:
+                query = query.where(_keyset_clause(key_columns, last_key))
+            with engine.begin() as connection:
+                connection.execute(new_table.insert().from_select(column_names, query))
+            last_key = key_chunk[-1]
+            report.add(len(key_chunk))
+            if progress is not None:
+                progress(report)
+            if pause:
+                time.sleep(pause)
+        return new_table
+
+    if keys:
+        chunks = select_records_keyset_chunks(table, engine, chunksize or 10_000)
+    else:
+        rows = _stream_rows(sa.select(*table.columns), engine, chunksize or 10_000)
+        chunks = ([dict(zip(column_names, row)) for row in chunk] for chunk in rows)
+    for chunk in chunks:
+        with target_engine.begin() as connection:
+            connection.execute(new_table.insert(), chunk)
+        report.add(len(chunk))
+        if progress is not None:
+            progress(report)
+        if pause:
+            time.sleep(pause)
     return new_table
 
 
@@ -128,19 +302,19 @@ def replace_primary_key(
     """
     table = _get_table(table, engine, schema=schema)
     table_name = table.name
-    op = _get_op(engine)
     keys = get_primary_key_constraints(table)
     
-    with op.batch_alter_table(table_name, schema=schema) as batch_op:
-        # name primary key constraint if not named (sqlite)
-        if keys[0] is None:
-            constraint_name = f'pk_{table_name}'
-            batch_op.create_primary_key(constraint_name, keys[1]) # type: ignore
-        else:
-            constraint_name = keys[0]
-        batch_op.drop_constraint(constraint_name, type_='primary') # type: ignore
-        batch_op.create_unique_constraint(constraint_name, table_name, [column_name]) # type: ignore
-        batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
+    with _get_op(engine) as op:
+        with op.batch_alter_table(table_name, schema=schema) as batch_op:
+            # name primary key constraint if not named (sqlite)
+            if keys[0] is None:
+                constraint_name = f'pk_{table_name}'
+                batch_op.create_primary_key(constraint_name, keys[1]) # type: ignore
+            else:
+                constraint_name = keys[0]
+            batch_op.drop_constraint(constraint_name, type_='primary') # type: ignore
+            batch_op.create_unique_constraint(constraint_name, table_name, [column_name]) # type: ignore
+            batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
         
     return get_table(table_name, engine)
 
@@ -159,11 +333,11 @@ def create_primary_key(
         Returns newly reflected SqlAlchemy Table.
     """
     table_name = _get_table_name(table_name)
-    op = _get_op(engine)
-    with op.batch_alter_table(table_name, schema=schema) as batch_op:
-        constraint_name = f'pk_{table_name}'
-        batch_op.create_unique_constraint(constraint_name, [column_name]) # type: ignore
-        batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
+    with _get_op(engine) as op:
+        with op.batch_alter_table(table_name, schema=schema) as batch_op:
+            constraint_name = f'pk_{table_name}'
+            batch_op.create_unique_constraint(constraint_name, [column_name]) # type: ignore
+            batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
         
     return get_table(table_name, engine, schema=schema)
 
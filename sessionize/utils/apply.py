@@ -0,0 +1,115 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, List, Optional, Sequence, Union
+
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+from sessionize.utils.select import select_records_keyset_chunks
+
+
+def _init_worker(engine: Engine) -> None:
+    # A forked worker inherits the parent's pooled connections, which must
+    # not be shared between processes. Drop them without closing them so
+    # the parent keeps its own, func gets new connections if it uses engine.
+    engine.dispose(close=False)
+
+
+def _apply_chunk(
+    func: Callable[[types.Record], Any],
+    records: List[types.Record],
+    keys: List[str],
+    out_column: str
+) -> List[types.Record]:
+    # Runs in a worker, returns primary key values and the new out_column value.
+    return [{**{key: record[key] for key in keys}, out_column: func(record)} for record in records]
+
+
+def apply_column_session(
+    sa_table: Union[Table, str],
+    func: Callable[[types.Record], Any],
+    out_column: str,
+    session: Session,
+    columns: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 1000,
+    schema: Optional[str] = None
+) -> int:
+    """
+    Sets out_column of every record to func(record),
+    running func in a process pool.
+    Only adds sql records updates to session, does not commit session.
+
+    Records are read in keyset chunks and each chunk is sent to a worker.
+    At most 2 * workers chunks are in flight, so memory use does not
+    depend on the size of the table. Results are written back as one
+    batched update per chunk, in primary key order.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    func: Callable[[Record], Any]
+        called with each record, returns the new out_column value.
+        Must be picklable (a module level function) when workers > 1.
+    out_column: str
+        name of existing column to write results to.
+    session: sa.orm.session.Session
+        SqlAlchemy session to read records and add sql updates to.
+    columns: list[str], default None
+        columns passed to func in each record, default all columns.
+        Primary key columns are always included.
+    workers: int, default None
+        number of worker processes, default os.cpu_count().
+        If 1, func runs in this process.
+    chunksize: int, default 1000
+        records per chunk sent to a worker and per update.
+
+    Returns
+    -------
+    number of records updated.
+    """
+    table = features._get_table(sa_table, session, schema=schema)
+    keys = features.primary_keys(table)
+    include_columns = None if columns is None else keys + [c for c in columns if c not in keys]
+    chunks = select_records_keyset_chunks(table, session, chunksize, include_columns=include_columns)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    def write(results: List[types.Record]) -> None:
+        for statement, parameters in statements.update_records_statements(table, results):
+            session.execute(statement, parameters)
+
+    updated = 0
+    if workers <= 1:
+        for chunk in chunks:
+            write(_apply_chunk(func, chunk, keys, out_column))
+            updated += len(chunk)
+        return updated
+
+    context = multiprocessing.get_context()
+    engine = features._get_engine(session)
+    fork = context.get_start_method() == 'fork'
+    # Only a forked worker shares the parent's engine, spawned workers import fresh.
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=_init_worker if fork else None,
+                                   initargs=(engine,) if fork else ())
+    pending: Deque[Future] = deque()
+    with executor:
+        for chunk in chunks:
+            pending.append(executor.submit(_apply_chunk, func, chunk, keys, out_column))
+            if len(pending) >= 2 * workers:
+                results = pending.popleft().result()
+                write(results)
+                updated += len(results)
+        while pending:
+            results = pending.popleft().result()
+            write(results)
+            updated += len(results)
+    return updated
@@ -0,0 +1,196 @@
+import importlib
+import json
+from typing import Callable, Generator, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine, Row
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+from sessionize.utils.load import load
+from sessionize.utils.progress import Progress
+
+# pyarrow is an optional dependency: pip install sessionize[arrow]
+
+
+def _pyarrow():
+    # Imported on first use, so sessionize works without pyarrow installed.
+    try:
+        return importlib.import_module('pyarrow'), importlib.import_module('pyarrow.parquet')
+    except ImportError as e:
+        raise ImportError('Parquet support needs pyarrow, install it with pip install sessionize[arrow].') from e
+
+
+def _arrow_type(column: sa.Column):
+    # Arrow type for the reflected column type, strings for anything unknown.
+    pa, _ = _pyarrow()
+    column_type = column.type
+    if isinstance(column_type, sa.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sa.SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, sa.Integer):
+        return pa.int64()
+    if isinstance(column_type, sa.Float):
+        return pa.float64()
+    if isinstance(column_type, sa.Numeric):
+        if column_type.asdecimal and column_type.precision is not None:
+            return pa.decimal128(column_type.precision, column_type.scale or 0)
+        return pa.float64()
+    if isinstance(column_type, sa.DateTime):
+        return pa.timestamp('us', tz='UTC' if column_type.timezone else None)
+    if isinstance(column_type, sa.Date):
+        return pa.date32()
+    if isinstance(column_type, sa.Time):
+        return pa.time64('us')
+    if isinstance(column_type, sa.LargeBinary):
+        return pa.binary()
+    return pa.string()
+
+
+def arrow_schema(
+    sa_table: Table,
+    include_columns: Optional[Sequence[str]] = None
+):
+    """
+    Returns pyarrow.Schema with one field per column of sa_table,
+    typed from the reflected column types.
+    JSON and unknown column types are stored as strings.
+    """
+    pa, _ = _pyarrow()
+    columns = statements._select_columns(sa_table, include_columns)
+    return pa.schema([pa.field(column.name, _arrow_type(column), nullable=column.nullable)
+                      for column in columns])
+
+
+def _record_batch(rows: List[Row], columns: List[sa.Column], schema):
+    # Transposes cursor rows into one Arrow array per column.
+    pa, _ = _pyarrow()
+    arrays = []
+    for column, field, values in zip(columns, schema, zip(*rows)):
+        if isinstance(column.type, sa.JSON):
+            values = [None if value is None else json.dumps(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def to_parquet(
+    sa_table: Union[Table, str],
+    path: str,
+    connection: types.SqlConnection,
+    row_group_size: int = 100000,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    compression: str = 'snappy',
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Progress:
+    """
+    Writes every record in sql table to a Parquet file.
+    Needs pyarrow, pip install sessionize[arrow].
+
+    Rows are read from a server side cursor, row_group_size at a time,
+    and each chunk is written as one row group built column-wise
+    from the cursor rows, typed by arrow_schema.
+    Memory use depends on row_group_size, not on the size of the table.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    path: str
+        path of the Parquet file to write.
+    connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
+        connection used to query database.
+    row_group_size: int, default 100000
+        rows per Parquet row group and per cursor fetch.
+    include_columns: list[str], default None
+        columns to write, default all columns.
+    compression: str, default 'snappy'
+        Parquet compression codec.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every row group written.
+
+    Returns
+    -------
+    Progress with the rows written and rows_per_second.
+    """
+    pa, pq = _pyarrow()
+    table = features._get_table(sa_table, connection, schema=schema)
+    columns = statements._select_columns(table, include_columns)
+    file_schema = arrow_schema(table, include_columns)
+    query = statements.select_records_statement(table, include_columns)
+    total = Progress()
+    with pq.ParquetWriter(path, file_schema, compression=compression) as writer:
+        for rows in features._stream_rows(query, connection, row_group_size):
+            batch = _record_batch(rows, columns, file_schema)
+            writer.write_table(pa.Table.from_batches([batch]), row_group_size=row_group_size)
+            total.add(len(rows))
+            if progress is not None:
+                progress(total)
+    return total
+
+
+def _parquet_records(
+    parquet_file,
+    table: Table,
+    column_names: List[str],
+    batch_size: int
+) -> Generator[types.Record, None, None]:
+    # Records from one Arrow batch at a time, JSON columns decoded from their strings.
+    json_columns = [name for name in column_names if isinstance(table.columns[name].type, sa.JSON)]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=column_names):
+        for record in batch.to_pylist():
+            for name in json_columns:
+                if record[name] is not None:
+                    record[name] = json.loads(record[name])
+            yield record
+
+
+def from_parquet(
+    path: str,
+    sa_table: Union[Table, str],
+    engine: Engine,
+    batch_size: int = 10000,
+    schema: Optional[str] = None,
+    checkpoint: Optional[str] = None,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Progress:
+    """
+    Inserts the rows of a Parquet file into sql table.
+    Needs pyarrow, pip install sessionize[arrow].
+
+    The file is memory-mapped and read batch_size rows at a time,
+    then inserted batch_size rows per executemany and transaction,
+    see sessionize.load. File column names must match table column names.
+
+    Parameters
+    ----------
+    path: str
+        path of the Parquet file to read.
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    engine: sa.engine.Engine
+        SqlAlchemy engine to insert with.
+    batch_size: int, default 10000
+        number of rows read and inserted per transaction.
+    checkpoint: str, default None
+        checkpoint file to resume an interrupted read from, see sessionize.load.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every committed batch.
+
+    Returns
+    -------
+    Progress with the rows inserted and rows_per_second.
+    """
+    _, pq = _pyarrow()
+    table = features._get_table(sa_table, engine, schema=schema)
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    column_names = parquet_file.schema_arrow.names
+    missing = [name for name in column_names if name not in table.columns]
+    if missing:
+        raise KeyError(f'Columns {missing} are not in table {table.name}.')
+    records = _parquet_records(parquet_file, table, column_names, batch_size)
+    return load(table, records, engine, batch_size=batch_size, checkpoint=checkpoint, progress=progress)
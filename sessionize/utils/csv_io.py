@@ -0,0 +1,169 @@
+import csv
+import datetime
+import decimal
+import json
+from typing import Any, Callable, Generator, Iterator, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+from sessionize.utils.load import load
+from sessionize.utils.progress import Progress
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ('1', 'true', 't', 'yes', 'y')
+
+
+def _converter(column: sa.Column) -> Callable[[str], Any]:
+    # Parses a csv string into the python type of the reflected column type.
+    column_type = column.type
+    if isinstance(column_type, sa.Boolean):
+        return _to_bool
+    if isinstance(column_type, sa.Integer):
+        return int
+    if isinstance(column_type, sa.Float):
+        return float
+    if isinstance(column_type, sa.Numeric):
+        return decimal.Decimal if column_type.asdecimal else float
+    if isinstance(column_type, sa.DateTime):
+        return datetime.datetime.fromisoformat
+    if isinstance(column_type, sa.Date):
+        return datetime.date.fromisoformat
+    if isinstance(column_type, sa.Time):
+        return datetime.time.fromisoformat
+    if isinstance(column_type, sa.JSON):
+        return json.loads
+    return str
+
+
+def _encode_json(row, positions: List[int]) -> list:
+    # JSON values as JSON text, csv.writer would write their python repr.
+    row = list(row)
+    for i in positions:
+        if row[i] is not None:
+            row[i] = json.dumps(row[i])
+    return row
+
+
+def _parse_rows(
+    reader: Iterator[List[str]],
+    table: Table,
+    column_names: Sequence[str]
+) -> Generator[types.Record, None, None]:
+    # Empty strings are read as NULL, except in string columns.
+    converters = [_converter(table.columns[name]) for name in column_names]
+    nullable = [converter is not str for converter in converters]
+    for row in reader:
+        yield {name: None if value == '' and null else convert(value)
+               for name, value, convert, null in zip(column_names, row, converters, nullable)}
+
+
+def to_csv(
+    sa_table: Union[Table, str],
+    path: str,
+    connection: types.SqlConnection,
+    chunksize: int = 10000,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Progress:
+    """
+    Writes every record in sql table to a csv file with a header row.
+
+    Rows are read from a server side cursor, chunksize at a time,
+    and written as they arrive, so memory use does not depend on the
+    size of the table. NULL is written as an empty string,
+    JSON columns as JSON text.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    path: str
+        path of the csv file to write.
+    connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
+        connection used to query database.
+    chunksize: int, default 10000
+        rows fetched from the cursor at a time.
+    include_columns: list[str], default None
+        columns to write, default all columns.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every chunk written.
+
+    Returns
+    -------
+    Progress with the rows written and rows_per_second.
+    """
+    table = features._get_table(sa_table, connection, schema=schema)
+    query = statements.select_records_statement(table, include_columns)
+    total = Progress()
+    json_positions = [i for i, column in enumerate(query.selected_columns) if isinstance(column.type, sa.JSON)]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([column.name for column in query.selected_columns])
+        for rows in features._stream_rows(query, connection, chunksize):
+            if json_positions:
+                rows = [_encode_json(row, json_positions) for row in rows]
+            writer.writerows(rows)
+            total.add(len(rows))
+            if progress is not None:
+                progress(total)
+    return total
+
+
+def read_csv(
+    path: str,
+    sa_table: Union[Table, str],
+    engine: Engine,
+    batch_size: int = 10000,
+    schema: Optional[str] = None,
+    checkpoint: Optional[str] = None,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Progress:
+    """
+    Inserts the rows of a csv file with a header row into sql table.
+
+    The file is read lazily and inserted batch_size rows per
+    executemany and transaction, see sessionize.load.
+    Header names must match table column names.
+    Values are converted with a parser picked once per column from the
+    reflected column type: integers, floats, decimals, booleans,
+    ISO format dates and times, and JSON. Empty values are NULL,
+    except in string columns.
+
+    Parameters
+    ----------
+    path: str
+        path of the csv file to read.
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    engine: sa.engine.Engine
+        SqlAlchemy engine to insert with.
+    batch_size: int, default 10000
+        number of rows inserted per transaction.
+    checkpoint: str, default None
+        checkpoint file to resume an interrupted read from, see sessionize.load.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every committed batch.
+
+    Returns
+    -------
+    Progress with the rows inserted and rows_per_second.
+    """
+    table = features._get_table(sa_table, engine, schema=schema)
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        column_names = next(reader, None)
+        if column_names is None:
+            return Progress()
+        missing = [name for name in column_names if name not in table.columns]
+        if missing:
+            raise KeyError(f'Columns {missing} are not in table {table.name}.')
+        return load(table, _parse_rows(reader, table, column_names), engine,
+                    batch_size=batch_size, checkpoint=checkpoint, progress=progress)
@@ -1,7 +1,9 @@
 from typing import Any, Dict, Sequence, Union, Optional
 
 from sessionize.utils.features import _get_table
+from sessionize.utils.advisor import record_column_usage
 import sessionize.utils.types as types
+import sessionize.utils.statements as statements
 
 # TODO: replace with interfaces
 from sqlalchemy import Table
@@ -40,7 +42,8 @@ def delete_records_session(
     None
     """
     table = _get_table(sa_table, session, schema=schema)
-    delete.delete_records_session(table, col_name, values, session)
+    record_column_usage(table, [col_name])
+    session.execute(statements.delete_records_statement(table, col_name, values))
 
 
 def delete_record_by_values_session(
@@ -73,7 +76,9 @@ def delete_records(
     schema: Optional[str] = None
 ) -> None:
     table = _get_table(sa_table, engine, schema=schema)
-    delete.delete_records(table, col_name, values, engine)
+    record_column_usage(table, [col_name])
+    with engine.begin() as connection:
+        connection.execute(statements.delete_records_statement(table, col_name, values))
 
 
 def delete_all_records_session(
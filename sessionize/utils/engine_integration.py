@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL, make_url
+
+
+SA_MAJOR_VERSION = int(sa.__version__.split('.')[0])
+
+
+@dataclass
+class EngineProfile:
+    """
+    Engine settings for one kind of workload.
+
+    sqlite_pragmas are set on every new SQLite connection.
+    SQLite files get a QueuePool sized like other databases so pragmas
+    are not set again on every checkout, and are never pre-pinged.
+    page_size is the number of rows sent per statement by executemany
+    inserts on PostgreSQL.
+    """
+    sqlite_pragmas: Dict[str, Union[str, int]]
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle: int = -1
+    page_size: int = 1000
+    readonly: bool = False
+
+
+PROFILES = {
+    # Many small concurrent transactions.
+    'oltp': EngineProfile(
+        sqlite_pragmas={
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,  # KiB
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=1800,
+        page_size=1000,
+    ),
+    # Few connections writing large batches.
+    'bulk': EngineProfile(
+        sqlite_pragmas={
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',
+            'cache_size': -256000,
+            'mmap_size': 1073741824,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 30000,
+        },
+        pool_size=2,
+        max_overflow=2,
+        page_size=10000,
+    ),
+    # Many concurrent readers, writes are rejected by the database.
+    'readonly': EngineProfile(
+        sqlite_pragmas={
+            'query_only': 'ON',
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=1800,
+        readonly=True,
+    ),
+}
+
+
+def _set_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Union[str, int]]) -> None:
+    @sa.event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(url: URL, profile: EngineProfile) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if url.get_backend_name() == 'sqlite':
+        if url.database and url.database != ':memory:':
+            # SqlAlchemy 1.4 opens a new connection per checkout for SQLite files.
+            kwargs.update(poolclass=sa.pool.QueuePool,
+                          pool_size=profile.pool_size,
+                          max_overflow=profile.max_overflow,
+                          connect_args={'check_same_thread': False})
+    else:
+        kwargs.update(pool_pre_ping=profile.pool_pre_ping,
+                      pool_size=profile.pool_size,
+                      max_overflow=profile.max_overflow,
+                      pool_recycle=profile.pool_recycle)
+    if SA_MAJOR_VERSION >= 2:
+        kwargs['insertmanyvalues_page_size'] = profile.page_size
+    elif url.get_driver_name() == 'psycopg2':
+        # One multi-row INSERT ... VALUES per page instead of one statement per row.
+        kwargs.update(executemany_mode='values_plus_batch',
+                      executemany_values_page_size=profile.page_size,
+                      executemany_batch_page_size=min(profile.page_size, 1000))
+    if profile.readonly and url.get_backend_name() == 'postgresql':
+        kwargs['connect_args'] = {'options': '-c default_transaction_read_only=on'}
+    return kwargs
+
+
+def _merge_connect_args(profile_args: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    # Passed connect_args add to the profile's, libpq options are appended to its options.
+    merged = {**profile_args, **args}
+    if 'options' in profile_args and 'options' in args:
+        merged['options'] = f"{profile_args['options']} {args['options']}"
+    return merged
+
+
+def create_engine(
+    url: Union[str, URL],
+    profile: str = 'oltp',
+    pragmas: Optional[Dict[str, Union[str, int]]] = None,
+    **kwargs
+) -> Engine:
+    """
+    Creates a SqlAlchemy Engine tuned for a workload.
+
+    Parameters
+    ----------
+    url: str or sa.engine.URL
+        database url.
+    profile: str, default 'oltp'
+        'oltp' for many small transactions,
+        'bulk' for large batch loads,
+        'readonly' for readers, writes are rejected by the database.
+    pragmas: dict, default None
+        SQLite pragmas that add to or replace the profile's pragmas.
+    **kwargs:
+        passed to sa.create_engine, replace the profile's settings,
+        except connect_args, which are merged with the profile's.
+
+    Returns
+    -------
+    sa.engine.Engine
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {list(PROFILES)}, not '{profile}'.")
+    engine_profile = PROFILES[profile]
+    url = make_url(url)
+    engine_kwargs = _engine_kwargs(url, engine_profile)
+    if 'connect_args' in kwargs:
+        kwargs['connect_args'] = _merge_connect_args(engine_kwargs.get('connect_args', {}), kwargs['connect_args'])
+    engine_kwargs.update(kwargs)
+    engine = sa.create_engine(url, **engine_kwargs)
+    if url.get_backend_name() == 'sqlite':
+        _set_sqlite_pragmas(engine, {**engine_profile.sqlite_pragmas, **(pragmas or {})})
+    return engine
@@ -0,0 +1,42 @@
+from typing import List, Union
+
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+
+# Runs the shared statements for records on a session or connection,
+# one executemany per group of records with the same columns.
+# Callers own the transaction.
+
+
+def execute_insert(
+    table: Table,
+    records: List[types.Record],
+    connection: Union[Session, Connection]
+) -> None:
+    for statement, parameters in statements.insert_records_statements(table, records):
+        connection.execute(statement, parameters)
+
+
+def execute_update(
+    table: Table,
+    records: List[types.Record],
+    connection: Union[Session, Connection]
+) -> None:
+    for statement, parameters in statements.update_records_statements(table, records):
+        connection.execute(statement, parameters)
+
+
+def execute_upsert(
+    table: Table,
+    records: List[types.Record],
+    connection: Union[Session, Connection]
+) -> None:
+    dialect_name = features._get_dialect_name(connection)
+    for statement, parameters in statements.upsert_records_statements(table, records, dialect_name):
+        connection.execute(statement, parameters)
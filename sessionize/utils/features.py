@@ -1,11 +1,14 @@
-from typing import List, Optional, Tuple, Union
+from contextlib import contextmanager
+from typing import Generator, Iterator, List, Optional, Sequence, Tuple, Union
 
+import sqlalchemy as sa
 # TODO: replace with interfaces
 from sqlalchemy import Table, Column
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine, Row
 from sqlalchemy.orm.session import Session
 
 import sessionize.utils.types as types
+import sessionize.utils.snapshot as snapshot
 import sqlalchemize.features as features
 
 
@@ -29,6 +32,60 @@ def _get_table(
         return get_table(sa_table, engine, schema=schema)
 
 
+def _get_dialect_name(connection: types.SqlConnection) -> str:
+    if isinstance(connection, Session):
+        return connection.get_bind().dialect.name
+    return connection.dialect.name
+
+
+def _get_engine(connection: types.SqlConnection) -> Engine:
+    if isinstance(connection, Session):
+        return connection.get_bind().engine
+    return connection.engine
+
+
+@contextmanager
+def _begin(
+    engine: Engine
+) -> Iterator[Connection]:
+    # engine.begin() that also makes DDL transactional on SQLite,
+    # pysqlite only opens a transaction before DML statements.
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.exec_driver_sql('BEGIN')
+        yield conn
+
+
+def _fetch_records(query, connection: types.SqlConnection) -> List[types.Record]:
+    # Execute query with an Engine, Connection or Session and return rows as records.
+    if isinstance(connection, Engine):
+        with connection.connect() as conn:
+            return [dict(row) for row in conn.execute(query).mappings()]
+    return [dict(row) for row in connection.execute(query).mappings()]
+
+
+def _fetch_rows(query, connection: types.SqlConnection) -> List[Row]:
+    # Execute query with an Engine, Connection or Session and return rows as tuples.
+    if isinstance(connection, Engine):
+        with connection.connect() as conn:
+            return conn.execute(query).all()
+    return connection.execute(query).all()
+
+
+def _stream_rows(
+    query,
+    connection: types.SqlConnection,
+    chunksize: int
+) -> Generator[List[Row], None, None]:
+    # Execute query on a server side cursor and generate lists of up to chunksize rows.
+    query = query.execution_options(stream_results=True)
+    if isinstance(connection, Engine):
+        with connection.connect() as conn:
+            yield from conn.execute(query).partitions(chunksize)
+    else:
+        yield from connection.execute(query).partitions(chunksize)
+
+
 def primary_keys(sa_table: Table) -> List[str]:
     """
     Given SqlAlchemy Table, query database for
@@ -88,6 +145,12 @@ def get_table(
     -------
     A SqlAlchemy mapped Table object.
     """
+    # Use the schema snapshot when enabled, see sessionize.enable_schema_snapshot.
+    schema_snapshot = snapshot.get_schema_snapshot()
+    if schema_snapshot is not None:
+        table = schema_snapshot.get_table(table_name, _get_engine(connection), schema=schema)
+        if table is not None:
+            return table
     return features.get_table(table_name, connection, schema)
 
 
@@ -150,5 +213,86 @@ def get_row_count(sa_table: Table, session: types.SqlConnection) -> int:
     return features.get_row_count(sa_table, session)
 
 
+def get_row_counts(
+    sa_tables: Sequence[Table],
+    connection: types.SqlConnection,
+    tables_per_query: int = 400
+) -> List[int]:
+    """
+    Counts the rows of many tables with one UNION ALL query
+    per tables_per_query tables.
+    Returns list of row counts in the same order as sa_tables.
+    """
+    counts = []
+    for start in range(0, len(sa_tables), tables_per_query):
+        chunk = sa_tables[start:start + tables_per_query]
+        query = sa.union_all(*[
+            sa.select(sa.literal(i).label('position'), sa.func.count().label('row_count')).select_from(table)
+            for i, table in enumerate(chunk)
+        ])
+        row_counts = {record['position']: record['row_count'] for record in _fetch_records(query, connection)}
+        counts.extend(row_counts[i] for i in range(len(chunk)))
+    return counts
+
+
+def get_approximate_row_count(
+    sa_table: Table,
+    connection: types.SqlConnection
+) -> Optional[int]:
+    """
+    Estimates the row count of a table from database statistics
+    instead of running a COUNT over the whole table.
+    Returns None if the database has no statistics for the table.
+
+    SQLite reads sqlite_stat1 (filled by ANALYZE).
+    PostgreSQL reads pg_class.reltuples (filled by ANALYZE and VACUUM).
+    Other databases always return None.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
+        connection used to query database.
+
+    Returns
+    -------
+    estimated row count or None.
+    """
+    dialect_name = _get_dialect_name(connection)
+    if dialect_name == 'sqlite':
+        prefix = '' if sa_table.schema is None else f'"{sa_table.schema}".'
+        exists = sa.text(f"SELECT name FROM {prefix}sqlite_master "
+                         "WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if not _fetch_records(exists, connection):
+            return None
+        query = sa.text(f"SELECT stat FROM {prefix}sqlite_stat1 WHERE tbl = :name")
+        records = _fetch_records(query.bindparams(name=sa_table.name), connection)
+        # The first number of each stat row is the number of rows in the table or index.
+        counts = [int(record['stat'].split()[0]) for record in records if record['stat']]
+        return max(counts) if counts else None
+    if dialect_name == 'postgresql':
+        query = sa.text("SELECT c.reltuples AS reltuples FROM pg_class c "
+                        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                        "WHERE c.relname = :name AND n.nspname = COALESCE(:schema, current_schema())")
+        query = query.bindparams(sa.bindparam('schema', sa_table.schema, type_=sa.String),
+                                 name=sa_table.name)
+        records = _fetch_records(query, connection)
+        # reltuples is -1 for tables that have never been analyzed.
+        if not records or records[0]['reltuples'] is None or records[0]['reltuples'] < 0:
+            return None
+        return int(records[0]['reltuples'])
+    return None
+
+
 def get_schemas(engine: Engine):
-    return features.get_schemas(engine)
\ No newline at end of file
+    return features.get_schemas(engine)
+
+
+def get_table_names(engine: Engine, schema: Optional[str] = None) -> List[str]:
+    schema_snapshot = snapshot.get_schema_snapshot()
+    if schema_snapshot is not None:
+        table_names = schema_snapshot.get_table_names(engine, schema=schema)
+        if table_names is not None:
+            return table_names
+    return features.get_table_names(engine, schema)
\ No newline at end of file
@@ -0,0 +1,98 @@
+from typing import List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+
+import sessionize.utils.types as types
+from sessionize.utils.features import get_table, _get_table, _get_table_name, _begin
+
+
+def _index_name(table_name: str, column_names: Sequence[str]) -> str:
+    return f"ix_{table_name}_{'_'.join(column_names)}"
+
+
+def create_index(
+    sa_table: Union[Table, str],
+    column_names: Union[str, Sequence[str]],
+    engine: Engine,
+    index_name: Optional[str] = None,
+    unique: bool = False,
+    schema: Optional[str] = None
+) -> Table:
+    """
+    Creates an index on one or more table columns.
+
+    Parameters
+    ----------
+    sa_table: sa.Table or str
+        table to index.
+    column_names: str or list[str]
+        name of column or names of columns to index, in index order.
+    engine: sa.engine.Engine
+        engine used to create the index.
+    index_name: str, default None
+        name of the new index, defaults to ix_<table>_<columns>.
+    unique: bool, default False
+        create a unique index.
+    schema: str, default None
+        Database schema name.
+
+    Returns
+    -------
+    Newly reflected SqlAlchemy Table.
+    """
+    if isinstance(column_names, str):
+        column_names = [column_names]
+    table = _get_table(sa_table, engine, schema=schema)
+    if index_name is None:
+        index_name = _index_name(table.name, column_names)
+    index = sa.Index(index_name, *[table.c[name] for name in column_names], unique=unique)
+    with _begin(engine) as conn:
+        index.create(conn)
+    # Detach the index so the reflected copy of table is not modified.
+    table.indexes.discard(index)
+    return get_table(table.name, engine, schema=schema)
+
+
+def drop_index(
+    sa_table: Union[Table, str],
+    index_name: str,
+    engine: Engine,
+    schema: Optional[str] = None
+) -> Table:
+    """
+    Drops a table index by name.
+
+    Returns newly reflected SqlAlchemy Table.
+    """
+    table = get_table(_get_table_name(sa_table), engine, schema=schema)
+    for index in table.indexes:
+        if index.name == index_name:
+            break
+    else:
+        raise KeyError(f'{table.name} has no index named {index_name}.')
+    with _begin(engine) as conn:
+        index.drop(conn)
+    return get_table(table.name, engine, schema=schema)
+
+
+def list_indexes(
+    sa_table: Union[Table, str],
+    engine: Engine,
+    schema: Optional[str] = None
+) -> List[types.Record]:
+    """
+    Lists the indexes of a table, not including the primary key.
+
+    Returns
+    -------
+    list of records with name, column_names and unique keys.
+    """
+    table_name = _get_table_name(sa_table)
+    indexes = sa.inspect(engine).get_indexes(table_name, schema=schema)
+    return [{'name': index['name'],
+             'column_names': list(index['column_names']),
+             'unique': bool(index['unique'])}
+            for index in indexes]
@@ -8,6 +8,7 @@ import sqlalchemize.insert as insert
 
 import sessionize.utils.types as types
 import sessionize.utils.features as features
+import sessionize.utils.statements as statements
 
 
 def insert_from_table_session(
@@ -58,7 +59,7 @@ def insert_records_session(
         Use sessionize.engine_utils.get_table to get table.
     records: list[Record]
         list of records to insert.
-        Use df.to_dict('records') to convert Pandas DataFrame to records.
+        Use insert_dataframe_session to insert from a Pandas DataFrame.
     session: sa.orm.session.Session
         SqlAlchemy session to add sql inserts to.
     schema: str, default None
@@ -72,7 +73,8 @@ def insert_records_session(
     None
     """
     table = features._get_table(sa_table, session, schema=schema)
-    insert.insert_records_session(table, records, session)
+    for statement, parameters in statements.insert_records_statements(table, records):
+        session.execute(statement, parameters)
 
 
 def insert_records(
@@ -82,4 +84,7 @@ def insert_records(
     schema: Optional[str] = None
 ) -> None:
     table = features._get_table(sa_table, engine, schema=schema)
-    insert.insert_records(table, records, engine)
\ No newline at end of file
+    if records:
+        with engine.begin() as connection:
+            for statement, parameters in statements.insert_records_statements(table, records):
+                connection.execute(statement, parameters)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection, Engine
+
+import sessionize.utils.types as types
+import sessionize.utils.statements as statements
+from sessionize.utils.features import primary_keys, _get_table
+from sessionize.utils.progress import Progress
+
+
+@dataclass
+class Checkpoint:
+    """
+    How far a load got, saved to the checkpoint file after every committed batch.
+    rows counts records from the start of the iterable,
+    last_key holds the primary key values of the last committed record, if it had them.
+    """
+    table: str
+    rows: int = 0
+    batches: int = 0
+    last_key: Optional[Dict[str, Any]] = None
+    done: bool = False
+
+
+def read_checkpoint(path: str) -> Optional[Checkpoint]:
+    # None when there is no checkpoint file yet.
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return Checkpoint(**json.load(f))
+
+
+def write_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    # Written to a temporary file first, so a crash never leaves a partial checkpoint.
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(asdict(checkpoint), f, default=str)
+    os.replace(temp_path, path)
+
+
+def _table_key(table: Table) -> str:
+    return table.name if table.schema is None else f'{table.schema}.{table.name}'
+
+
+def _batch_committed(
+    table: Table,
+    batch: List[types.Record],
+    connection: Connection
+) -> bool:
+    # True if the last record of batch is already in table, so the batch was
+    # committed after the last checkpoint was written, before a crash.
+    keys = primary_keys(table)
+    last = batch[-1]
+    if not keys or not all(key in last for key in keys):
+        return False
+    query = sa.select(sa.literal(1)).select_from(table).where(
+        sa.and_(*[table.columns[key] == last[key] for key in keys])).limit(1)
+    return connection.execute(query).first() is not None
+
+
+def _skip(iterator: Iterator[types.Record], rows: int) -> None:
+    # Consumes rows records without keeping them.
+    for _ in islice(iterator, rows):
+        pass
+
+
+def load(
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    engine: Engine,
+    batch_size: int = 10000,
+    checkpoint: Optional[str] = None,
+    schema: Optional[str] = None,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> Progress:
+    """
+    Inserts records from any iterable into sql table,
+    committing every batch_size records, and resumes where it stopped
+    when it is run again with the same checkpoint file.
+
+    Records are read lazily, at most one batch is held in memory.
+    After every committed batch the number of records loaded so far,
+    and the primary key of the last one, are written to the checkpoint file.
+    On restart that many records are skipped from the start of records,
+    so records must produce the same records in the same order every time,
+    and batch_size must not change between runs.
+    If the process stopped between a commit and its checkpoint write,
+    the next batch is found in the table, when records have primary key
+    values, and skipped instead of inserted twice.
+    Once every record is loaded the checkpoint is marked done and running
+    load again skips everything, delete the checkpoint file to load again.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    records: Iterable[Record]
+        records to insert, such as a generator.
+    engine: sa.engine.Engine
+        SqlAlchemy engine to insert with.
+    batch_size: int, default 10000
+        number of records inserted per transaction,
+        keep it the same when resuming from a checkpoint.
+    checkpoint: str, default None
+        path of the checkpoint file, no checkpoint if None.
+    schema: str, default None
+        Database schema name.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every committed batch.
+
+    Returns
+    -------
+    Progress with the rows inserted by this call.
+    """
+    table = _get_table(sa_table, engine, schema=schema)
+    state = Checkpoint(_table_key(table))
+    if checkpoint is not None:
+        saved = read_checkpoint(checkpoint)
+        if saved is not None:
+            if saved.table != state.table:
+                raise ValueError(f"Checkpoint {checkpoint} is for table '{saved.table}', not '{state.table}'.")
+            state = saved
+    total = Progress()
+    if state.done:
+        return total
+    iterator = iter(records)
+    _skip(iterator, state.rows)
+    keys = primary_keys(table)
+    resumed = state.rows > 0
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        with engine.begin() as connection:
+            if not (resumed and _batch_committed(table, batch, connection)):
+                for statement, parameters in statements.insert_records_statements(table, batch):
+                    connection.execute(statement, parameters)
+                total.add(len(batch))
+        resumed = False
+        last = batch[-1]
+        state.rows += len(batch)
+        state.batches += 1
+        state.last_key = {key: last[key] for key in keys} if all(key in last for key in keys) else None
+        if checkpoint is not None:
+            write_checkpoint(checkpoint, state)
+        if progress is not None:
+            progress(total)
+    state.done = True
+    if checkpoint is not None:
+        write_checkpoint(checkpoint, state)
+    return total
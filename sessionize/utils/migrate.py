@@ -0,0 +1,159 @@
+from typing import Callable, List, Optional, Union
+
+from alembic.operations import BatchOperations
+
+# TODO: replace with interfaces
+from sqlalchemy import Table, Column
+from sqlalchemy.engine import Engine
+
+from sessionize.utils.alter import _get_op
+from sessionize.utils.features import get_table, get_primary_key_constraints, _get_table_name
+from sqlalchemize.type_convert import _type_convert
+
+
+class Migration:
+    """
+    Queues alter operations for one table and applies them all
+    in a single batch_alter_table on one pooled connection
+    inside one transaction.
+
+    On SQLite the table is copied once for the whole batch
+    instead of once per operation.
+    The table is reflected once, after the batch is applied.
+
+    Use sessionize.migrate to create a Migration:
+
+        with sessionize.migrate('people', engine) as m:
+            m.rename_column('name', 'first_name')
+            m.drop_column('age')
+            m.add_column('email', str)
+        m.table  # newly reflected SqlAlchemy Table
+    """
+    def __init__(
+        self,
+        table_name: Union[str, Table],
+        engine: Engine,
+        schema: Optional[str] = None,
+        recreate: str = 'auto'
+    ) -> None:
+        self.table_name = _get_table_name(table_name)
+        self.engine = engine
+        self.schema = schema
+        # 'auto', 'always' or 'never', passed to alembic batch_alter_table.
+        self.recreate = recreate
+        self.operations: List[Callable[[BatchOperations], None]] = []
+        self.table: Optional[Table] = None
+
+    def __repr__(self) -> str:
+        return f"Migration(table_name='{self.table_name}', operations={len(self.operations)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            # Nothing has been applied yet, drop the queued operations.
+            self.operations = []
+        else:
+            self.apply()
+
+    def rename_column(self, old_col_name: str, new_col_name: str) -> 'Migration':
+        def operation(batch_op):
+            batch_op.alter_column(old_col_name, nullable=True, new_column_name=new_col_name) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def drop_column(self, col_name: str) -> 'Migration':
+        def operation(batch_op):
+            batch_op.drop_column(col_name) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def add_column(self, column_name: str, dtype: type) -> 'Migration':
+        sa_type = _type_convert[dtype]
+        def operation(batch_op):
+            batch_op.add_column(Column(column_name, sa_type)) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def alter_column(self, column_name: str, **kwargs) -> 'Migration':
+        """
+        Queues alembic alter_column with any of its keyword arguments
+        (nullable, type_, server_default, new_column_name...).
+        """
+        def operation(batch_op):
+            batch_op.alter_column(column_name, **kwargs) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def create_primary_key(self, column_name: str) -> 'Migration':
+        """
+        Only use on a table with no primary key.
+        Use replace_primary_key on tables with a primary key.
+        """
+        def operation(batch_op):
+            constraint_name = f'pk_{self.table_name}'
+            batch_op.create_unique_constraint(constraint_name, [column_name]) # type: ignore
+            batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def replace_primary_key(self, column_name: str) -> 'Migration':
+        def operation(batch_op):
+            table = get_table(self.table_name, batch_op.get_bind(), schema=self.schema)
+            keys = get_primary_key_constraints(table)
+            # name primary key constraint if not named (sqlite)
+            if keys[0] is None:
+                constraint_name = f'pk_{self.table_name}'
+                batch_op.create_primary_key(constraint_name, keys[1]) # type: ignore
+            else:
+                constraint_name = keys[0]
+            batch_op.drop_constraint(constraint_name, type_='primary') # type: ignore
+            batch_op.create_unique_constraint(constraint_name, [column_name]) # type: ignore
+            batch_op.create_primary_key(constraint_name, [column_name]) # type: ignore
+        self.operations.append(operation)
+        return self
+
+    def apply(self) -> Table:
+        """
+        Applies every queued operation in one batch and transaction.
+
+        Returns newly reflected SqlAlchemy Table.
+        """
+        if self.operations:
+            with _get_op(self.engine) as op:
+                with op.batch_alter_table(self.table_name, schema=self.schema,
+                                          recreate=self.recreate) as batch_op:
+                    for operation in self.operations:
+                        operation(batch_op)
+            self.operations = []
+        self.table = get_table(self.table_name, self.engine, schema=self.schema)
+        return self.table
+
+
+def migrate(
+    table_name: Union[str, Table],
+    engine: Engine,
+    schema: Optional[str] = None,
+    recreate: str = 'auto'
+) -> Migration:
+    """
+    Returns a Migration context that queues alter operations
+    and applies them in one batch when the context exits.
+
+    Parameters
+    ----------
+    table_name: str or sa.Table
+        name of sql table to alter.
+    engine: sa.engine.Engine
+        engine used to alter the table.
+    schema: str, default None
+        Database schema name.
+    recreate: str, default 'auto'
+        alembic batch recreate mode: 'auto', 'always' or 'never'.
+
+    Returns
+    -------
+    Migration
+    """
+    return Migration(table_name, engine, schema=schema, recreate=recreate)
@@ -0,0 +1,496 @@
+import operator
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import sqlalchemy as sa
+import sqlalchemy.dialects.postgresql as sa_postgresql
+# TODO: replace with interfaces
+from sqlalchemy import Table, Column
+from sqlalchemy.engine import Connection, Engine
+
+from sessionize.exceptions import OnlineMigrationError
+from sessionize.utils.drop import drop_table
+from sessionize.utils.features import get_table, primary_keys, _get_table, _begin
+from sessionize.utils.progress import Progress
+from sessionize.utils.select import select_records_keyset_chunks
+from sessionize.utils.statements import _keyset_clause
+
+
+def online_rename_column(
+    table: Union[Table, str],
+    old_col_name: str,
+    new_col_name: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Progress], None]] = None,
+    drop_constraints: bool = False
+) -> Table:
+    """
+        Renames a table column without locking the table for a full rebuild.
+        See online_migrate.
+
+        Returns newly reflected SqlAlchemy Table.
+    """
+    table = _get_table(table, engine, schema=schema)
+    if old_col_name not in table.columns:
+        raise KeyError(old_col_name)
+    column_map = [(name, new_col_name if name == old_col_name else name) for name in table.columns.keys()]
+    keys = [new_col_name if key == old_col_name else key for key in primary_keys(table)]
+    return online_migrate(table, column_map, keys, engine, schema=schema,
+                          batch_size=batch_size, pause=pause, progress=progress,
+                          drop_constraints=drop_constraints)
+
+
+def online_drop_column(
+    table: Union[Table, str],
+    col_name: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Progress], None]] = None,
+    drop_constraints: bool = False
+) -> Table:
+    """
+        Drops a table column without locking the table for a full rebuild.
+        Primary key columns can not be dropped.
+        See online_migrate.
+
+        Returns newly reflected SqlAlchemy Table.
+    """
+    table = _get_table(table, engine, schema=schema)
+    if col_name not in table.columns:
+        raise KeyError(col_name)
+    column_map = [(name, name) for name in table.columns.keys() if name != col_name]
+    return online_migrate(table, column_map, primary_keys(table), engine, schema=schema,
+                          batch_size=batch_size, pause=pause, progress=progress,
+                          drop_constraints=drop_constraints)
+
+
+def online_replace_primary_key(
+    table: Union[Table, str],
+    column_name: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Progress], None]] = None,
+    drop_constraints: bool = False
+) -> Table:
+    """
+        Makes column_name the primary key without locking the table
+        for a full rebuild. The old primary key columns are kept.
+        See online_migrate.
+
+        Returns newly reflected SqlAlchemy Table.
+    """
+    table = _get_table(table, engine, schema=schema)
+    if column_name not in table.columns:
+        raise KeyError(column_name)
+    column_map = [(name, name) for name in table.columns.keys()]
+    return online_migrate(table, column_map, [column_name], engine, schema=schema,
+                          batch_size=batch_size, pause=pause, progress=progress,
+                          drop_constraints=drop_constraints)
+
+
+def online_migrate(
+    table: Union[Table, str],
+    column_map: Sequence[Tuple[str, str]],
+    new_primary_keys: Sequence[str],
+    engine: Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    progress: Optional[Callable[[Progress], None]] = None,
+    keep_old: bool = False,
+    drop_constraints: bool = False
+) -> Table:
+    """
+        Changes a table's schema while it keeps taking writes.
+
+        1. Creates a shadow table with the new schema.
+        2. Adds triggers to the live table that copy every insert,
+           update and delete into the shadow table.
+        3. Backfills the shadow table in primary key ordered batches,
+           each in its own short transaction, sleeping pause seconds
+           between batches so writes to the live table are never
+           blocked for longer than one batch.
+        4. Checks both tables have the same row count, then in one
+           transaction drops the triggers and swaps the table names.
+
+        Columns, the primary key, indexes, and unique and foreign key
+        constraints on kept columns are carried over to the new table,
+        except PostgreSQL foreign keys from the table to itself.
+        Check constraints are only carried over when every column is kept
+        under its own name, their SQL can not be rewritten for the new columns.
+        Raises OnlineMigrationError before anything is changed if a constraint
+        can not be carried over, unless drop_constraints is True.
+        On PostgreSQL, tables referenced by foreign keys of other tables
+        can not be migrated, those foreign keys would still point at the old table.
+        Supports SQLite and PostgreSQL.
+        On SQLite the copied indexes keep an _online suffix.
+
+        Parameters
+        ----------
+        table: sa.Table or str
+            table to migrate.
+        column_map: list of (old column name, new column name)
+            columns of the new table and the live columns they are copied from.
+        new_primary_keys: list of str
+            primary key column names of the new table.
+        engine: sa.engine.Engine
+        schema: str, default None
+            Database schema name.
+        batch_size: int, default 1000
+            rows copied per backfill transaction.
+        pause: float, default 0.0
+            seconds to sleep between backfill batches.
+        progress: callable, default None
+            called with a Progress after every backfill batch.
+        keep_old: bool, default False
+            keep the original table as _<name>_old instead of dropping it.
+        drop_constraints: bool, default False
+            drop the constraints that can not be carried over
+            instead of raising OnlineMigrationError.
+
+        Returns newly reflected SqlAlchemy Table.
+    """
+    table = _get_table(table, engine, schema=schema)
+    dialect_name = engine.dialect.name
+    if dialect_name not in ('sqlite', 'postgresql'):
+        raise NotImplementedError(f'Online migration is not supported for {dialect_name}.')
+
+    column_names = dict(column_map)
+    keys = primary_keys(table)
+    for key in keys:
+        if key not in column_names:
+            raise OnlineMigrationError(f'Primary key column {key} must be kept by an online migration.')
+    target_names = {target for source, target in column_map}
+    for key in new_primary_keys:
+        if key not in target_names:
+            raise OnlineMigrationError(f'New primary key column {key} is not in the new table.')
+
+    if dialect_name == 'postgresql':
+        _check_references(table, engine)
+
+    name = table.name
+    shadow_name = f'_{name}_shadow'
+    old_name = f'_{name}_old'
+    drop_table(shadow_name, engine, schema=schema)
+
+    triggers: List[str] = []
+    try:
+        shadow = _create_shadow_table(table, shadow_name, column_map, new_primary_keys, engine, schema,
+                                      drop_constraints)
+        triggers = _create_triggers(table, shadow, column_map, new_primary_keys, engine)
+        _backfill(table, shadow, column_map, engine, batch_size, pause, progress)
+        _check_row_counts(table, shadow, engine)
+        _swap(table, shadow, old_name, column_map, triggers, engine, keep_old)
+    except BaseException:
+        if triggers:
+            with _begin(engine) as connection:
+                _drop_triggers(connection, triggers)
+        drop_table(shadow_name, engine, schema=schema)
+        raise
+    return get_table(name, engine, schema=schema)
+
+
+def _quote(engine: Engine, name: str) -> str:
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _qualified(engine: Engine, name: str, schema: Optional[str]) -> str:
+    if schema is None:
+        return _quote(engine, name)
+    return f'{_quote(engine, schema)}.{_quote(engine, name)}'
+
+
+def _create_shadow_table(
+    table: Table,
+    shadow_name: str,
+    column_map: Sequence[Tuple[str, str]],
+    new_primary_keys: Sequence[str],
+    engine: Engine,
+    schema: Optional[str],
+    drop_constraints: bool
+) -> Table:
+    metadata = sa.MetaData()
+    columns = []
+    for source, target in column_map:
+        column = table.columns[source]
+        server_default = None if column.server_default is None else column.server_default.arg
+        columns.append(Column(target, column.type,
+                              primary_key=target in new_primary_keys,
+                              nullable=column.nullable,
+                              server_default=server_default,
+                              autoincrement=False))
+    shadow = Table(shadow_name, metadata, *columns, schema=schema)
+    column_names = dict(column_map)
+    for index in table.indexes:
+        if all(column.name in column_names for column in index.columns):
+            sa.Index(f'{index.name}_online', *[shadow.columns[column_names[column.name]] for column in index.columns],
+                     unique=index.unique)
+    _copy_constraints(table, shadow, column_map, engine, drop_constraints)
+    metadata.create_all(engine)
+    return shadow
+
+
+def _copy_constraints(
+    table: Table,
+    shadow: Table,
+    column_map: Sequence[Tuple[str, str]],
+    engine: Engine,
+    drop_constraints: bool
+) -> None:
+    # Adds the unique, foreign key and check constraints of table to shadow.
+    column_names = dict(column_map)
+    unchanged = len(column_names) == len(table.columns) and all(source == target for source, target in column_map)
+    for constraint in table.constraints:
+        if isinstance(constraint, sa.PrimaryKeyConstraint):
+            continue
+        copy = None
+        if isinstance(constraint, sa.CheckConstraint):
+            if unchanged:
+                copy = sa.CheckConstraint(constraint.sqltext, name=constraint.name)
+        elif any(column.name not in column_names for column in constraint.columns):
+            pass
+        elif isinstance(constraint, sa.UniqueConstraint):
+            # PostgreSQL unique constraint names must not clash with the live table's indexes.
+            name = constraint.name
+            if name is not None and engine.dialect.name == 'postgresql':
+                name = f'{name}_online'
+            copy = sa.UniqueConstraint(*[column_names[column.name] for column in constraint.columns], name=name)
+        elif isinstance(constraint, sa.ForeignKeyConstraint):
+            referred = [_referred_column(element.column, table, column_names, engine)
+                        for element in constraint.elements]
+            if all(column is not None for column in referred):
+                copy = sa.ForeignKeyConstraint([column_names[column.name] for column in constraint.columns], referred,
+                                               name=constraint.name, onupdate=constraint.onupdate,
+                                               ondelete=constraint.ondelete, deferrable=constraint.deferrable,
+                                               initially=constraint.initially)
+        else:
+            continue
+        if copy is not None:
+            shadow.append_constraint(copy)
+        elif not drop_constraints:
+            name = type(constraint).__name__ if constraint.name is None else constraint.name
+            raise OnlineMigrationError(
+                f'{name} on {table.name} can not be carried over to the new table, '
+                'pass drop_constraints=True to drop it.')
+
+
+def _referred_column(
+    column: Column,
+    table: Table,
+    column_names: Dict[str, str],
+    engine: Engine
+) -> Optional[Column]:
+    # Column a copied foreign key points at, None if it can not be carried over.
+    if column.table is not table:
+        return column
+    if column.name not in column_names or engine.dialect.name == 'postgresql':
+        # A PostgreSQL foreign key to the shadow table itself would be checked
+        # during the backfill, before the rows it references are copied.
+        return None
+    # SQLite foreign keys are by name, point at the name the shadow table will take.
+    target = column_names[column.name]
+    return Table(table.name, sa.MetaData(), Column(target, column.type), schema=table.schema).columns[target]
+
+
+def _check_references(
+    table: Table,
+    engine: Engine
+) -> None:
+    # PostgreSQL foreign keys follow the table they reference, not its name.
+    inspector = sa.inspect(engine)
+    for table_name in inspector.get_table_names(schema=table.schema):
+        if table_name == table.name:
+            continue
+        for foreign_key in inspector.get_foreign_keys(table_name, schema=table.schema):
+            if foreign_key['referred_table'] == table.name and foreign_key['referred_schema'] == table.schema:
+                raise OnlineMigrationError(
+                    f'{table_name} has a foreign key to {table.name}, '
+                    'it would still reference the old table after an online migration.')
+
+
+def _create_triggers(
+    table: Table,
+    shadow: Table,
+    column_map: Sequence[Tuple[str, str]],
+    new_primary_keys: Sequence[str],
+    engine: Engine
+) -> List[str]:
+    # Returns the statements that drop the triggers again.
+    column_names = dict(column_map)
+    target_columns = ', '.join(_quote(engine, target) for source, target in column_map)
+    new_values = ', '.join(f'NEW.{_quote(engine, source)}' for source, target in column_map)
+    old_key_match = ' AND '.join(f'{_quote(engine, column_names[key])} = OLD.{_quote(engine, key)}'
+                                 for key in primary_keys(table))
+    name = table.name
+    if engine.dialect.name == 'sqlite':
+        # SQLite trigger bodies can not use schema qualified table names.
+        trigger_prefix = '' if table.schema is None else f'{_quote(engine, table.schema)}.'
+        source = _quote(engine, name)
+        target = _quote(engine, shadow.name)
+        upsert = f'INSERT OR REPLACE INTO {target} ({target_columns}) VALUES ({new_values});'
+        delete = f'DELETE FROM {target} WHERE {old_key_match};'
+        statements = {
+            f'_{name}_online_insert': f'AFTER INSERT ON {source} BEGIN {upsert} END',
+            f'_{name}_online_update': f'AFTER UPDATE ON {source} BEGIN {delete} {upsert} END',
+            f'_{name}_online_delete': f'AFTER DELETE ON {source} BEGIN {delete} END',
+        }
+        drops = []
+        with _begin(engine) as connection:
+            for trigger_name, body in statements.items():
+                connection.exec_driver_sql(f'CREATE TRIGGER {trigger_prefix}{_quote(engine, trigger_name)} {body}')
+                drops.append(f'DROP TRIGGER IF EXISTS {trigger_prefix}{_quote(engine, trigger_name)}')
+        return drops
+
+    source = _qualified(engine, name, table.schema)
+    target = _qualified(engine, shadow.name, shadow.schema)
+    function = _qualified(engine, f'_{name}_online_capture', table.schema)
+    trigger = _quote(engine, f'_{name}_online_capture')
+    conflict_keys = ', '.join(_quote(engine, key) for key in new_primary_keys)
+    updates = ', '.join(f'{_quote(engine, target_name)} = EXCLUDED.{_quote(engine, target_name)}'
+                        for source_name, target_name in column_map if target_name not in new_primary_keys)
+    on_conflict = f'DO UPDATE SET {updates}' if updates else 'DO NOTHING'
+    with _begin(engine) as connection:
+        connection.exec_driver_sql(f"""
+            CREATE FUNCTION {function}() RETURNS trigger AS $online$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {target} WHERE {old_key_match};
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {target} ({target_columns}) VALUES ({new_values})
+                    ON CONFLICT ({conflict_keys}) {on_conflict};
+                END IF;
+                RETURN NULL;
+            END
+            $online$ LANGUAGE plpgsql""")
+        connection.exec_driver_sql(f'CREATE TRIGGER {trigger} AFTER INSERT OR UPDATE OR DELETE ON {source} '
+                                   f'FOR EACH ROW EXECUTE PROCEDURE {function}()')
+    return [f'DROP TRIGGER IF EXISTS {trigger} ON {source}', f'DROP FUNCTION IF EXISTS {function}()']
+
+
+def _drop_triggers(
+    connection: Connection,
+    triggers: List[str]
+) -> None:
+    for statement in triggers:
+        connection.exec_driver_sql(statement)
+
+
+def _backfill(
+    table: Table,
+    shadow: Table,
+    column_map: Sequence[Tuple[str, str]],
+    engine: Engine,
+    batch_size: int,
+    pause: float,
+    progress: Optional[Callable[[Progress], None]]
+) -> None:
+    # Rows already written by the triggers are newer, so conflicts are skipped.
+    keys = primary_keys(table)
+    key_columns = [table.columns[key] for key in keys]
+    source_columns = [table.columns[source] for source, target in column_map]
+    target_names = [target for source, target in column_map]
+    report = Progress()
+    last_key = None
+    for key_chunk in select_records_keyset_chunks(table, engine, batch_size, include_columns=keys):
+        query = sa.select(*source_columns).where(_keyset_clause(key_columns, key_chunk[-1], operator.le))
+        if last_key is not None:
+            query = query.where(_keyset_clause(key_columns, last_key))
+        if engine.dialect.name == 'postgresql':
+            # FOR SHARE waits for deletes in flight, whose triggers already ran,
+            # so the backfill does not copy rows they are deleting.
+            query = query.with_for_update(read=True)
+            insert = sa_postgresql.insert(shadow).from_select(target_names, query).on_conflict_do_nothing()
+        else:
+            insert = shadow.insert().prefix_with('OR IGNORE').from_select(target_names, query)
+        with _begin(engine) as connection:
+            connection.execute(insert)
+        last_key = key_chunk[-1]
+        report.add(len(key_chunk))
+        if progress is not None:
+            progress(report)
+        if pause:
+            time.sleep(pause)
+
+
+def _check_row_counts(
+    table: Table,
+    shadow: Table,
+    engine: Engine
+) -> None:
+    # Both counts in one statement, so they see the same snapshot.
+    # Runs before _swap takes its lock, the triggers keep the tables in step until then.
+    query = sa.select(*[sa.select(sa.func.count()).select_from(t).scalar_subquery() for t in (table, shadow)])
+    with engine.connect() as connection:
+        live_count, shadow_count = connection.execute(query).one()
+    if live_count != shadow_count:
+        raise OnlineMigrationError(
+            f'{table.name} has {live_count} rows but the new table has {shadow_count}, '
+            'the backfill skipped rows that conflict with its primary key or unique constraints. '
+            f'{table.name} is unchanged.')
+
+
+def _swap(
+    table: Table,
+    shadow: Table,
+    old_name: str,
+    column_map: Sequence[Tuple[str, str]],
+    triggers: List[str],
+    engine: Engine,
+    keep_old: bool
+) -> None:
+    source = _qualified(engine, table.name, table.schema)
+    target = _qualified(engine, shadow.name, shadow.schema)
+    with _begin(engine) as connection:
+        if engine.dialect.name == 'postgresql':
+            # Block writes to the live table until the names are swapped.
+            connection.exec_driver_sql(f'LOCK TABLE {source} IN SHARE ROW EXCLUSIVE MODE')
+        _drop_triggers(connection, triggers)
+        if engine.dialect.name == 'sqlite':
+            # Keep references to the live table name in other tables pointing at the new table.
+            connection.exec_driver_sql('PRAGMA legacy_alter_table = ON')
+        connection.exec_driver_sql(f'ALTER TABLE {source} RENAME TO {_quote(engine, old_name)}')
+        connection.exec_driver_sql(f'ALTER TABLE {target} RENAME TO {_quote(engine, table.name)}')
+        if engine.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA legacy_alter_table = OFF')
+        if keep_old:
+            return
+        if engine.dialect.name == 'postgresql':
+            _move_sequences(connection, table, old_name, column_map, engine)
+        connection.exec_driver_sql(f'DROP TABLE {_qualified(engine, old_name, table.schema)}')
+        if engine.dialect.name == 'postgresql':
+            for index in shadow.indexes:
+                # The old table's indexes are gone, take their names back.
+                connection.exec_driver_sql(
+                    f'ALTER INDEX {_qualified(engine, index.name, table.schema)} '
+                    f'RENAME TO {_quote(engine, index.name[:-len("_online")])}')
+            for constraint in shadow.constraints:
+                if isinstance(constraint, sa.UniqueConstraint) and constraint.name is not None:
+                    connection.exec_driver_sql(
+                        f'ALTER TABLE {_qualified(engine, table.name, table.schema)} '
+                        f'RENAME CONSTRAINT {_quote(engine, constraint.name)} '
+                        f'TO {_quote(engine, constraint.name[:-len("_online")])}')
+
+
+def _move_sequences(
+    connection: Connection,
+    table: Table,
+    old_name: str,
+    column_map: Sequence[Tuple[str, str]],
+    engine: Engine
+) -> None:
+    # Serial sequences belong to the old table and would be dropped with it.
+    old_table = _qualified(engine, old_name, table.schema)
+    new_table = _qualified(engine, table.name, table.schema)
+    for source, target in column_map:
+        query = sa.text('SELECT pg_get_serial_sequence(:table, :column)')
+        sequence = connection.execute(query, {'table': old_table, 'column': source}).scalar()
+        if sequence is not None:
+            connection.exec_driver_sql(f'ALTER SEQUENCE {sequence} OWNED BY {new_table}.{_quote(engine, target)}')
@@ -0,0 +1,244 @@
+import importlib
+from itertools import islice
+from typing import Callable, Generator, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+from sessionize.utils.execute import execute_insert, execute_update, execute_upsert
+
+# pandas is an optional dependency: pip install sessionize[pandas]
+
+
+def _pandas():
+    # Imported on first use, so sessionize works without pandas installed.
+    try:
+        return importlib.import_module('pandas')
+    except ImportError as e:
+        raise ImportError('DataFrame support needs pandas, install it with pip install sessionize[pandas].') from e
+
+
+def _dtype(column: sa.Column) -> Optional[str]:
+    # pandas dtype for the reflected column type, None lets pandas infer it.
+    column_type = column.type
+    if isinstance(column_type, sa.Boolean):
+        return 'boolean'
+    if isinstance(column_type, sa.Integer):
+        return 'Int64'
+    if isinstance(column_type, sa.Float):
+        return 'float64'
+    if isinstance(column_type, sa.Numeric) and not column_type.asdecimal:
+        return 'float64'
+    if isinstance(column_type, sa.DateTime):
+        return 'datetime64[ns, UTC]' if column_type.timezone else 'datetime64[ns]'
+    return None
+
+
+def _dataframe(rows: List[Row], columns: List[sa.Column]):
+    # Builds a DataFrame one column at a time from cursor rows.
+    pd = _pandas()
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for column, column_values in zip(columns, values):
+        dtype = _dtype(column)
+        if dtype is None:
+            data[column.name] = pd.array(column_values, dtype=object)
+        elif dtype.startswith('datetime64'):
+            data[column.name] = pd.Series(pd.to_datetime(column_values), dtype=dtype)
+        else:
+            data[column.name] = pd.array(column_values, dtype=dtype)
+    return pd.DataFrame(data, columns=[column.name for column in columns])
+
+
+def select_dataframe(
+    sa_table: Union[Table, str],
+    connection: types.SqlConnection,
+    chunksize: Optional[int] = None,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    sorted: bool = False
+):
+    """
+    Queries database for records in table.
+    Returns a pandas DataFrame of the sql table records,
+    or a generator of chunksized DataFrames if chunksize is not None.
+    Needs pandas, pip install sessionize[pandas].
+
+    Frames are built column-wise from cursor rows, with nullable
+    pandas dtypes picked from the reflected column types:
+    Int64 for integers, boolean for booleans, float64 for floats
+    and datetime64 for datetimes, other columns are object.
+    Chunks are read from a server side cursor.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
+        connection used to query database.
+    chunksize: int, default None
+        if not None, returns generator of DataFrames.
+    include_columns: list[str], default None
+        columns to select, default all columns.
+
+    Returns
+    -------
+    pandas.DataFrame or generator of DataFrames.
+    """
+    table = features._get_table(sa_table, connection, schema=schema)
+    columns = statements._select_columns(table, include_columns)
+    query = statements.select_records_statement(table, include_columns, sorted=sorted)
+    if chunksize is None:
+        rows = features._fetch_rows(query, connection)
+        return _dataframe(rows, columns)
+    return (_dataframe(rows, columns) for rows in features._stream_rows(query, connection, chunksize))
+
+
+def _column_lists(df, table: Table) -> List[List]:
+    # One python list per DataFrame column, missing values as None.
+    missing = [name for name in df.columns if name not in table.columns]
+    if missing:
+        raise KeyError(f'Columns {missing} are not in table {table.name}.')
+    lists = []
+    for name in df.columns:
+        series = df[name]
+        if series.hasnans:
+            series = series.astype(object).where(series.notna(), None)
+        lists.append(series.tolist())
+    return lists
+
+
+def _dataframe_records(
+    df,
+    table: Table,
+    chunksize: int
+) -> Generator[List[types.Record], None, None]:
+    # executemany parameters zipped from the column lists, chunksize at a time.
+    names = [str(name) for name in df.columns]
+    rows = zip(*_column_lists(df, table))
+    while True:
+        chunk = [dict(zip(names, row)) for row in islice(rows, chunksize)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_dataframe(
+    write: Callable,
+    sa_table: Union[Table, str],
+    df,
+    connection: Union[Session, Engine],
+    chunksize: int,
+    schema: Optional[str]
+) -> None:
+    table = features._get_table(sa_table, connection, schema=schema)
+    if isinstance(connection, Engine):
+        with connection.begin() as conn:
+            for records in _dataframe_records(df, table, chunksize):
+                write(table, records, conn)
+    else:
+        for records in _dataframe_records(df, table, chunksize):
+            write(table, records, connection)
+
+
+def insert_dataframe_session(
+    sa_table: Union[Table, str],
+    df,
+    session: Session,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Inserts the rows of a pandas DataFrame into sql table.
+    Only adds sql inserts to session, does not commit session.
+
+    Parameters are built straight from the DataFrame's column arrays,
+    chunksize rows per executemany, without df.to_dict('records').
+    Column names must match table column names, NaN and NA are NULL.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    df: pandas.DataFrame
+        rows to insert.
+    session: sa.orm.session.Session
+        SqlAlchemy session to add sql inserts to.
+    chunksize: int, default 10000
+        rows per executemany.
+    schema: str, default None
+        Database schema name.
+
+    Returns
+    -------
+    None
+    """
+    _write_dataframe(execute_insert, sa_table, df, session, chunksize, schema)
+
+
+def update_dataframe_session(
+    sa_table: Union[Table, str],
+    df,
+    session: Session,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Updates sql table records from the rows of a pandas DataFrame,
+    matched by the primary key columns, which df must have.
+    Only adds sql updates to session, does not commit session.
+    See insert_dataframe_session.
+    """
+    _write_dataframe(execute_update, sa_table, df, session, chunksize, schema)
+
+
+def upsert_dataframe_session(
+    sa_table: Union[Table, str],
+    df,
+    session: Session,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Inserts new records and updates existing records from the rows
+    of a pandas DataFrame, matched by the primary key columns.
+    Only adds sql upserts to session, does not commit session.
+    See insert_dataframe_session.
+    """
+    _write_dataframe(execute_upsert, sa_table, df, session, chunksize, schema)
+
+
+def insert_dataframe(
+    sa_table: Union[Table, str],
+    df,
+    engine: Engine,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    _write_dataframe(execute_insert, sa_table, df, engine, chunksize, schema)
+
+
+def update_dataframe(
+    sa_table: Union[Table, str],
+    df,
+    engine: Engine,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    _write_dataframe(execute_update, sa_table, df, engine, chunksize, schema)
+
+
+def upsert_dataframe(
+    sa_table: Union[Table, str],
+    df,
+    engine: Engine,
+    chunksize: int = 10000,
+    schema: Optional[str] = None
+) -> None:
+    _write_dataframe(execute_upsert, sa_table, df, engine, chunksize, schema)
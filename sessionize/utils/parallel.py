@@ -0,0 +1,404 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Generator, Iterable, List, Optional, Sequence, Tuple, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+
+import sessionize.utils.types as types
+import sessionize.utils.statements as statements
+from sessionize.exceptions import MissingPrimaryKey
+from sessionize.utils.features import primary_keys, _get_table
+from sessionize.utils.progress import Progress
+from sessionize.utils.select import select_records_keyset_chunks
+
+
+# Marks the end of the items a worker reads from or writes to a queue.
+_DONE = object()
+
+# (start_after, stop_at) primary key values, None for an open end.
+KeyRange = Tuple[Optional[types.Record], Optional[types.Record]]
+
+
+class _Failure:
+    # Exception raised in a worker, re-raised by the consuming generator.
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def _put(output: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    # Blocks while output is full, so workers never run far ahead of the consumer.
+    while not stop.is_set():
+        try:
+            output.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _minmax_boundaries(
+    table: Table,
+    connection,
+    partitions: int
+) -> List[types.Record]:
+    # Evenly spaced values between the min and max of a single integer key.
+    key = primary_keys(table)[0]
+    column = table.columns[key]
+    low, high = connection.execute(sa.select(sa.func.min(column), sa.func.max(column))).one()
+    if low is None:
+        return []
+    step = (high - low + 1) / partitions
+    boundaries = sorted({low + int(step * i) - 1 for i in range(1, partitions)})
+    return [{key: boundary} for boundary in boundaries if low <= boundary < high]
+
+
+# Keys sampled per partition by the quantiles method.
+_SAMPLE_ROWS = 1000
+
+
+def _sample_query(
+    table: Table,
+    key_columns: List[sa.Column],
+    connection,
+    size: int
+) -> sa.sql.Select:
+    # About size primary keys, sampled without reading the whole table where the database allows.
+    if connection.dialect.name == 'postgresql':
+        # Table pages are sampled by TABLESAMPLE SYSTEM, sized from the planner's row estimate.
+        name = connection.dialect.identifier_preparer.format_table(table)
+        estimate = connection.execute(sa.text('SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)'),
+                                      {'name': name}).scalar()
+        if estimate is not None and estimate > size:
+            sample = sa.tablesample(table, sa.func.system(100.0 * size / estimate))
+            return sa.select(*[sample.c[column.name] for column in key_columns])
+    # One pass over the keys, keeping size of them at random.
+    random = sa.func.rand() if connection.dialect.name == 'mysql' else sa.func.random()
+    return sa.select(*key_columns).order_by(random).limit(size)
+
+
+def _quantile_boundaries(
+    table: Table,
+    connection,
+    partitions: int
+) -> List[types.Record]:
+    # Primary key values at evenly spaced positions of a sorted key sample, works for any key type.
+    keys = primary_keys(table)
+    key_columns = [table.columns[key] for key in keys]
+    sample = _sample_query(table, key_columns, connection, _SAMPLE_ROWS * partitions).subquery()
+    # Sorted by the database, so boundaries follow its collation.
+    sample_keys = [sample.c[key] for key in keys]
+    rows = connection.execute(sa.select(*sample_keys).order_by(*sample_keys)).mappings().all()
+    boundaries = []
+    for i in range(1, partitions):
+        position = len(rows) * i // partitions - 1
+        if position < 0:
+            continue
+        row = dict(rows[position])
+        if not boundaries or row != boundaries[-1]:
+            boundaries.append(row)
+    return boundaries
+
+
+def partition_key_ranges(
+    sa_table: Union[Table, str],
+    engine: Engine,
+    partitions: int,
+    schema: Optional[str] = None,
+    method: str = 'auto'
+) -> List[KeyRange]:
+    """
+    Splits the primary key space of a table into up to partitions ranges.
+
+    method: 'minmax', 'quantiles' or 'auto'.
+        minmax splits a single integer primary key between its min and max,
+        one query, even ranges when keys are dense.
+        quantiles splits at evenly spaced positions of a sample of the keys,
+        TABLESAMPLE on PostgreSQL, a random sample elsewhere, one query,
+        about even ranges for any key distribution and composite or non-integer keys.
+        auto uses minmax for single integer keys and quantiles otherwise.
+
+    Returns list of (start_after, stop_at) primary key records,
+    None for an open end.
+    """
+    table = _get_table(sa_table, engine, schema=schema)
+    keys = primary_keys(table)
+    if not keys:
+        raise MissingPrimaryKey(f'{table.name} needs a primary key to be split into key ranges.')
+    if method == 'auto':
+        single_integer = len(keys) == 1 and isinstance(table.columns[keys[0]].type, sa.Integer)
+        method = 'minmax' if single_integer else 'quantiles'
+    with engine.connect() as connection:
+        if method == 'minmax':
+            boundaries = _minmax_boundaries(table, connection, partitions)
+        elif method == 'quantiles':
+            boundaries = _quantile_boundaries(table, connection, partitions)
+        else:
+            raise ValueError(f"method must be 'auto', 'minmax' or 'quantiles', not '{method}'.")
+    starts: List[Optional[types.Record]] = [None, *boundaries]
+    stops: List[Optional[types.Record]] = [*boundaries, None]
+    return list(zip(starts, stops))
+
+
+def _read_range(
+    table: Table,
+    engine: Engine,
+    key_range: KeyRange,
+    chunksize: int,
+    include_columns: Optional[Sequence[str]],
+    output: queue.Queue,
+    stop: threading.Event
+) -> None:
+    # Reads one key range on its own pooled connection.
+    start_after, stop_at = key_range
+    try:
+        with engine.connect() as connection:
+            for chunk in select_records_keyset_chunks(table, connection, chunksize,
+                                                      include_columns=include_columns,
+                                                      start_after=start_after, stop_at=stop_at):
+                if not _put(output, chunk, stop):
+                    return
+    except Exception as e:
+        _put(output, _Failure(e), stop)
+    finally:
+        _put(output, _DONE, stop)
+
+
+def select_records_parallel(
+    sa_table: Union[Table, str],
+    engine: Engine,
+    workers: int = 4,
+    chunksize: int = 10000,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    ordered: bool = False,
+    method: str = 'auto',
+    prefetch: int = 2
+) -> Generator[List[types.Record], None, None]:
+    """
+    Queries database for records in table, reading primary key ranges in parallel.
+    Returns a generator of chunksized lists of records.
+
+    The primary key space is split into workers ranges
+    (see partition_key_ranges), each read in keyset chunks
+    on its own pooled connection in a thread pool.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    engine: sa.engine.Engine
+        engine with a pool of at least workers connections.
+    workers: int, default 4
+        number of ranges read at the same time.
+    chunksize: int, default 10000
+        most records in each generated list.
+    ordered: bool, default False
+        if True, chunks are generated in primary key order,
+        otherwise in the order they are read.
+    method: str, default 'auto'
+        how the key ranges are found: 'auto', 'minmax' or 'quantiles'.
+    prefetch: int, default 2
+        chunks read ahead per worker, bounds memory use.
+
+    Returns
+    -------
+    Generator of lists of sql table records.
+    """
+    table = _get_table(sa_table, engine, schema=schema)
+    key_ranges = partition_key_ranges(table, engine, workers, method=method)
+    stop = threading.Event()
+    if ordered:
+        # One queue per range, drained in key order.
+        outputs = [queue.Queue(maxsize=prefetch) for _ in key_ranges]
+    else:
+        outputs = [queue.Queue(maxsize=prefetch * len(key_ranges))] * len(key_ranges)
+    executor = ThreadPoolExecutor(max_workers=len(key_ranges))
+    try:
+        for key_range, output in zip(key_ranges, outputs):
+            executor.submit(_read_range, table, engine, key_range, chunksize,
+                            include_columns, output, stop)
+        readers = outputs if ordered else outputs[:1]
+        done_count = 1 if ordered else len(key_ranges)
+        for output in readers:
+            done = 0
+            while done < done_count:
+                item = output.get()
+                if item is _DONE:
+                    done += 1
+                elif isinstance(item, _Failure):
+                    raise item.exception
+                else:
+                    yield item
+    finally:
+        # Also runs when the consumer stops early, workers stop at their next chunk.
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of one batch inserted by insert_records_parallel.
+    error is None if the batch was committed.
+    """
+    index: int
+    rows: int
+    attempts: int
+    seconds: float
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _insert_batch(
+    table: Table,
+    engine: Engine,
+    index: int,
+    batch: List[types.Record],
+    retries: int,
+    retry_wait: float
+) -> BatchResult:
+    # Commits batch in its own transaction, retrying OperationalErrors
+    # (lost connections, lock timeouts, deadlocks) with exponential backoff.
+    start = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            with engine.begin() as connection:
+                for statement, parameters in statements.insert_records_statements(table, batch):
+                    connection.execute(statement, parameters)
+            return BatchResult(index, len(batch), attempts, time.perf_counter() - start)
+        except sa.exc.OperationalError as e:
+            if attempts > retries:
+                return BatchResult(index, len(batch), attempts, time.perf_counter() - start, e)
+            time.sleep(retry_wait * 2 ** (attempts - 1))
+        except Exception as e:
+            return BatchResult(index, len(batch), attempts, time.perf_counter() - start, e)
+
+
+def _insert_worker(
+    table: Table,
+    engine: Engine,
+    batches: queue.Queue,
+    results: List[BatchResult],
+    retries: int,
+    retry_wait: float,
+    report: Callable[[BatchResult], None],
+    abort: threading.Event,
+    errors: List[BaseException]
+) -> None:
+    # Keeps draining batches after an error, so the producer never blocks on a full queue.
+    while True:
+        item = batches.get()
+        if item is _DONE:
+            return
+        if abort.is_set():
+            continue
+        index, batch = item
+        try:
+            result = _insert_batch(table, engine, index, batch, retries, retry_wait)
+            results.append(result)
+            report(result)
+        except BaseException as e:
+            # Such as an error raised by the progress callback, re-raised by the caller.
+            errors.append(e)
+            abort.set()
+
+
+def insert_records_parallel(
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    engine: Engine,
+    workers: int = 4,
+    batch_size: int = 1000,
+    schema: Optional[str] = None,
+    retries: int = 3,
+    retry_wait: float = 0.5,
+    progress: Optional[Callable[[Progress], None]] = None
+) -> List[BatchResult]:
+    """
+    Inserts records into sql table in batches committed in parallel.
+
+    Not transactional: every batch is committed on its own,
+    a failed batch does not roll back the others.
+    Records can be any iterable, such as a generator, and are only
+    read as fast as the workers insert them, at most 2 * workers
+    batches are held in memory.
+    On SQLite, which allows one writer at a time, batches are
+    inserted by a single writer thread fed by the same queue.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    records: Iterable[Record]
+        records to insert.
+    engine: sa.engine.Engine
+        engine with a pool of at least workers connections.
+    workers: int, default 4
+        number of batches inserted at the same time.
+    batch_size: int, default 1000
+        number of records inserted per transaction.
+    retries: int, default 3
+        times a batch is retried after an OperationalError.
+    retry_wait: float, default 0.5
+        seconds before the first retry, doubled for each retry.
+    progress: Callable[[Progress], None], default None
+        called with a Progress after every committed batch.
+        If it raises, no more batches are inserted and the error
+        is raised once the workers have stopped.
+
+    Returns
+    -------
+    list of BatchResult, one per batch in records order.
+    Check BatchResult.ok or error for batches that failed after retries.
+    """
+    table = _get_table(sa_table, engine, schema=schema)
+    if engine.dialect.name == 'sqlite':
+        workers = 1
+    batches: queue.Queue = queue.Queue(maxsize=2 * workers)
+    results: List[BatchResult] = []
+    abort = threading.Event()
+    errors: List[BaseException] = []
+    report_lock = threading.Lock()
+    total = Progress()
+
+    def report(result: BatchResult) -> None:
+        if progress is not None and result.ok:
+            with report_lock:
+                progress(total.add(result.rows))
+
+    threads = [threading.Thread(target=_insert_worker, daemon=True,
+                                args=(table, engine, batches, results, retries, retry_wait, report,
+                                      abort, errors))
+               for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        iterator = iter(records)
+        index = 0
+        while not abort.is_set():
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            # Blocks while the queue is full.
+            batches.put((index, batch))
+            index += 1
+    finally:
+        for _ in threads:
+            batches.put(_DONE)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return sorted(results, key=lambda result: result.index)
@@ -0,0 +1,31 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class Progress:
+    """
+    Rows moved so far by a bulk operation and how long it took.
+    Passed to progress callbacks after every committed batch.
+    last_key holds the primary key values of the last committed record,
+    for operations that can resume from it.
+    """
+    rows: int = 0
+    seconds: float = 0.0
+    batches: int = 0
+    last_key: Optional[Dict[str, Any]] = None
+    start: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.seconds == 0:
+            return 0.0
+        return self.rows / self.seconds
+
+    def add(self, rows: int) -> 'Progress':
+        # Record a finished batch of rows.
+        self.rows += rows
+        self.batches += 1
+        self.seconds = time.perf_counter() - self.start
+        return self
@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Union
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+from sessionize.utils.execute import execute_insert, execute_update, execute_upsert
+
+
+@dataclass
+class RejectedRecord:
+    """
+    Record that failed on its own in a batched write, and the database error it raised.
+    """
+    record: types.Record
+    error: Exception
+
+
+def _begin_sqlite(session: Session) -> None:
+    # pysqlite does not open a transaction before SAVEPOINT, so releasing
+    # the first savepoint would commit it. Open the outer transaction first.
+    if features._get_dialect_name(session) != 'sqlite':
+        return
+    connection = session.connection()
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN')
+
+
+def _write_bisect(
+    write: Callable[[Table, List[types.Record], Session], None],
+    table: Table,
+    records: List[types.Record],
+    session: Session,
+    rejected: List[RejectedRecord]
+) -> None:
+    # Writes records in a savepoint, on error splits them in half
+    # and retries each half until the failing records are found one by one.
+    try:
+        with session.begin_nested():
+            write(table, records, session)
+    except sa.exc.StatementError as e:
+        # Database errors, and parameters the driver or a column type could not bind.
+        if len(records) == 1:
+            rejected.append(RejectedRecord(records[0], e.orig if e.orig is not None else e))
+            return
+        middle = len(records) // 2
+        _write_bisect(write, table, records[:middle], session, rejected)
+        _write_bisect(write, table, records[middle:], session, rejected)
+
+
+def _quarantine(
+    table: Table,
+    rejected: List[RejectedRecord],
+    session: Session
+) -> None:
+    # Inserts rejected records into table, with the error message if it has an error column.
+    columns = set(table.columns.keys())
+    records = []
+    for rejection in rejected:
+        record = {key: value for key, value in rejection.record.items() if key in columns}
+        if 'error' in columns:
+            record['error'] = str(rejection.error)
+        records.append(record)
+    execute_insert(table, records, session)
+
+
+def _write_records_batched(
+    write: Callable[[Table, List[types.Record], Session], None],
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    session: Session,
+    batch_size: int,
+    schema: Optional[str],
+    quarantine: Union[Table, str, None]
+) -> List[RejectedRecord]:
+    table = features._get_table(sa_table, session, schema=schema)
+    quarantine_table = None if quarantine is None else features._get_table(quarantine, session, schema=schema)
+    _begin_sqlite(session)
+    rejected: List[RejectedRecord] = []
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        _write_bisect(write, table, batch, session, rejected)
+    if quarantine_table is not None and rejected:
+        _quarantine(quarantine_table, rejected, session)
+    return rejected
+
+
+def insert_records_batched_session(
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    session: Session,
+    batch_size: int = 1000,
+    schema: Optional[str] = None,
+    quarantine: Union[Table, str, None] = None
+) -> List[RejectedRecord]:
+    """
+    Inserts records into sql table in batches, each in its own SAVEPOINT,
+    so a bad record only loses its own insert instead of the whole transaction.
+    Only adds sql records inserts to session, does not commit session.
+
+    A batch that fails is rolled back to its savepoint and split in half,
+    each half is retried the same way until the failing records are isolated
+    in batches of one. Bisecting costs about 2 * log2(batch_size)
+    extra statements per bad record, so pick a batch_size that keeps
+    batches with a bad record rare.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    records: Iterable[Record]
+        records to insert, any iterable.
+    session: sa.orm.session.Session
+        SqlAlchemy session to add sql inserts to.
+    batch_size: int, default 1000
+        number of records inserted per savepoint.
+    schema: str, default None
+        Database schema name.
+    quarantine: sa.Table or str, default None
+        table to insert rejected records into, in the same session.
+        Only its matching columns are filled, and its error column
+        with the error message, if it has one.
+
+    Returns
+    -------
+    list of RejectedRecord, the records that failed and their errors.
+    """
+    return _write_records_batched(execute_insert, sa_table, records, session,
+                                  batch_size, schema, quarantine)
+
+
+def update_records_batched_session(
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    session: Session,
+    batch_size: int = 1000,
+    schema: Optional[str] = None,
+    quarantine: Union[Table, str, None] = None
+) -> List[RejectedRecord]:
+    """
+    Updates sql table records in batches, each in its own SAVEPOINT.
+    Only adds sql records updates to session, does not commit session.
+    See insert_records_batched_session for how failing batches are handled.
+
+    Returns
+    -------
+    list of RejectedRecord, the records that failed and their errors.
+    """
+    return _write_records_batched(execute_update, sa_table, records, session,
+                                  batch_size, schema, quarantine)
+
+
+def upsert_records_batched_session(
+    sa_table: Union[Table, str],
+    records: Iterable[types.Record],
+    session: Session,
+    batch_size: int = 1000,
+    schema: Optional[str] = None,
+    quarantine: Union[Table, str, None] = None
+) -> List[RejectedRecord]:
+    """
+    Inserts new records and updates existing records in batches,
+    each in its own SAVEPOINT.
+    Only adds sql upserts to session, does not commit session.
+    See insert_records_batched_session for how failing batches are handled.
+
+    Returns
+    -------
+    list of RejectedRecord, the records that failed and their errors.
+    """
+    return _write_records_batched(execute_upsert, sa_table, records, session,
+                                  batch_size, schema, quarantine)
@@ -1,13 +1,17 @@
 
 from typing import List, Optional, Any, Sequence, Union, Generator
 
+import sqlalchemy as sa
 # TODO: replace with interface
 from sqlalchemy import Table
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm.session import Session
 import sqlalchemize.select as select
 
+import sessionize.utils.advisor as advisor
 import sessionize.utils.features as features
+import sessionize.utils.spill as spill
+import sessionize.utils.statements as statements
 import sessionize.utils.types as types
 
 Connection = Union[Engine, Session]
@@ -53,8 +57,9 @@ def select_records_all(
     connection: Connection,
     schema: Optional[str] = None,
     sorted: bool = False,
-    include_columns: Optional[Sequence[str]] = None
-) -> List[types.Record]:
+    include_columns: Optional[Sequence[str]] = None,
+    memory_budget: Optional[int] = None
+) -> Union[List[types.Record], spill.SpilledSequence]:
     """
     Queries database for records in table.
     Returns list of records in sql table.
@@ -65,12 +70,22 @@ def select_records_all(
         SqlAlchemy table mapped to sql table.
     connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
         connection used to query database.
+    memory_budget: int, default None
+        estimated bytes the records may use in memory, larger results are
+        returned as a SpilledSequence backed by a memory-mapped temporary file.
+        Default is the budget set by sessionize.enable_spill, if any.
     
     Returns
     -------
     list of sql table records.
     """
     table = features._get_table(sa_table, connection, schema=schema)
+    if memory_budget is None:
+        memory_budget = spill.get_memory_budget()
+    if memory_budget is not None:
+        query = statements.select_records_statement(table, include_columns, sorted=sorted)
+        fields = [column.name for column in query.selected_columns]
+        return spill.select_spilled(query, connection, memory_budget, fields, directory=spill.get_directory())
     return select.select_records_all(table, connection, sorted, include_columns)
 
 
@@ -129,6 +144,7 @@ def select_existing_values(
     List of matching values.
     """
     table = features._get_table(sa_table, connection, schema=schema)
+    advisor.record_column_usage(table, [column_name])
     return select.select_existing_values(table, connection, column_name, values)
 
 
@@ -171,8 +187,9 @@ def select_column_values_all(
     sa_table: Union[Table, str],
     connection: Connection,
     column_name: str,
-    schema: Optional[str] = None
-) -> list:
+    schema: Optional[str] = None,
+    memory_budget: Optional[int] = None
+) -> Union[list, spill.SpilledSequence]:
     """
     Queries database for vaules in sql table column.
     Returns list of values in sql table column.
@@ -186,12 +203,19 @@ def select_column_values_all(
         name of sql table column.
     connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
         connection used to query database.
+    memory_budget: int, default None
+        estimated bytes the values may use in memory, see select_records_all.
     
     Returns
     -------
     list of sql table column values.
     """
     table = features._get_table(sa_table, connection, schema=schema)
+    if memory_budget is None:
+        memory_budget = spill.get_memory_budget()
+    if memory_budget is not None:
+        query = sa.select(table.columns[column_name])
+        return spill.select_spilled(query, connection, memory_budget, directory=spill.get_directory())
     return select.select_column_values_all(table, connection, column_name)
 
 
@@ -292,6 +316,91 @@ def select_first_record(
     return None
 
 
+def select_records_keyset_chunks(
+    sa_table: Union[Table, str],
+    connection: Connection,
+    chunksize: int,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    start_after: Optional[types.Record] = None,
+    stop_at: Optional[types.Record] = None
+) -> Generator[List[types.Record], None, None]:
+    """
+    Queries database for records in table ordered by primary key.
+    Returns a generator of chunksized lists of records.
+
+    Each chunk is selected with WHERE primary key > last key of the
+    previous chunk instead of OFFSET, so every chunk costs the same
+    no matter how far into the table it is.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    connection: sa.engine.Engine, sa.orm.Session, or sa.engine.Connection
+        connection used to query database.
+    chunksize: int
+        size of lists of sql records generated.
+    start_after: Record, default None
+        primary key values, only records after these keys are selected.
+    stop_at: Record, default None
+        primary key values, only records up to and including these keys are selected.
+
+    Returns
+    -------
+    Generator of lists of sql table records.
+    """
+    table = features._get_table(sa_table, connection, schema=schema)
+    last_key = start_after
+    while True:
+        query, extra_keys = statements.select_keyset_chunk_statement(
+            table, chunksize, include_columns, start_after=last_key, stop_at=stop_at)
+        records = features._fetch_records(query, connection)
+        if not records:
+            return
+        last_key = {key: records[-1][key] for key in features.primary_keys(table)}
+        for record in records:
+            for column in extra_keys:
+                del record[column.name]
+        yield records
+        if len(records) < chunksize:
+            return
+
+
+def select_head_records(
+    sa_table: Union[Table, str],
+    connection: Connection,
+    size: int = 5,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None
+) -> List[types.Record]:
+    """
+    Select the first size records in table, ordered by primary key.
+    Runs a single ORDER BY primary key LIMIT size query.
+    """
+    table = features._get_table(sa_table, connection, schema=schema)
+    query = statements.select_end_statement(table, size, include_columns)
+    return features._fetch_records(query, connection)
+
+
+def select_tail_records(
+    sa_table: Union[Table, str],
+    connection: Connection,
+    size: int = 5,
+    schema: Optional[str] = None,
+    include_columns: Optional[Sequence[str]] = None
+) -> List[types.Record]:
+    """
+    Select the last size records in table, ordered by primary key.
+    Runs a single ORDER BY primary key DESC LIMIT size query.
+    """
+    table = features._get_table(sa_table, connection, schema=schema)
+    query = statements.select_end_statement(table, size, include_columns, descending=True)
+    records = features._fetch_records(query, connection)
+    records.reverse()
+    return records
+
+
 def select_column_values_by_slice(
     sa_table: Union[Table, str],
     connection: Connection,
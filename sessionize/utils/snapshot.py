@@ -0,0 +1,167 @@
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+# TODO: replace with interfaces
+from sqlalchemy import Table, MetaData
+from sqlalchemy.engine import Engine
+
+
+# Path of the snapshot file loaded when sessionize is imported.
+SNAPSHOT_PATH_VARIABLE = 'SESSIONIZE_SCHEMA_SNAPSHOT'
+
+
+_POSTGRES_FINGERPRINT = """
+SELECT md5(
+    COALESCE((
+        SELECT string_agg(c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod)
+                          || ':' || a.attnotnull::text, ',' ORDER BY c.relname, a.attnum)
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = COALESCE(:schema, current_schema())
+          AND c.relkind IN ('r', 'p', 'v')
+          AND a.attnum > 0 AND NOT a.attisdropped
+    ), '')
+    || '|' ||
+    COALESCE((
+        SELECT string_agg(c.conname || ':' || pg_get_constraintdef(c.oid), ',' ORDER BY c.conname)
+        FROM pg_constraint c
+        JOIN pg_namespace n ON n.oid = c.connamespace
+        WHERE n.nspname = COALESCE(:schema, current_schema())
+    ), '')
+) AS fingerprint
+"""
+
+
+def get_schema_fingerprint(
+    engine: Engine,
+    schema: Optional[str] = None
+) -> Optional[str]:
+    """
+    Cheap value that changes whenever the schema changes.
+
+    SQLite uses PRAGMA schema_version.
+    PostgreSQL uses a checksum of the column and constraint catalogs.
+    Returns None for other databases, which are never cached.
+    """
+    if engine.dialect.name not in ('sqlite', 'postgresql'):
+        return None
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            prefix = '' if schema is None else f'"{schema}".'
+            version = connection.execute(sa.text(f'PRAGMA {prefix}schema_version')).scalar()
+            return str(version)
+        if engine.dialect.name == 'postgresql':
+            query = sa.text(_POSTGRES_FINGERPRINT).bindparams(
+                sa.bindparam('schema', schema, type_=sa.String))
+            return connection.execute(query).scalar()
+    return None
+
+
+def snapshot_key(engine: Engine, schema: Optional[str] = None) -> str:
+    # repr of the url hides the password.
+    return f'{engine.url!r}|{schema}'
+
+
+class SchemaSnapshot:
+    """
+    File-backed cache of reflected MetaData keyed by engine url and schema.
+
+    Each entry is stored with the schema fingerprint it was reflected at.
+    The fingerprint is checked before an entry is used and the whole schema
+    is reflected again, and the file rewritten, when it no longer matches.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Tuple[str, MetaData]] = {}
+        self.load()
+
+    def __repr__(self) -> str:
+        return f"SchemaSnapshot(path='{self.path}', keys={list(self.entries)})"
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                self.entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Unreadable snapshots are rebuilt on next use.
+            self.entries = {}
+
+    def save(self) -> None:
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(self.entries, f)
+        os.replace(temp_path, self.path)
+
+    def get_metadata(self, engine: Engine, schema: Optional[str] = None) -> Optional[MetaData]:
+        """
+        Returns MetaData with every table in schema.
+        Only reflects when the snapshot is missing or stale.
+        Returns None for databases without a schema fingerprint,
+        callers reflect the table they need instead of the whole schema.
+        """
+        key = snapshot_key(engine, schema)
+        fingerprint = get_schema_fingerprint(engine, schema)
+        if fingerprint is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        metadata = MetaData()
+        metadata.reflect(bind=engine, schema=schema)
+        self.entries[key] = (fingerprint, metadata)
+        self.save()
+        return metadata
+
+    def get_table(
+        self,
+        table_name: str,
+        engine: Engine,
+        schema: Optional[str] = None
+    ) -> Optional[Table]:
+        metadata = self.get_metadata(engine, schema)
+        if metadata is None:
+            return None
+        key = table_name if schema is None else f'{schema}.{table_name}'
+        return metadata.tables.get(key)
+
+    def get_table_names(
+        self,
+        engine: Engine,
+        schema: Optional[str] = None
+    ) -> Optional[List[str]]:
+        metadata = self.get_metadata(engine, schema)
+        if metadata is None:
+            return None
+        return [table.name for table in metadata.tables.values() if table.schema == schema]
+
+
+_snapshot: Optional[SchemaSnapshot] = None
+if os.environ.get(SNAPSHOT_PATH_VARIABLE):
+    _snapshot = SchemaSnapshot(os.environ[SNAPSHOT_PATH_VARIABLE])
+
+
+def enable_schema_snapshot(path: str) -> SchemaSnapshot:
+    """
+    Use a file-backed schema snapshot for every table reflection.
+    Can also be enabled by setting the SESSIONIZE_SCHEMA_SNAPSHOT
+    environment variable to the snapshot path before import.
+
+    Returns the SchemaSnapshot.
+    """
+    global _snapshot
+    _snapshot = SchemaSnapshot(path)
+    return _snapshot
+
+
+def disable_schema_snapshot() -> None:
+    global _snapshot
+    _snapshot = None
+
+
+def get_schema_snapshot() -> Optional[SchemaSnapshot]:
+    return _snapshot
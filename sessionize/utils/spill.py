@@ -0,0 +1,161 @@
+import mmap
+import pickle
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterator, List, Optional, Union
+
+import sessionize.utils.features as features
+import sessionize.utils.types as types
+
+
+class SpilledSequence(Sequence):
+    """
+    Read-only sequence of query results stored in a memory-mapped temporary file.
+
+    Each row is pickled as a tuple and appended to the file, an array of
+    file offsets, 8 bytes per row, gives random access. Indexing, slicing
+    and iteration only unpickle the rows they return, so the full result
+    is never loaded back into memory.
+    Items are records if fields is given, otherwise single column values.
+    The file is deleted when the sequence is closed or garbage collected.
+    """
+    def __init__(
+        self,
+        fields: Optional[List[str]] = None,
+        directory: Optional[str] = None
+    ) -> None:
+        self.fields = fields
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._offsets = array('q', [0])
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __repr__(self) -> str:
+        return f'SpilledSequence(len={len(self)}, fields={self.fields})'
+
+    def append_rows(self, rows) -> None:
+        # Only before finish, rows are tuples or SqlAlchemy Rows.
+        for row in rows:
+            data = pickle.dumps(tuple(row), protocol=pickle.HIGHEST_PROTOCOL)
+            self._file.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+
+    def finish(self) -> 'SpilledSequence':
+        # Maps the written file for reading, no rows can be appended after.
+        self._file.flush()
+        if self._offsets[-1] > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _load(self, index: int) -> Any:
+        row = pickle.loads(self._mmap[self._offsets[index]:self._offsets[index + 1]])
+        if self.fields is None:
+            return row[0]
+        return dict(zip(self.fields, row))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        if isinstance(key, slice):
+            return [self._load(index) for index in range(*key.indices(len(self)))]
+        length = len(self)
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
+            raise IndexError('SpilledSequence index out of range')
+        return self._load(key)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self._load(index)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+
+def _row_size(row) -> int:
+    # Estimated bytes of a row once held as a record dict of its values.
+    return 64 + 24 * len(row) + sum(sys.getsizeof(value) for value in row)
+
+
+def select_spilled(
+    query,
+    connection: types.SqlConnection,
+    memory_budget: int,
+    fields: Optional[List[str]] = None,
+    chunksize: int = 10000,
+    directory: Optional[str] = None
+) -> Union[list, SpilledSequence]:
+    """
+    Executes query and returns its rows as a list if they fit in memory_budget,
+    otherwise as a SpilledSequence.
+
+    Rows are streamed from a server side cursor, chunksize at a time,
+    and kept in memory until their estimated size passes memory_budget
+    bytes, then every row so far and every later row is written to a
+    memory-mapped temporary file in directory, default the system temp dir.
+
+    fields: names to zip each row with into a record,
+        if None the first value of each row is returned.
+    """
+    kept: list = []
+    size = 0
+    spilled: Optional[SpilledSequence] = None
+    for rows in features._stream_rows(query, connection, chunksize):
+        if spilled is not None:
+            spilled.append_rows(rows)
+            continue
+        kept.extend(rows)
+        size += sum(_row_size(row) for row in rows)
+        if size > memory_budget:
+            spilled = SpilledSequence(fields, directory)
+            spilled.append_rows(kept)
+            kept = []
+    if spilled is not None:
+        return spilled.finish()
+    if fields is None:
+        return [row[0] for row in kept]
+    return [dict(zip(fields, row)) for row in kept]
+
+
+_memory_budget: Optional[int] = None
+_directory: Optional[str] = None
+
+
+def enable_spill(memory_budget: int, directory: Optional[str] = None) -> None:
+    """
+    Spill large results of select_records_all and select_column_values_all,
+    and so of TableSelection.records and ColumnSelection.values and the
+    filters built from them, to memory-mapped temporary files.
+
+    memory_budget: estimated bytes a result may use in memory
+        before it is spilled.
+    directory: where temporary files are written, default the system temp dir.
+    """
+    global _memory_budget, _directory
+    _memory_budget = memory_budget
+    _directory = directory
+
+
+def disable_spill() -> None:
+    global _memory_budget, _directory
+    _memory_budget = None
+    _directory = None
+
+
+def get_memory_budget() -> Optional[int]:
+    return _memory_budget
+
+
+def get_directory() -> Optional[str]:
+    return _directory
@@ -0,0 +1,194 @@
+import operator
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+# TODO: replace with interfaces
+from sqlalchemy import Table
+
+import sessionize.utils.features as features
+import sessionize.utils.types as types
+
+# SqlAlchemy Core statements shared by the sync and async tables.
+# Builders only construct statements, callers execute them.
+
+
+def _select_columns(
+    sa_table: Table,
+    include_columns: Optional[Sequence[str]] = None
+) -> list:
+    if include_columns is None:
+        return list(sa_table.columns)
+    return [sa_table.columns[column_name] for column_name in include_columns]
+
+
+def _order_by_primary_keys(
+    sa_table: Table,
+    descending: bool = False
+) -> list:
+    keys = [sa_table.columns[key] for key in features.primary_keys(sa_table)]
+    if descending:
+        return [key.desc() for key in keys]
+    return keys
+
+
+def _keyset_clause(
+    key_columns: list,
+    key_record: types.Record,
+    compare=operator.gt
+):
+    # Compare primary key columns to key_record values, as a row value for composite keys.
+    values = [key_record[column.name] for column in key_columns]
+    if len(key_columns) == 1:
+        return compare(key_columns[0], values[0])
+    return compare(sa.tuple_(*key_columns), sa.tuple_(*values))
+
+
+def _key_parameter(column_name: str) -> str:
+    # Bind parameter names for primary key values in WHERE clauses,
+    # so they do not collide with the SET values of the same column.
+    return f'_key_{column_name}'
+
+
+def select_records_statement(
+    sa_table: Table,
+    include_columns: Optional[Sequence[str]] = None,
+    sorted: bool = False
+) -> sa.sql.Select:
+    query = sa.select(*_select_columns(sa_table, include_columns))
+    if sorted:
+        query = query.order_by(*_order_by_primary_keys(sa_table))
+    return query
+
+
+def select_end_statement(
+    sa_table: Table,
+    size: int,
+    include_columns: Optional[Sequence[str]] = None,
+    descending: bool = False
+) -> sa.sql.Select:
+    # First size records by primary key, or last size records in reverse when descending.
+    return (sa.select(*_select_columns(sa_table, include_columns))
+              .order_by(*_order_by_primary_keys(sa_table, descending=descending))
+              .limit(size))
+
+
+def select_keyset_chunk_statement(
+    sa_table: Table,
+    chunksize: int,
+    include_columns: Optional[Sequence[str]] = None,
+    start_after: Optional[types.Record] = None,
+    stop_at: Optional[types.Record] = None
+) -> Tuple[sa.sql.Select, List[sa.Column]]:
+    """
+    Select chunksize records ordered by primary key after start_after.
+
+    Returns the query and the primary key columns that were added to it
+    because include_columns did not have them, the caller removes those
+    from the selected records.
+    """
+    key_columns = _order_by_primary_keys(sa_table)
+    columns = _select_columns(sa_table, include_columns)
+    # Primary keys are always selected to find the next chunk.
+    column_names = {column.name for column in columns}
+    extra_keys = [column for column in key_columns if column.name not in column_names]
+    query = sa.select(*columns, *extra_keys).order_by(*key_columns).limit(chunksize)
+    if start_after is not None:
+        query = query.where(_keyset_clause(key_columns, start_after))
+    if stop_at is not None:
+        query = query.where(_keyset_clause(key_columns, stop_at, operator.le))
+    return query, extra_keys
+
+
+def row_count_statement(sa_table: Table) -> sa.sql.Select:
+    return sa.select(sa.func.count()).select_from(sa_table)
+
+
+def insert_records_statements(
+    sa_table: Table,
+    records: Sequence[types.Record]
+) -> List[Tuple[sa.sql.Insert, List[types.Record]]]:
+    """
+    INSERT statements for records.
+
+    executemany takes its columns from the first parameter set only,
+    so records are grouped by their columns, one statement per group,
+    each returned with its list of executemany parameters.
+    """
+    groups: Dict[Tuple[str, ...], List[types.Record]] = {}
+    for record in records:
+        groups.setdefault(tuple(record), []).append(record)
+    return [(sa_table.insert(), group) for group in groups.values()]
+
+
+def update_records_statements(
+    sa_table: Table,
+    records: Sequence[types.Record]
+) -> List[Tuple[sa.sql.Update, List[types.Record]]]:
+    """
+    UPDATE ... WHERE primary key statements for records, matched by primary key.
+
+    Records are grouped by the columns they update, one statement per group,
+    each returned with its list of executemany parameters.
+    """
+    keys = features.primary_keys(sa_table)
+    groups: Dict[Tuple[str, ...], List[types.Record]] = {}
+    for record in records:
+        column_names = tuple(name for name in record if name not in keys)
+        parameters = {name: record[name] for name in column_names}
+        parameters.update({_key_parameter(key): record[key] for key in keys})
+        groups.setdefault(column_names, []).append(parameters)
+    statements = []
+    for column_names, parameters in groups.items():
+        if not column_names:
+            continue
+        # SET columns come from the parameter names that are not _key_ parameters.
+        statement = sa_table.update().where(
+            sa.and_(*[sa_table.c[key] == sa.bindparam(_key_parameter(key)) for key in keys]))
+        statements.append((statement, parameters))
+    return statements
+
+
+def delete_records_statement(
+    sa_table: Table,
+    column_name: str,
+    values: Sequence
+) -> sa.sql.Delete:
+    return sa_table.delete().where(sa_table.c[column_name].in_(values))
+
+
+def upsert_records_statements(
+    sa_table: Table,
+    records: Sequence[types.Record],
+    dialect_name: str
+) -> List[Tuple[sa.sql.Insert, List[types.Record]]]:
+    """
+    INSERT ... ON CONFLICT (primary key) DO UPDATE statements for records.
+    Uses ON DUPLICATE KEY UPDATE on MySQL.
+
+    Records are grouped by their columns, one statement per group,
+    each returned with its list of executemany parameters.
+    """
+    dialect_inserts = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert, 'mysql': mysql.insert}
+    if dialect_name not in dialect_inserts:
+        raise NotImplementedError(f'upsert is not supported on {dialect_name}.')
+    insert = dialect_inserts[dialect_name]
+    keys = features.primary_keys(sa_table)
+    groups: Dict[Tuple[str, ...], List[types.Record]] = {}
+    for record in records:
+        groups.setdefault(tuple(record), []).append(record)
+    statements = []
+    for column_names, group in groups.items():
+        statement = insert(sa_table)
+        update_names = [name for name in column_names if name not in keys]
+        if dialect_name == 'mysql':
+            statement = statement.on_duplicate_key_update(
+                {name: statement.inserted[name] for name in update_names or keys})
+        elif update_names:
+            statement = statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={name: statement.excluded[name] for name in update_names})
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=keys)
+        statements.append((statement, group))
+    return statements
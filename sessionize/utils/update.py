@@ -3,10 +3,10 @@ from typing import List, Optional, Union
 from sqlalchemy import Table
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm.session import Session
-import sqlalchemize.update as update
 
 import sessionize.utils.types as types
 import sessionize.utils.features as features
+import sessionize.utils.statements as statements
 
 
 def update_records_session(
@@ -28,7 +28,7 @@ def update_records_session(
         Use sessionize.engine_utils.get_table to get table.
     records: list[Record]
         list of records to update.
-        Use df.to_dict('records') to convert Pandas DataFrame to records.
+        Use update_dataframe_session to update from a Pandas DataFrame.
     session: sa.orm.session.Session
         SqlAlchemy session to add sql updates to.
     schema: str, default None
@@ -42,7 +42,8 @@ def update_records_session(
     None
     """
     table = features._get_table(table, session, schema=schema)
-    update.update_records_session(table, records, session)
+    for statement, parameters in statements.update_records_statements(table, records):
+        session.execute(statement, parameters)
 
 
 def update_records(
@@ -52,4 +53,6 @@ def update_records(
     schema: Optional[str] = None
 ) -> None:
     table = features._get_table(sa_table, engine, schema=schema)
-    update.update_records(table, records, engine)
\ No newline at end of file
+    with engine.begin() as connection:
+        for statement, parameters in statements.update_records_statements(table, records):
+            connection.execute(statement, parameters)
\ No newline at end of file
@@ -0,0 +1,56 @@
+from typing import List, Optional, Union
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.session import Session
+
+import sessionize.utils.types as types
+import sessionize.utils.features as features
+import sessionize.utils.statements as statements
+
+
+def upsert_records_session(
+    sa_table: Union[Table, str],
+    records: List[types.Record],
+    session: Session,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Insert new records and update existing records in sql table,
+    matched by primary key, with INSERT ... ON CONFLICT DO UPDATE.
+    Only adds sql upserts to session, does not commit session.
+    Sql table must have primary key.
+    Supports SQLite, PostgreSQL and MySQL.
+
+    Parameters
+    ----------
+    sa_table: sa.Table
+        SqlAlchemy table mapped to sql table.
+    records: list[Record]
+        list of records to insert or update.
+        Every record must have its primary key values.
+    session: sa.orm.session.Session
+        SqlAlchemy session to add sql upserts to.
+    schema: str, default None
+        Database schema name.
+
+    Returns
+    -------
+    None
+    """
+    table = features._get_table(sa_table, session, schema=schema)
+    dialect_name = features._get_dialect_name(session)
+    for statement, parameters in statements.upsert_records_statements(table, records, dialect_name):
+        session.execute(statement, parameters)
+
+
+def upsert_records(
+    sa_table: Union[Table, str],
+    records: List[types.Record],
+    engine: Engine,
+    schema: Optional[str] = None
+) -> None:
+    table = features._get_table(sa_table, engine, schema=schema)
+    with engine.begin() as connection:
+        for statement, parameters in statements.upsert_records_statements(table, records, engine.dialect.name):
+            connection.execute(statement, parameters)
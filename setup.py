@@ -24,5 +24,13 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     python_requires='>=3.8',
-    install_requires=['sqlalchemize', 'alembic>=1.7.5', 'chaingang']
+    install_requires=['sqlalchemize', 'alembic>=1.7.5', 'chaingang'],
+    extras_require={
+        # AsyncSessionTable and AsyncSessionDatabase, aiosqlite for SQLite.
+        'async': ['sqlalchemy[asyncio]>=1.4', 'aiosqlite'],
+        # to_parquet and from_parquet.
+        'arrow': ['pyarrow>=7'],
+        # DataFrame reads and writes.
+        'pandas': ['pandas>=1.3'],
+    }
 )
\ No newline at end of file
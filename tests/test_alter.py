@@ -5,7 +5,8 @@ from sessionize.utils.select import select_records
 from sessionize.utils.features import get_table, get_column
 from sessionize.exceptions import ForceFail
 from sessionize.utils.alter import rename_column, drop_column, add_column, rename_table
-from sessionize.utils.alter import copy_table, replace_primary_key, name_primary_key
+from sessionize.utils.alter import copy_table, replace_primary_key, name_primary_key, backfill_column
+from sessionize.exceptions import BackfillError
 
 import sqlalchemy as sa
 import sqlalchemy.exc as sa_exc
@@ -129,6 +130,81 @@ class TestAddColumn(unittest.TestCase):
     def test_add_column_op_error_schema(self):
         self.raise_operational_error(postgres_setup, sa_exc.ProgrammingError, schema='local')
 
+    def add_column_backfill(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        add_column('people', 'country', str, engine, schema=schema, default='US')
+        add_column('people', 'birth_year', int, engine, schema=schema, backfill='2022 - age', batch_size=3)
+        add_column('people', 'initial', str, engine, schema=schema,
+                   backfill=lambda record: record['name'][0], batch_size=3)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual([record['country'] for record in records], ['US'] * 4)
+        self.assertEqual([record['birth_year'] for record in records], [2005, 2004, 2003, 2002])
+        self.assertEqual([record['initial'] for record in records], ['O', 'L', 'E', 'N'])
+
+    def test_add_column_backfill_sqlite(self):
+        self.add_column_backfill(sqlite_setup)
+
+    def test_add_column_backfill_postgres(self):
+        self.add_column_backfill(postgres_setup)
+
+    def test_add_column_backfill_schema(self):
+        self.add_column_backfill(postgres_setup, schema='local')
+
+    def resume_backfill(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        add_column('people', 'initial', str, engine, schema=schema)
+
+        def fail_on_emma(record):
+            if record['name'] == 'Emma':
+                raise ValueError
+            return record['name'][0]
+
+        with self.assertRaises(BackfillError) as context:
+            backfill_column('people', 'initial', fail_on_emma, engine, schema=schema, batch_size=2)
+        self.assertEqual(context.exception.last_key, {'id': 2})
+        backfill_column('people', 'initial', lambda record: record['name'][0], engine,
+                        schema=schema, batch_size=2, start_after=context.exception.last_key)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual([record['initial'] for record in records], ['O', 'L', 'E', 'N'])
+
+    def test_resume_backfill_sqlite(self):
+        self.resume_backfill(sqlite_setup)
+
+    def test_resume_backfill_postgres(self):
+        self.resume_backfill(postgres_setup)
+
+    def test_resume_backfill_schema(self):
+        self.resume_backfill(postgres_setup, schema='local')
+
+    def interrupted_backfill(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        add_column('people', 'initial', str, engine, schema=schema)
+        checkpoints = []
+
+        def interrupt_on_emma(record):
+            if record['name'] == 'Emma':
+                raise KeyboardInterrupt
+            return record['name'][0]
+
+        with self.assertRaises(KeyboardInterrupt) as context:
+            backfill_column('people', 'initial', interrupt_on_emma, engine, schema=schema, batch_size=2,
+                            progress=lambda progress: checkpoints.append(progress.last_key))
+        self.assertEqual(context.exception.last_key, {'id': 2})
+        self.assertEqual(checkpoints, [{'id': 2}])
+        backfill_column('people', 'initial', lambda record: record['name'][0], engine,
+                        schema=schema, batch_size=2, start_after=checkpoints[-1])
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual([record['initial'] for record in records], ['O', 'L', 'E', 'N'])
+
+    def test_interrupted_backfill_sqlite(self):
+        self.interrupted_backfill(sqlite_setup)
+
+    def test_interrupted_backfill_postgres(self):
+        self.interrupted_backfill(postgres_setup)
+
+    def test_interrupted_backfill_schema(self):
+        self.interrupted_backfill(postgres_setup, schema='local')
+
 
 class TestRenameTable(unittest.TestCase):
     def rename_table(self, setup_function, schema=None):
@@ -188,6 +264,68 @@ class TestCopyTable(unittest.TestCase):
 
     def test_copy_table_schema(self):
         self.copy_table(postgres_setup, schema='local')
+
+    def copy_table_chunks(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        reports = []
+        new_table = copy_table('people', 'employees', engine, schema=schema, chunksize=3,
+                               progress=lambda report: reports.append(report.rows))
+        self.assertEqual(reports, [3, 4])
+        records = select_records(new_table, engine, schema=schema, sorted=True)
+        self.assertEqual(records, select_records('people', engine, schema=schema, sorted=True))
+
+    def test_copy_table_chunks_sqlite(self):
+        self.copy_table_chunks(sqlite_setup)
+
+    def test_copy_table_chunks_postgres(self):
+        self.copy_table_chunks(postgres_setup)
+
+    def test_copy_table_chunks_schema(self):
+        self.copy_table_chunks(postgres_setup, schema='local')
+
+    def copy_table_no_primary_key(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        events = sa.Table('events', sa.MetaData(), sa.Column('name', sa.String(20)), schema=schema)
+        events.drop(engine, checkfirst=True)
+        events.create(engine)
+        names = [f'event_{i}' for i in range(5)]
+        with engine.begin() as connection:
+            connection.execute(events.insert(), [{'name': name} for name in names])
+        new_table = copy_table('events', 'events_copy', engine, schema=schema, chunksize=2)
+        records = select_records(new_table, engine, schema=schema)
+        self.assertEqual(sorted(record['name'] for record in records), names)
+
+    def test_copy_table_no_primary_key_sqlite(self):
+        self.copy_table_no_primary_key(sqlite_setup)
+
+    def test_copy_table_no_primary_key_postgres(self):
+        self.copy_table_no_primary_key(postgres_setup)
+
+    def test_copy_table_no_primary_key_schema(self):
+        self.copy_table_no_primary_key(postgres_setup, schema='local')
+
+    def test_copy_table_no_primary_key_target_engine_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        target_engine, tbl1, tbl2 = sqlite_setup('sqlite:///data/target.db')
+        events = sa.Table('events', sa.MetaData(), sa.Column('name', sa.String(20)))
+        events.drop(engine, checkfirst=True)
+        events.create(engine)
+        names = [f'event_{i}' for i in range(5)]
+        with engine.begin() as connection:
+            connection.execute(events.insert(), [{'name': name} for name in names])
+        reports = []
+        new_table = copy_table('events', 'events', engine, target_engine=target_engine, chunksize=2,
+                               progress=lambda report: reports.append(report.rows))
+        self.assertEqual(reports, [2, 4, 5])
+        records = select_records(new_table, target_engine)
+        self.assertEqual(sorted(record['name'] for record in records), names)
+
+    def test_copy_table_target_engine_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        target_engine, tbl1, tbl2 = sqlite_setup('sqlite:///data/target.db')
+        new_table = copy_table('people', 'employees', engine, target_engine=target_engine, chunksize=3)
+        records = select_records(new_table, target_engine, sorted=True)
+        self.assertEqual(records, select_records('people', engine, sorted=True))
  
 
 # TODO: replace_primary_key tests
@@ -0,0 +1,60 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.arrow_io import arrow_schema, from_parquet, to_parquet
+from sessionize.utils.delete import delete_all_records
+from sessionize.utils.features import get_table
+from sessionize.utils.select import select_records
+
+# pyarrow is only installed with the arrow extra.
+has_pyarrow = importlib.util.find_spec('pyarrow') is not None
+
+
+@unittest.skipUnless(has_pyarrow, 'needs pyarrow, pip install sessionize[arrow]')
+class TestParquet(unittest.TestCase):
+    def parquet_round_trip(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.parquet')
+            progress = to_parquet('people', path, engine, row_group_size=3, schema=schema)
+            self.assertEqual((progress.rows, progress.batches), (4, 2))
+            delete_all_records('people', engine, schema=schema)
+            progress = from_parquet(path, 'people', engine, batch_size=3, schema=schema)
+            self.assertEqual(progress.rows, 4)
+        self.assertEqual(select_records('people', engine, schema=schema, sorted=True), records)
+
+    def test_parquet_round_trip_sqlite(self):
+        self.parquet_round_trip(sqlite_setup)
+
+    def test_parquet_round_trip_postgres(self):
+        self.parquet_round_trip(postgres_setup)
+
+    def test_parquet_round_trip_schema(self):
+        self.parquet_round_trip(postgres_setup, schema='local')
+
+    def session_table_to_parquet(self, setup_function, schema=None):
+        import pyarrow.parquet as pq
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.parquet')
+            with SessionTable('people', engine, schema=schema) as sst:
+                sst.to_parquet(path, row_group_size=2)
+            parquet_file = pq.ParquetFile(path)
+            self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+            arrow_table = parquet_file.read()
+        self.assertEqual(arrow_table.schema, arrow_schema(get_table('people', engine, schema=schema)))
+        self.assertEqual(arrow_table.column('name').to_pylist(), ['Olivia', 'Liam', 'Emma', 'Noah'])
+
+    def test_session_table_to_parquet_sqlite(self):
+        self.session_table_to_parquet(sqlite_setup)
+
+    def test_session_table_to_parquet_postgres(self):
+        self.session_table_to_parquet(postgres_setup)
+
+    def test_session_table_to_parquet_schema(self):
+        self.session_table_to_parquet(postgres_setup, schema='local')
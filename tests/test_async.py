@@ -0,0 +1,67 @@
+import unittest
+
+from setup_test import sqlite_setup
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from sessionize.orm.async_session import AsyncSessionTable, AsyncSessionDatabase
+from sessionize.utils.select import select_records
+from sessionize.exceptions import ForceFail
+
+# Needs the aiosqlite driver.
+async_sqlite_url = 'sqlite+aiosqlite:///data/test.db'
+
+
+class TestAsyncSessionTable(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine, tbl1, tbl2 = sqlite_setup()
+        self.async_engine = create_async_engine(async_sqlite_url)
+
+    async def asyncTearDown(self):
+        await self.async_engine.dispose()
+
+    async def test_select_records_sqlite(self):
+        async with AsyncSessionTable('people', self.async_engine) as table:
+            records = await table.select_records(sorted=True)
+            self.assertEqual(records[0], {'id': 1, 'name': 'Olivia', 'age': 17, 'address_id': 1})
+            self.assertEqual(await table.count(), 4)
+            self.assertEqual([r['id'] for r in await table.head(2)], [1, 2])
+            self.assertEqual([r['id'] for r in await table.tail(2)], [3, 4])
+
+    async def test_async_for_sqlite(self):
+        async with AsyncSessionTable('people', self.async_engine, chunksize=3) as table:
+            names = [record['name'] async for record in table]
+            chunks = [chunk async for chunk in table.select_chunks(2, include_columns=['name'])]
+        self.assertEqual(names, ['Olivia', 'Liam', 'Emma', 'Noah'])
+        self.assertEqual(chunks, [[{'name': 'Olivia'}, {'name': 'Liam'}], [{'name': 'Emma'}, {'name': 'Noah'}]])
+
+    async def test_writes_commit_sqlite(self):
+        async with AsyncSessionTable('people', self.async_engine) as table:
+            await table.insert_one_record({'name': 'Ava', 'age': 21, 'address_id': 3})
+            await table.update_records([{'id': 1, 'age': 18}, {'id': 2, 'name': 'Leo'}])
+            await table.delete_one_record('name', 'Noah')
+            await table.upsert_records([{'id': 3, 'name': 'Emma', 'age': 25, 'address_id': 2},
+                                        {'id': 9, 'name': 'Mia', 'age': 22, 'address_id': 3}])
+        records = select_records('people', self.engine, sorted=True)
+        self.assertEqual(records, [
+            {'id': 1, 'name': 'Olivia', 'age': 18, 'address_id': 1},
+            {'id': 2, 'name': 'Leo', 'age': 18, 'address_id': 1},
+            {'id': 3, 'name': 'Emma', 'age': 25, 'address_id': 2},
+            {'id': 5, 'name': 'Ava', 'age': 21, 'address_id': 3},
+            {'id': 9, 'name': 'Mia', 'age': 22, 'address_id': 3},
+        ])
+
+    async def test_rollback_sqlite(self):
+        try:
+            async with AsyncSessionTable('people', self.async_engine) as table:
+                await table.delete_records('id', [1, 2])
+                raise ForceFail
+        except ForceFail:
+            pass
+        self.assertEqual(len(select_records('people', self.engine)), 4)
+
+    async def test_database_sqlite(self):
+        async with AsyncSessionDatabase(self.async_engine) as db:
+            self.assertEqual(set(await db.table_names()), {'people', 'places'})
+            await db['places'].delete_records('id', [1])
+            self.assertEqual(await db['people'].count(), 4)
+        self.assertEqual(len(select_records('places', self.engine)), 1)
@@ -0,0 +1,106 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.csv_io import read_csv, to_csv
+from sessionize.utils.delete import delete_all_records
+from sessionize.utils.insert import insert_records
+from sessionize.utils.select import select_records
+
+
+class TestCsv(unittest.TestCase):
+    def csv_round_trip(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.csv')
+            progress = to_csv('people', path, engine, chunksize=3, schema=schema)
+            self.assertEqual((progress.rows, progress.batches), (4, 2))
+            delete_all_records('people', engine, schema=schema)
+            progress = read_csv(path, 'people', engine, batch_size=3, schema=schema)
+            self.assertEqual(progress.rows, 4)
+        self.assertEqual(select_records('people', engine, schema=schema, sorted=True), records)
+
+    def test_csv_round_trip_sqlite(self):
+        self.csv_round_trip(sqlite_setup)
+
+    def test_csv_round_trip_postgres(self):
+        self.csv_round_trip(postgres_setup)
+
+    def test_csv_round_trip_schema(self):
+        self.csv_round_trip(postgres_setup, schema='local')
+
+    def csv_json_round_trip(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        metadata = sa.MetaData(schema=schema)
+        sa.Table('documents', metadata,
+                 sa.Column('id', sa.Integer, primary_key=True),
+                 sa.Column('data', sa.JSON))
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        records = [{'id': 1, 'data': {'a': 1, 'b': [True, None]}}, {'id': 2, 'data': ['x', 'y']}]
+        insert_records('documents', records, engine, schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'documents.csv')
+            to_csv('documents', path, engine, schema=schema)
+            delete_all_records('documents', engine, schema=schema)
+            read_csv(path, 'documents', engine, schema=schema)
+        self.assertEqual(select_records('documents', engine, schema=schema, sorted=True), records)
+
+    def test_csv_json_round_trip_sqlite(self):
+        self.csv_json_round_trip(sqlite_setup)
+
+    def test_csv_json_round_trip_postgres(self):
+        self.csv_json_round_trip(postgres_setup)
+
+    def test_csv_json_round_trip_schema(self):
+        self.csv_json_round_trip(postgres_setup, schema='local')
+
+    def read_csv_types(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.csv')
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['id', 'name', 'age'])
+                writer.writerows([[5, 'Ava', 21], [6, '', '']])
+            read_csv(path, 'people', engine, schema=schema)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual(records[4], {'id': 5, 'name': 'Ava', 'age': 21, 'address_id': None})
+        self.assertEqual(records[5], {'id': 6, 'name': '', 'age': None, 'address_id': None})
+
+    def test_read_csv_types_sqlite(self):
+        self.read_csv_types(sqlite_setup)
+
+    def test_read_csv_types_postgres(self):
+        self.read_csv_types(postgres_setup)
+
+    def test_read_csv_types_schema(self):
+        self.read_csv_types(postgres_setup, schema='local')
+
+    def session_table_to_csv(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.csv')
+            with SessionTable('people', engine, schema=schema) as sst:
+                sst.update_one_record({'id': 1, 'age': 50})
+                # Sees the session's own uncommitted update.
+                sst.to_csv(path)
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], {'id': '1', 'name': 'Olivia', 'age': '50', 'address_id': '1'})
+
+    def test_session_table_to_csv_sqlite(self):
+        self.session_table_to_csv(sqlite_setup)
+
+    def test_session_table_to_csv_postgres(self):
+        self.session_table_to_csv(postgres_setup)
+
+    def test_session_table_to_csv_schema(self):
+        self.session_table_to_csv(postgres_setup, schema='local')
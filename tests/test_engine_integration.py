@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
 
+import sqlalchemy as sa
 import sqlalchemy.orm.session as sa_session
 
 from setup_test import sqlite_setup, postgres_setup
@@ -8,6 +11,8 @@ from sessionize.exceptions import ForceFail
 from sessionize.utils.alter import rename_column, drop_column, add_column
 from sessionize.utils.alter import rename_table, copy_table, replace_primary_key
 from sessionize.utils.alter import create_primary_key, name_primary_key
+from sessionize.utils.insert import insert_records
+from sessionize.utils.engine_integration import create_engine, PROFILES, _engine_kwargs, _merge_connect_args
 
 # TODO: rename_column & drop_column
 
@@ -19,4 +24,51 @@ from sessionize.utils.alter import create_primary_key, name_primary_key
 
 # TODO: copy_table & replace_primary_key
 
-# TODO: create_primary_key & replace_primary_key
\ No newline at end of file
+# TODO: create_primary_key & replace_primary_key
+
+class TestCreateEngine(unittest.TestCase):
+    def setUp(self):
+        # Pragmas such as journal_mode=WAL persist in the file, keep them out of the shared test database.
+        self.directory = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.directory.name, 'pragmas.db')}"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_oltp_pragmas_sqlite(self):
+        engine = create_engine(self.url)
+        with engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA journal_mode').scalar(), 'wal')
+            self.assertEqual(connection.exec_driver_sql('PRAGMA synchronous').scalar(), 1)
+            self.assertEqual(connection.exec_driver_sql('PRAGMA cache_size').scalar(), -64000)
+            self.assertEqual(connection.exec_driver_sql('PRAGMA temp_store').scalar(), 2)
+        engine.dispose()
+
+    def test_bulk_pragmas_sqlite(self):
+        engine = create_engine(self.url, profile='bulk', pragmas={'cache_size': -1000})
+        with engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA synchronous').scalar(), 0)
+            self.assertEqual(connection.exec_driver_sql('PRAGMA cache_size').scalar(), -1000)
+        engine.dispose()
+
+    def test_readonly_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        engine = create_engine(engine.url, profile='readonly')
+        self.assertEqual(len(select_records('people', engine)), 4)
+        with self.assertRaises(sa.exc.OperationalError):
+            insert_records('people', [{'name': 'Ava', 'age': 21, 'address_id': 3}], engine)
+        engine.dispose()
+
+    def test_postgres_kwargs(self):
+        url = sa.engine.make_url('postgresql+psycopg2://user@localhost/db')
+        kwargs = _engine_kwargs(url, PROFILES['bulk'])
+        self.assertTrue(kwargs['pool_pre_ping'])
+        self.assertEqual(kwargs['pool_size'], 2)
+        readonly_kwargs = _engine_kwargs(url, PROFILES['readonly'])
+        self.assertEqual(readonly_kwargs['connect_args'], {'options': '-c default_transaction_read_only=on'})
+        merged = _merge_connect_args(readonly_kwargs['connect_args'], {'sslmode': 'require', 'options': '-c x=1'})
+        self.assertEqual(merged, {'options': '-c default_transaction_read_only=on -c x=1', 'sslmode': 'require'})
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            create_engine('sqlite://', profile='fast')
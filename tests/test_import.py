@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import unittest
+
+
+def loaded_modules(statement: str) -> set:
+    code = f'{statement}; import sys; print(" ".join(sys.modules))'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_sessionize(self):
+        modules = loaded_modules('import sessionize')
+        self.assertNotIn('alembic', modules)
+        self.assertNotIn('sessionize.utils.alter', modules)
+        self.assertNotIn('sessionize.orm.session_table', modules)
+
+    def test_import_insert_records(self):
+        modules = loaded_modules('from sessionize import insert_records')
+        self.assertIn('sessionize.utils.insert', modules)
+        self.assertNotIn('alembic', modules)
+        self.assertNotIn('sessionize.utils.alter', modules)
+
+    def test_import_migrate(self):
+        modules = loaded_modules('from sessionize import migrate')
+        self.assertIn('sessionize.utils.alter', modules)
+
+    def test_missing_attribute(self):
+        import sessionize
+        with self.assertRaises(AttributeError):
+            sessionize.not_a_function
@@ -0,0 +1,101 @@
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.index import create_index, drop_index, list_indexes
+from sessionize.utils.select import select_existing_values
+from sessionize.utils.delete import delete_records
+from sessionize.utils.advisor import enable_index_advisor, disable_index_advisor, IndexSuggestion
+
+
+class TestIndex(unittest.TestCase):
+    def create_list_drop_index(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        table = create_index('people', ['name', 'age'], engine, schema=schema)
+        self.assertIn('ix_people_name_age', [index.name for index in table.indexes])
+        indexes = list_indexes('people', engine, schema=schema)
+        self.assertEqual(indexes, [{'name': 'ix_people_name_age', 'column_names': ['name', 'age'], 'unique': False}])
+        table = drop_index('people', 'ix_people_name_age', engine, schema=schema)
+        self.assertEqual(len(table.indexes), 0)
+        self.assertEqual(list_indexes('people', engine, schema=schema), [])
+
+    def test_create_list_drop_index_sqlite(self):
+        self.create_list_drop_index(sqlite_setup)
+
+    def test_create_list_drop_index_postgres(self):
+        self.create_list_drop_index(postgres_setup)
+
+    def test_create_list_drop_index_schema(self):
+        self.create_list_drop_index(postgres_setup, schema='local')
+
+    def create_unique_index(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        create_index('people', 'name', engine, index_name='people_name', unique=True, schema=schema)
+        indexes = list_indexes('people', engine, schema=schema)
+        self.assertEqual(indexes, [{'name': 'people_name', 'column_names': ['name'], 'unique': True}])
+
+    def test_create_unique_index_sqlite(self):
+        self.create_unique_index(sqlite_setup)
+
+    def test_create_unique_index_postgres(self):
+        self.create_unique_index(postgres_setup)
+
+    def test_create_unique_index_schema(self):
+        self.create_unique_index(postgres_setup, schema='local')
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    def tearDown(self):
+        disable_index_advisor()
+
+    def advisor_apply(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        advisor = enable_index_advisor()
+        select_existing_values('people', engine, 'name', ['Olivia'], schema=schema)
+        delete_records('people', 'name', ['Liam'], engine, schema=schema)
+        delete_records('people', 'age', [18], engine, schema=schema)
+        delete_records('people', 'id', [1], engine, schema=schema)
+        # Evaluated in Python, not recorded.
+        SessionTable('people', engine, schema=schema)['address_id'] == 1
+        suggestions = advisor.suggest(engine)
+        self.assertEqual(suggestions, [
+            IndexSuggestion('people', ['name'], schema, 2, 'ix_people_name'),
+            IndexSuggestion('people', ['age'], schema, 1, 'ix_people_age')
+        ])
+        # Checking candidates on SQLite never leaves an index behind.
+        self.assertEqual(list_indexes('people', engine, schema=schema), [])
+        advisor.apply(engine, min_uses=2)
+        self.assertEqual([index['name'] for index in list_indexes('people', engine, schema=schema)], ['ix_people_name'])
+        self.assertEqual(advisor.suggest(engine), [IndexSuggestion('people', ['age'], schema, 1, 'ix_people_age')])
+
+    def test_advisor_apply_sqlite(self):
+        self.advisor_apply(sqlite_setup)
+
+    def test_advisor_apply_postgres(self):
+        self.advisor_apply(postgres_setup)
+
+    def test_advisor_apply_schema(self):
+        self.advisor_apply(postgres_setup, schema='local')
+
+    def test_advisor_check_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        advisor = enable_index_advisor()
+        suggestion = IndexSuggestion('people', ['name'], None, 1, 'ix_people_name')
+        self.assertTrue(advisor.check(suggestion, engine))
+        self.assertEqual(list_indexes('people', engine), [])
+
+    def test_advisor_range_check_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        advisor = enable_index_advisor()
+        advisor.record('people', ['age'], '>')
+        suggestion, = advisor.suggest(engine, check=False)
+        self.assertEqual(suggestion.operator, '>')
+        self.assertTrue(advisor.check(suggestion, engine))
+        with self.assertRaises(ValueError):
+            advisor.record('people', ['age'], '!=')
+
+    def test_advisor_disabled_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        delete_records('people', 'name', ['Olivia'], engine)
+        advisor = enable_index_advisor()
+        self.assertEqual(advisor.suggest(engine), [])
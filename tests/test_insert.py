@@ -6,7 +6,7 @@ from setup_test import sqlite_setup, postgres_setup
 from sessionize.utils.features import get_table
 from sessionize.utils.select import select_records
 from sessionize.exceptions import ForceFail
-from sessionize.utils.insert import insert_records_session
+from sessionize.utils.insert import insert_records_session, insert_records
 
 
 # insert_df_session
@@ -46,6 +46,37 @@ class TestInsertRecords(unittest.TestCase):
     def test_insert_records_schema(self):
         self.insert_records(postgres_setup, schema='local')
 
+    def insert_mixed_keys(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        # Records with different columns, in both orders.
+        new_people = [
+            {'id': 5, 'name': 'Odos'},
+            {'id': 6, 'name': 'Kayla', 'age': 28},
+            {'id': 7, 'name': 'Jim', 'age': 27, 'address_id': 1},
+            {'id': 8, 'name': 'Pam'},
+        ]
+        insert_records('people', new_people[:2], engine, schema=schema)
+        with sa_session.Session(engine) as session, session.begin():
+            insert_records_session('people', new_people[2:], session, schema=schema)
+
+        expected = [
+            {'id': 5, 'name': 'Odos', 'age': None, 'address_id': None},
+            {'id': 6, 'name': 'Kayla', 'age': 28, 'address_id': None},
+            {'id': 7, 'name': 'Jim', 'age': 27, 'address_id': 1},
+            {'id': 8, 'name': 'Pam', 'age': None, 'address_id': None}
+        ]
+        results = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual(results[4:], expected)
+
+    def test_insert_mixed_keys_sqlite(self):
+        self.insert_mixed_keys(sqlite_setup)
+
+    def test_insert_mixed_keys_postgres(self):
+        self.insert_mixed_keys(postgres_setup)
+
+    def test_insert_mixed_keys_schema(self):
+        self.insert_mixed_keys(postgres_setup, schema='local')
+
     def insert_records_session_fails(self, setup_function, schema=None):
         engine, tbl1, tbl2 = setup_function(schema=schema)
         table = get_table('people', engine, schema=schema)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.utils.load import load, read_checkpoint, write_checkpoint
+from sessionize.utils.select import select_records
+from sessionize.exceptions import ForceFail
+
+
+def new_people(start, stop, fail_at=None):
+    for i in range(start, stop):
+        if i == fail_at:
+            raise ForceFail
+        yield {'id': i, 'name': f'name_{i}', 'age': i % 100, 'address_id': 1}
+
+
+class TestLoad(unittest.TestCase):
+    def load_resume(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.checkpoint')
+            with self.assertRaises(ForceFail):
+                load('people', new_people(5, 30, fail_at=17), engine, batch_size=5, checkpoint=path, schema=schema)
+            checkpoint = read_checkpoint(path)
+            self.assertEqual(checkpoint.rows, 10)
+            self.assertEqual(checkpoint.last_key, {'id': 14})
+            self.assertEqual(len(select_records('people', engine, schema=schema)), 14)
+            # Restarts from the beginning of the same records.
+            progress = load('people', new_people(5, 30), engine, batch_size=5, checkpoint=path, schema=schema)
+            self.assertEqual(progress.rows, 15)
+            self.assertTrue(read_checkpoint(path).done)
+            ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+            self.assertEqual(ids, list(range(1, 30)))
+            # Already done, nothing is inserted again.
+            self.assertEqual(load('people', new_people(5, 30), engine, checkpoint=path, schema=schema).rows, 0)
+
+    def test_load_resume_sqlite(self):
+        self.load_resume(sqlite_setup)
+
+    def test_load_resume_postgres(self):
+        self.load_resume(postgres_setup)
+
+    def test_load_resume_schema(self):
+        self.load_resume(postgres_setup, schema='local')
+
+    def load_committed_batch(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'people.checkpoint')
+            load('people', new_people(5, 15), engine, batch_size=5, checkpoint=path, schema=schema)
+            # As if the process stopped after committing the second batch
+            # but before writing its checkpoint.
+            checkpoint = read_checkpoint(path)
+            checkpoint.rows, checkpoint.batches, checkpoint.done = 5, 1, False
+            write_checkpoint(path, checkpoint)
+            progress = load('people', new_people(5, 20), engine, batch_size=5, checkpoint=path, schema=schema)
+            self.assertEqual(progress.rows, 5)
+            ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+            self.assertEqual(ids, list(range(1, 20)))
+
+    def test_load_committed_batch_sqlite(self):
+        self.load_committed_batch(sqlite_setup)
+
+    def test_load_committed_batch_postgres(self):
+        self.load_committed_batch(postgres_setup)
+
+    def test_load_committed_batch_schema(self):
+        self.load_committed_batch(postgres_setup, schema='local')
+
+    def load_resume_no_primary_key(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        events = sa.Table('events', sa.MetaData(), sa.Column('name', sa.String(20)), schema=schema)
+        events.drop(engine, checkfirst=True)
+        events.create(engine)
+        records = [{'name': f'event_{i}'} for i in range(10)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.checkpoint')
+            load('events', records[:5], engine, batch_size=5, checkpoint=path, schema=schema)
+            # As if the process stopped after the first checkpoint,
+            # the next batch can not be looked up in a table without a primary key.
+            checkpoint = read_checkpoint(path)
+            checkpoint.done = False
+            write_checkpoint(path, checkpoint)
+            progress = load('events', records, engine, batch_size=5, checkpoint=path, schema=schema)
+            self.assertEqual(progress.rows, 5)
+            self.assertEqual(len(select_records('events', engine, schema=schema)), 10)
+
+    def test_load_resume_no_primary_key_sqlite(self):
+        self.load_resume_no_primary_key(sqlite_setup)
+
+    def test_load_resume_no_primary_key_postgres(self):
+        self.load_resume_no_primary_key(postgres_setup)
+
+    def test_load_resume_no_primary_key_schema(self):
+        self.load_resume_no_primary_key(postgres_setup, schema='local')
+
+    def test_load_without_checkpoint_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        progress = load('people', new_people(5, 8), engine, batch_size=2)
+        self.assertEqual((progress.rows, progress.batches), (3, 2))
+        self.assertEqual(len(select_records('people', engine)), 7)
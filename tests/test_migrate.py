@@ -0,0 +1,48 @@
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.utils.select import select_records
+from sessionize.utils.features import get_table
+from sessionize.utils.migrate import migrate
+from sessionize.exceptions import ForceFail
+
+
+class TestMigrate(unittest.TestCase):
+    def migrate_columns(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with migrate('people', engine, schema=schema) as m:
+            m.rename_column('name', 'first_name')
+            m.drop_column('age')
+            m.add_column('email', str)
+        self.assertSetEqual(set(m.table.columns.keys()), {'id', 'first_name', 'address_id', 'email'})
+        records = select_records(m.table, engine, schema=schema, sorted=True)
+        self.assertEqual(records[0], {'id': 1, 'first_name': 'Olivia', 'address_id': 1, 'email': None})
+
+    def test_migrate_columns_sqlite(self):
+        self.migrate_columns(sqlite_setup)
+
+    def test_migrate_columns_postgres(self):
+        self.migrate_columns(postgres_setup)
+
+    def test_migrate_columns_schema(self):
+        self.migrate_columns(postgres_setup, schema='local')
+
+    def migrate_fail(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        try:
+            with migrate('people', engine, schema=schema) as m:
+                m.rename_column('name', 'first_name')
+                raise ForceFail
+        except ForceFail:
+            pass
+        table = get_table('people', engine, schema=schema)
+        self.assertSetEqual(set(table.columns.keys()), {'id', 'name', 'age', 'address_id'})
+
+    def test_migrate_fail_sqlite(self):
+        self.migrate_fail(sqlite_setup)
+
+    def test_migrate_fail_postgres(self):
+        self.migrate_fail(postgres_setup)
+
+    def test_migrate_fail_schema(self):
+        self.migrate_fail(postgres_setup, schema='local')
@@ -0,0 +1,169 @@
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.utils.select import select_records
+from sessionize.utils.insert import insert_records
+from sessionize.utils.update import update_records
+from sessionize.utils.delete import delete_records
+from sessionize.utils.features import get_table
+from sessionize.utils.online import online_rename_column, online_drop_column, online_replace_primary_key
+from sessionize.exceptions import OnlineMigrationError, ForceFail
+
+
+def create_members(engine, places, schema=None, check=False):
+    constraints = [sa.CheckConstraint('age >= 0', name='ck_members_age')] if check else []
+    members = sa.Table('members', sa.MetaData(), schema=schema, *[
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(20)),
+        sa.Column('age', sa.Integer),
+        sa.Column('place_id', sa.Integer, sa.ForeignKey(places.c.id, name='fk_members_place')),
+        sa.UniqueConstraint('name', name='uq_members_name'),
+        *constraints
+    ])
+    members.drop(engine, checkfirst=True)
+    members.create(engine)
+    insert_records(members, [{'id': 1, 'name': 'Olivia', 'age': 17, 'place_id': 1},
+                             {'id': 2, 'name': 'Liam', 'age': 18, 'place_id': 2}], engine, schema=schema)
+    return members
+
+
+class TestOnlineMigration(unittest.TestCase):
+    def rename_column_during_writes(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+
+        def write_to_live_table(progress):
+            # runs between backfill batches, while the triggers are capturing writes
+            if progress.batches == 1:
+                insert_records('people', [{'name': 'Odos', 'age': 35, 'address_id': 2}], engine, schema=schema)
+                update_records('people', [{'id': 4, 'age': 21}], engine, schema=schema)
+                delete_records('people', 'id', [1], engine, schema=schema)
+
+        table = online_rename_column('people', 'name', 'first_name', engine, schema=schema,
+                                     batch_size=2, progress=write_to_live_table)
+        self.assertSetEqual(set(table.columns.keys()), {'id', 'first_name', 'age', 'address_id'})
+        records = select_records(table, engine, schema=schema, sorted=True)
+        expected = [
+            {'id': 2, 'first_name': 'Liam', 'age': 18, 'address_id': 1},
+            {'id': 3, 'first_name': 'Emma', 'age': 19, 'address_id': 2},
+            {'id': 4, 'first_name': 'Noah', 'age': 21, 'address_id': 2},
+            {'id': 5, 'first_name': 'Odos', 'age': 35, 'address_id': 2},
+        ]
+        self.assertEqual(records, expected)
+        table_names = sa.inspect(engine).get_table_names(schema=schema)
+        self.assertNotIn('_people_shadow', table_names)
+        self.assertNotIn('_people_old', table_names)
+
+        # new records still get primary keys from the database
+        insert_records(table, [{'first_name': 'Jim', 'age': 27, 'address_id': 1}], engine, schema=schema)
+        self.assertEqual(select_records(table, engine, schema=schema, sorted=True)[-1]['id'], 6)
+
+    def test_rename_column_during_writes_sqlite(self):
+        self.rename_column_during_writes(sqlite_setup)
+
+    def test_rename_column_during_writes_postgres(self):
+        self.rename_column_during_writes(postgres_setup)
+
+    def test_rename_column_during_writes_schema(self):
+        self.rename_column_during_writes(postgres_setup, schema='local')
+
+    def drop_column(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        table = online_drop_column('people', 'age', engine, schema=schema, batch_size=3)
+        self.assertSetEqual(set(table.columns.keys()), {'id', 'name', 'address_id'})
+        self.assertEqual(len(select_records(table, engine, schema=schema)), 4)
+
+    def test_drop_column_sqlite(self):
+        self.drop_column(sqlite_setup)
+
+    def test_drop_column_postgres(self):
+        self.drop_column(postgres_setup)
+
+    def test_drop_column_schema(self):
+        self.drop_column(postgres_setup, schema='local')
+
+    def replace_primary_key(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        table = online_replace_primary_key('people', 'name', engine, schema=schema, batch_size=3)
+        self.assertEqual([column.name for column in table.primary_key.columns], ['name'])
+        self.assertEqual(len(select_records(table, engine, schema=schema)), 4)
+
+    def test_replace_primary_key_sqlite(self):
+        self.replace_primary_key(sqlite_setup)
+
+    def test_replace_primary_key_postgres(self):
+        self.replace_primary_key(postgres_setup)
+
+    def test_replace_primary_key_schema(self):
+        self.replace_primary_key(postgres_setup, schema='local')
+
+    def carry_over_constraints(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        create_members(engine, tbl2, schema=schema)
+        online_rename_column('members', 'name', 'first_name', engine, schema=schema, batch_size=1)
+        inspector = sa.inspect(engine)
+        unique = inspector.get_unique_constraints('members', schema=schema)
+        self.assertEqual([(c['name'], c['column_names']) for c in unique], [('uq_members_name', ['first_name'])])
+        foreign_keys = inspector.get_foreign_keys('members', schema=schema)
+        self.assertEqual([(fk['constrained_columns'], fk['referred_table'], fk['referred_columns'])
+                          for fk in foreign_keys], [(['place_id'], 'places', ['id'])])
+        self.assertEqual(len(select_records('members', engine, schema=schema)), 2)
+
+    def test_carry_over_constraints_sqlite(self):
+        self.carry_over_constraints(sqlite_setup)
+
+    def test_carry_over_constraints_postgres(self):
+        self.carry_over_constraints(postgres_setup)
+
+    def test_carry_over_constraints_schema(self):
+        self.carry_over_constraints(postgres_setup, schema='local')
+
+    def refuse_check_constraint(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        create_members(engine, tbl2, schema=schema, check=True)
+        # The check constraint's SQL names the renamed column.
+        with self.assertRaises(OnlineMigrationError):
+            online_rename_column('members', 'name', 'first_name', engine, schema=schema)
+        inspector = sa.inspect(engine)
+        self.assertEqual(len(inspector.get_check_constraints('members', schema=schema)), 1)
+        self.assertNotIn('_members_shadow', inspector.get_table_names(schema=schema))
+
+        table = online_rename_column('members', 'name', 'first_name', engine, schema=schema, drop_constraints=True)
+        self.assertSetEqual(set(table.columns.keys()), {'id', 'first_name', 'age', 'place_id'})
+        self.assertEqual(sa.inspect(engine).get_check_constraints('members', schema=schema), [])
+
+    def test_refuse_check_constraint_sqlite(self):
+        self.refuse_check_constraint(sqlite_setup)
+
+    def test_refuse_check_constraint_postgres(self):
+        self.refuse_check_constraint(postgres_setup)
+
+    def test_refuse_check_constraint_schema(self):
+        self.refuse_check_constraint(postgres_setup, schema='local')
+
+    def conflicting_rows(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        # Two people share address_id 1, so one of them conflicts with the new primary key.
+        with self.assertRaises(OnlineMigrationError) as context:
+            online_replace_primary_key('people', 'address_id', engine, schema=schema)
+        self.assertIn('people has 4 rows but the new table has 2', str(context.exception))
+        self.assertNotIn('_people_shadow', sa.inspect(engine).get_table_names(schema=schema))
+        self.assertEqual(len(select_records('people', engine, schema=schema)), 4)
+
+    def test_conflicting_rows_sqlite(self):
+        self.conflicting_rows(sqlite_setup)
+
+    def test_conflicting_rows_postgres(self):
+        self.conflicting_rows(postgres_setup)
+
+    def test_conflicting_rows_schema(self):
+        self.conflicting_rows(postgres_setup, schema='local')
+
+    def test_trigger_failure_cleanup_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        with mock.patch('sessionize.utils.online._create_triggers', side_effect=ForceFail):
+            with self.assertRaises(ForceFail):
+                online_drop_column('people', 'age', engine)
+        self.assertNotIn('_people_shadow', sa.inspect(engine).get_table_names())
@@ -1,10 +1,21 @@
+import threading
+import time
 import unittest
 
+import sqlalchemy as sa
+
 from setup_test import sqlite_setup, postgres_setup
 from sessionize.orm.session_table import SessionTable
+from sessionize.orm.session_db import SessionDatabase
+from sessionize.orm.session_factory import SessionTableFactory
 from sessionize.utils.features import get_table
 from sessionize.utils.select import select_records
-from sessionize.exceptions import ForceFail
+from sessionize.exceptions import ForceFail, MissingPrimaryKey
+
+
+def age_next_year(record):
+    # Module level so it can be sent to apply's worker processes.
+    return record['age'] + 1
 
 
 class TestSessionTable(unittest.TestCase):
@@ -97,4 +108,349 @@ class TestSessionTable(unittest.TestCase):
         self.insert_delete_update_records_fail(postgres_setup)
 
     def test_insert_delete_update_records_fail_schema(self):
-        self.insert_delete_update_records_fail(postgres_setup, schema='local')
\ No newline at end of file
+        self.insert_delete_update_records_fail(postgres_setup, schema='local')
+
+class TestHeadTail(unittest.TestCase):
+    def head_tail(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        st = SessionTable('people', engine, schema=schema)
+
+        head = st.head(2)
+        tail = st.tail(2)
+        st.session.close()
+
+        # records were fetched when the selection was made
+        self.assertEqual(len(head), 2)
+        self.assertEqual(head.records, [
+            {'id': 1, 'name': 'Olivia', 'age': 17, 'address_id': 1},
+            {'id': 2, 'name': 'Liam', 'age': 18, 'address_id': 1}
+        ])
+        self.assertEqual(tail.primary_key_values, [{'id': 3}, {'id': 4}])
+        self.assertEqual([record['name'] for record in tail], ['Emma', 'Noah'])
+
+    def test_head_tail_sqlite(self):
+        self.head_tail(sqlite_setup)
+
+    def test_head_tail_postgres(self):
+        self.head_tail(postgres_setup)
+
+    def test_head_tail_schema(self):
+        self.head_tail(postgres_setup, schema='local')
+
+
+class TestTableInfoCache(unittest.TestCase):
+    def table_info_cache(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        st = SessionTable('people', engine, schema=schema)
+        statements = []
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        repr(st)
+        query_count = len(statements)
+        repr(st)
+        st.info()
+        self.assertEqual(len(statements), query_count)
+
+        # writes clear the cached info
+        st.insert_one_record({'name': 'Odos', 'age': 35, 'address_id': 2})
+        self.assertEqual(st.info().row_count, 5)
+        st.rollback()
+        self.assertEqual(st.info().row_count, 4)
+
+    def test_table_info_cache_sqlite(self):
+        self.table_info_cache(sqlite_setup)
+
+    def test_table_info_cache_postgres(self):
+        self.table_info_cache(postgres_setup)
+
+    def test_table_info_cache_schema(self):
+        self.table_info_cache(postgres_setup, schema='local')
+
+    def test_approximate_row_count_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        with engine.begin() as connection:
+            connection.execute(sa.text('ANALYZE'))
+        st = SessionTable('people', engine, approximate_row_count=True)
+        self.assertEqual(st.info().row_count, 4)
+
+
+class TestLazySessionTable(unittest.TestCase):
+    def lazy_session_table(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        statements = []
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        st = SessionTable('people', engine, schema=schema, lazy=True)
+        self.assertEqual(statements, [])
+        self.assertEqual(len(st), 4)
+        self.assertIs(st.table_selection.sa_table, st.sa_table)
+
+        table = get_table('people', engine, schema=schema)
+        statements.clear()
+        st = SessionTable(table, engine)
+        self.assertEqual(statements, [])
+        self.assertIs(st.sa_table, table)
+        self.assertEqual(st.schema, schema)
+
+    def test_lazy_session_table_sqlite(self):
+        self.lazy_session_table(sqlite_setup)
+
+    def test_lazy_session_table_postgres(self):
+        self.lazy_session_table(postgres_setup)
+
+    def test_lazy_session_table_schema(self):
+        self.lazy_session_table(postgres_setup, schema='local')
+
+    def test_lazy_missing_primary_key_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        metadata = sa.MetaData()
+        sa.Table('no_keys', metadata, sa.Column('name', sa.String(20)))
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        st = SessionTable('no_keys', engine, lazy=True)
+        with self.assertRaises(MissingPrimaryKey):
+            st.records
+
+
+class TestSessionDatabaseReflect(unittest.TestCase):
+    def describe_all(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        sd = SessionDatabase(engine)
+        sd.reflect(schema)
+        prefix = '' if schema is None else f'{schema}.'
+        self.assertIn(f'{prefix}people', sd.tables)
+
+        statements = []
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        info = sd.describe_all(schema)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(info[f'{prefix}people'].row_count, 4)
+        self.assertEqual(info[f'{prefix}places'].row_count, 2)
+        self.assertEqual(info[f'{prefix}places'].keys, ['id'])
+
+    def test_describe_all_sqlite(self):
+        self.describe_all(sqlite_setup)
+
+    def test_describe_all_postgres(self):
+        self.describe_all(postgres_setup)
+
+    def test_describe_all_schema(self):
+        self.describe_all(postgres_setup, schema='local')
+
+
+class TestApply(unittest.TestCase):
+    def apply(self, setup_function, schema=None, workers=2):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with SessionTable('people', engine, schema=schema) as sst:
+            sst.apply(age_next_year, 'age', columns=['age'], workers=workers, chunksize=3)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual([record['age'] for record in records], [18, 19, 20, 21])
+        self.assertEqual(records[0]['name'], 'Olivia')
+
+    def test_apply_sqlite(self):
+        self.apply(sqlite_setup)
+
+    def test_apply_postgres(self):
+        self.apply(postgres_setup)
+
+    def test_apply_schema(self):
+        self.apply(postgres_setup, schema='local')
+
+    def test_apply_in_process_sqlite(self):
+        self.apply(sqlite_setup, workers=1)
+
+
+class TestSessionTableFactory(unittest.TestCase):
+    def session_table_factory(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        factory = SessionTableFactory(engine, 'people', schema=schema)
+        sessions = {}
+
+        def work(i):
+            with factory.scope() as sst:
+                sessions[i] = (sst.session, factory())
+                sst.insert_one_record({'name': f'name_{i}', 'age': i, 'address_id': 1})
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One session per thread, shared by every view in that thread.
+        self.assertEqual(len({id(session) for session, view in sessions.values()}), 4)
+        self.assertTrue(all(view.session is session for session, view in sessions.values()))
+        self.assertTrue(all(view.sa_table is factory.sa_table for session, view in sessions.values()))
+        self.assertEqual(len(select_records('people', engine, schema=schema)), 8)
+
+    def test_session_table_factory_sqlite(self):
+        self.session_table_factory(sqlite_setup)
+
+    def test_session_table_factory_postgres(self):
+        self.session_table_factory(postgres_setup)
+
+    def test_session_table_factory_schema(self):
+        self.session_table_factory(postgres_setup, schema='local')
+
+    def test_session_table_factory_rollback_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        factory = SessionTableFactory(engine, 'people')
+        try:
+            with factory.scope() as sst:
+                sst.delete_records('id', [1, 2])
+                raise ForceFail
+        except ForceFail:
+            pass
+        self.assertEqual(len(select_records('people', engine)), 4)
+
+
+class TestAutoCommit(unittest.TestCase):
+    def autocommit_rollback(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        try:
+            with SessionTable('people', engine, schema=schema, autocommit_every=2) as sst:
+                for i in range(1, 4):
+                    sst.update_one_record({'id': i, 'age': 50})
+                raise ForceFail
+        except ForceFail:
+            pass
+        # The first two updates were committed, only the third is rolled back.
+        ages = [record['age'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ages[:3], [50, 50, 19])
+
+    def test_autocommit_rollback_sqlite(self):
+        self.autocommit_rollback(sqlite_setup)
+
+    def test_autocommit_rollback_postgres(self):
+        self.autocommit_rollback(postgres_setup)
+
+    def test_autocommit_rollback_schema(self):
+        self.autocommit_rollback(postgres_setup, schema='local')
+
+    def autocommit_records(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        new_people = [{'id': i, 'name': f'Person {i}', 'age': 30} for i in range(5, 10)]
+        try:
+            with SessionTable('people', engine, schema=schema, autocommit_every=2) as sst:
+                sst.insert_records(new_people)
+                self.assertEqual(sst.row_count, 5)
+                raise ForceFail
+        except ForceFail:
+            pass
+        # One write of five records is committed every two records, the fifth is rolled back.
+        ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6, 7, 8])
+
+    def test_autocommit_records_sqlite(self):
+        self.autocommit_records(sqlite_setup)
+
+    def test_autocommit_records_postgres(self):
+        self.autocommit_records(postgres_setup)
+
+    def test_autocommit_records_schema(self):
+        self.autocommit_records(postgres_setup, schema='local')
+
+    def autoflush(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with SessionTable('people', engine, schema=schema, autoflush_every=2) as sst:
+            for i in range(1, 4):
+                sst.update_one_record({'id': i, 'age': 50})
+            self.assertEqual(sst.row_count, 3)
+            self.assertEqual(len(sst.session.identity_map), 0)
+            self.assertEqual([record['age'] for record in sst.head(3).records], [50, 50, 50])
+        ages = [record['age'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ages[:3], [50, 50, 50])
+
+    def test_autoflush_sqlite(self):
+        self.autoflush(sqlite_setup)
+
+    def test_autoflush_postgres(self):
+        self.autoflush(postgres_setup)
+
+    def test_autoflush_schema(self):
+        self.autoflush(postgres_setup, schema='local')
+
+
+class TestPipelinedWriter(unittest.TestCase):
+    def pipelined_writes(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with SessionTable('people', engine, schema=schema, pipelined=True, commit_every=2) as sst:
+            for i in range(5):
+                sst.insert_one_record({'name': f'name_{i}', 'age': i, 'address_id': 1})
+            sst.update_one_record({'id': 1, 'age': 30})
+            sst.flush()
+            self.assertEqual(len(sst), 9)
+            self.assertEqual(sst.head(1).records[0]['age'], 30)
+            sst.delete_records('id', [2])
+        self.assertEqual(len(select_records('people', engine, schema=schema)), 8)
+
+    def test_pipelined_writes_sqlite(self):
+        self.pipelined_writes(sqlite_setup)
+
+    def test_pipelined_writes_postgres(self):
+        self.pipelined_writes(postgres_setup)
+
+    def test_pipelined_writes_schema(self):
+        self.pipelined_writes(postgres_setup, schema='local')
+
+    def pipelined_error(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        sst = SessionTable('people', engine, schema=schema, pipelined=True)
+        sst.insert_one_record({'id': 10, 'name': 'Ava', 'age': 21, 'address_id': 3})
+        # Repeats an existing primary key, fails on the writer thread.
+        sst.insert_one_record({'id': 1, 'name': 'Zoe', 'age': 22, 'address_id': 3})
+        with self.assertRaises(sa.exc.IntegrityError):
+            sst.flush()
+        # The error is only raised once, later writes go through.
+        sst.insert_one_record({'id': 11, 'name': 'Mia', 'age': 23, 'address_id': 3})
+        sst.close()
+        ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ids, [1, 2, 3, 4, 11])
+
+    def test_pipelined_error_sqlite(self):
+        self.pipelined_error(sqlite_setup)
+
+    def test_pipelined_error_postgres(self):
+        self.pipelined_error(postgres_setup)
+
+    def test_pipelined_error_schema(self):
+        self.pipelined_error(postgres_setup, schema='local')
+
+    def pipelined_writes_behind_error(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        sst = SessionTable('people', engine, schema=schema, pipelined=True)
+        # Repeats an existing primary key, fails on the writer thread.
+        sst.insert_one_record({'id': 1, 'name': 'Zoe', 'age': 22, 'address_id': 3})
+        # Queued behind the failing write.
+        sst.insert_one_record({'id': 10, 'name': 'Ava', 'age': 21, 'address_id': 3})
+        deadline = time.monotonic() + 5
+        while sst.writer.error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Submits keep raising until flush, none of these writes are applied.
+        for i in [11, 12]:
+            with self.assertRaises(sa.exc.IntegrityError):
+                sst.insert_one_record({'id': i, 'name': 'Mia', 'age': 23, 'address_id': 3})
+        with self.assertRaises(sa.exc.IntegrityError):
+            sst.flush()
+        sst.insert_one_record({'id': 13, 'name': 'Ivy', 'age': 24, 'address_id': 3})
+        sst.close()
+        ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ids, [1, 2, 3, 4, 13])
+
+    def test_pipelined_writes_behind_error_sqlite(self):
+        self.pipelined_writes_behind_error(sqlite_setup)
+
+    def test_pipelined_writes_behind_error_postgres(self):
+        self.pipelined_writes_behind_error(postgres_setup)
+
+    def test_pipelined_writes_behind_error_schema(self):
+        self.pipelined_writes_behind_error(postgres_setup, schema='local')
+
+    def test_pipelined_rollback_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        try:
+            with SessionTable('people', engine, pipelined=True) as sst:
+                sst.delete_records('id', [1, 2])
+                raise ForceFail
+        except ForceFail:
+            pass
+        self.assertEqual(len(select_records('people', engine)), 4)
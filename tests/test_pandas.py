@@ -0,0 +1,74 @@
+import importlib.util
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.pandas_io import select_dataframe, insert_dataframe, update_dataframe, upsert_dataframe
+from sessionize.utils.select import select_records
+
+# pandas is only installed with the pandas extra.
+has_pandas = importlib.util.find_spec('pandas') is not None
+
+
+@unittest.skipUnless(has_pandas, 'needs pandas, pip install sessionize[pandas]')
+class TestDataFrame(unittest.TestCase):
+    def select_dataframe(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        df = select_dataframe('people', engine, schema=schema, sorted=True)
+        self.assertEqual(list(df.columns), ['id', 'name', 'age', 'address_id'])
+        self.assertEqual(str(df['age'].dtype), 'Int64')
+        self.assertEqual(df['name'].tolist(), ['Olivia', 'Liam', 'Emma', 'Noah'])
+        chunks = list(select_dataframe('people', engine, chunksize=3, schema=schema, include_columns=['id']))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+        self.assertEqual(list(chunks[0].columns), ['id'])
+
+    def test_select_dataframe_sqlite(self):
+        self.select_dataframe(sqlite_setup)
+
+    def test_select_dataframe_postgres(self):
+        self.select_dataframe(postgres_setup)
+
+    def test_select_dataframe_schema(self):
+        self.select_dataframe(postgres_setup, schema='local')
+
+    def write_dataframe(self, setup_function, schema=None):
+        import pandas as pd
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        insert_dataframe('people', pd.DataFrame({'id': [5, 6], 'name': ['Ava', 'Mia'],
+                                                 'age': [21.0, float('nan')]}), engine, schema=schema)
+        update_dataframe('people', pd.DataFrame({'id': [1, 2], 'age': [30, 31]}), engine, schema=schema)
+        upsert_dataframe('people', pd.DataFrame({'id': [3, 7], 'name': ['Em', 'Zoe']}), engine,
+                         chunksize=1, schema=schema)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual([record['age'] for record in records], [30, 31, 19, 20, 21, None, None])
+        self.assertEqual([record['name'] for record in records],
+                         ['Olivia', 'Liam', 'Em', 'Noah', 'Ava', 'Mia', 'Zoe'])
+
+    def test_write_dataframe_sqlite(self):
+        self.write_dataframe(sqlite_setup)
+
+    def test_write_dataframe_postgres(self):
+        self.write_dataframe(postgres_setup)
+
+    def test_write_dataframe_schema(self):
+        self.write_dataframe(postgres_setup, schema='local')
+
+    def session_table_dataframe(self, setup_function, schema=None):
+        import pandas as pd
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with SessionTable('people', engine, schema=schema) as sst:
+            sst.insert_dataframe(pd.DataFrame({'id': [5], 'name': ['Ava'], 'age': [21], 'address_id': [3]}))
+            sst.update_dataframe(pd.DataFrame({'id': [1], 'age': [50]}))
+            sst.upsert_dataframe(pd.DataFrame({'id': [2, 6], 'name': ['Lia', 'Mia']}))
+            df = sst.to_dataframe(columns=['id', 'age'])
+        self.assertEqual(sorted(df['id'].tolist()), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(df.set_index('id').loc[1, 'age'], 50)
+
+    def test_session_table_dataframe_sqlite(self):
+        self.session_table_dataframe(sqlite_setup)
+
+    def test_session_table_dataframe_postgres(self):
+        self.session_table_dataframe(postgres_setup)
+
+    def test_session_table_dataframe_schema(self):
+        self.session_table_dataframe(postgres_setup, schema='local')
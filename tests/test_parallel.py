@@ -0,0 +1,151 @@
+import unittest
+
+import sqlalchemy as sa
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.utils.insert import insert_records
+from sessionize.utils.parallel import select_records_parallel, partition_key_ranges, insert_records_parallel
+from sessionize.utils.select import select_records
+from sessionize.exceptions import ForceFail, MissingPrimaryKey
+
+
+def add_people(engine, schema=None):
+    records = [{'name': f'name_{i}', 'age': i % 90, 'address_id': i % 3} for i in range(96)]
+    insert_records('people', records, engine, schema=schema)
+
+
+class TestSelectRecordsParallel(unittest.TestCase):
+    def select_records_parallel(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        add_people(engine, schema=schema)
+        expected = select_records('people', engine, schema=schema, sorted=True)
+        chunks = list(select_records_parallel('people', engine, workers=4, chunksize=7, schema=schema))
+        self.assertTrue(all(len(chunk) <= 7 for chunk in chunks))
+        records = [record for chunk in chunks for record in chunk]
+        self.assertEqual(sorted(records, key=lambda record: record['id']), expected)
+
+    def test_select_records_parallel_sqlite(self):
+        self.select_records_parallel(sqlite_setup)
+
+    def test_select_records_parallel_postgres(self):
+        self.select_records_parallel(postgres_setup)
+
+    def test_select_records_parallel_schema(self):
+        self.select_records_parallel(postgres_setup, schema='local')
+
+    def select_records_parallel_ordered(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        add_people(engine, schema=schema)
+        expected = select_records('people', engine, schema=schema, sorted=True, include_columns=['id', 'name'])
+        for method in ['minmax', 'quantiles']:
+            chunks = select_records_parallel('people', engine, workers=3, chunksize=10, schema=schema,
+                                             include_columns=['id', 'name'], ordered=True, method=method)
+            records = [record for chunk in chunks for record in chunk]
+            self.assertEqual(records, expected)
+
+    def test_select_records_parallel_ordered_sqlite(self):
+        self.select_records_parallel_ordered(sqlite_setup)
+
+    def test_select_records_parallel_ordered_postgres(self):
+        self.select_records_parallel_ordered(postgres_setup)
+
+    def test_select_records_parallel_ordered_schema(self):
+        self.select_records_parallel_ordered(postgres_setup, schema='local')
+
+    def test_partition_key_ranges_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        add_people(engine)
+        self.assertEqual(partition_key_ranges('people', engine, 4, method='minmax'),
+                         [(None, {'id': 25}), ({'id': 25}, {'id': 50}), ({'id': 50}, {'id': 75}), ({'id': 75}, None)])
+        self.assertEqual(partition_key_ranges('people', engine, 2, method='quantiles'),
+                         [(None, {'id': 50}), ({'id': 50}, None)])
+
+    def test_partition_sampled_quantiles_sqlite(self):
+        # Boundaries come from a sample of the keys, so they are only about even.
+        engine, tbl1, tbl2 = sqlite_setup()
+        insert_records('people', [{'name': f'name_{i}', 'age': i % 90, 'address_id': i % 3} for i in range(4000)],
+                       engine)
+        ranges = partition_key_ranges('people', engine, 4, method='quantiles')
+        self.assertEqual(len(ranges), 4)
+        stops = [stop['id'] for start, stop in ranges[:-1]]
+        self.assertEqual(stops, sorted(stops))
+        for stop, expected in zip(stops, [1001, 2002, 3003]):
+            self.assertLess(abs(stop - expected), 400)
+
+    def test_partition_no_primary_key_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        events = sa.Table('events', sa.MetaData(), sa.Column('name', sa.String(20)))
+        events.drop(engine, checkfirst=True)
+        events.create(engine)
+        with self.assertRaises(MissingPrimaryKey):
+            partition_key_ranges('events', engine, 4)
+
+    def test_stop_early_sqlite(self):
+        engine, tbl1, tbl2 = sqlite_setup()
+        add_people(engine)
+        for chunk in select_records_parallel('people', engine, workers=4, chunksize=2, prefetch=1):
+            break
+        self.assertEqual(len(chunk), 2)
+
+
+class TestInsertRecordsParallel(unittest.TestCase):
+    def insert_records_parallel(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        records = ({'id': i, 'name': f'name_{i}', 'age': i % 90, 'address_id': i % 3} for i in range(5, 105))
+        reports = []
+        results = insert_records_parallel('people', records, engine, workers=3, batch_size=30,
+                                          schema=schema, progress=reports.append)
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual([result.rows for result in results], [30, 30, 30, 10])
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(reports[-1].rows, 100)
+        self.assertEqual(len(select_records('people', engine, schema=schema)), 104)
+
+    def test_insert_records_parallel_sqlite(self):
+        self.insert_records_parallel(sqlite_setup)
+
+    def test_insert_records_parallel_postgres(self):
+        self.insert_records_parallel(postgres_setup)
+
+    def test_insert_records_parallel_schema(self):
+        self.insert_records_parallel(postgres_setup, schema='local')
+
+    def insert_records_parallel_failed_batch(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        # Second batch repeats an existing primary key.
+        records = [{'id': 10, 'name': 'Ava'}, {'id': 11, 'name': 'Mia'}, {'id': 1, 'name': 'Zoe'}, {'id': 12, 'name': 'Ivy'}]
+        results = insert_records_parallel('people', records, engine, workers=2, batch_size=2, schema=schema)
+        self.assertEqual([result.ok for result in results], [True, False])
+        self.assertEqual(results[1].attempts, 1)
+        ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ids, [1, 2, 3, 4, 10, 11])
+
+    def test_insert_records_parallel_failed_batch_sqlite(self):
+        self.insert_records_parallel_failed_batch(sqlite_setup)
+
+    def test_insert_records_parallel_failed_batch_postgres(self):
+        self.insert_records_parallel_failed_batch(postgres_setup)
+
+    def test_insert_records_parallel_failed_batch_schema(self):
+        self.insert_records_parallel_failed_batch(postgres_setup, schema='local')
+
+    def insert_records_parallel_progress_error(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        records = ({'id': i, 'name': f'name_{i}'} for i in range(10, 1000))
+
+        def progress(total):
+            raise ForceFail
+
+        # Raises instead of hanging on the full batch queue.
+        with self.assertRaises(ForceFail):
+            insert_records_parallel('people', records, engine, workers=2, batch_size=5,
+                                    schema=schema, progress=progress)
+
+    def test_insert_records_parallel_progress_error_sqlite(self):
+        self.insert_records_parallel_progress_error(sqlite_setup)
+
+    def test_insert_records_parallel_progress_error_postgres(self):
+        self.insert_records_parallel_progress_error(postgres_setup)
+
+    def test_insert_records_parallel_progress_error_schema(self):
+        self.insert_records_parallel_progress_error(postgres_setup, schema='local')
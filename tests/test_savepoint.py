@@ -0,0 +1,123 @@
+import datetime
+import unittest
+
+import sqlalchemy as sa
+import sqlalchemy.orm.session as sa_session
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.savepoint import insert_records_batched_session
+from sessionize.utils.select import select_records
+from sessionize.exceptions import ForceFail
+
+
+def new_people(ids):
+    return [{'id': i, 'name': f'name_{i}', 'age': i, 'address_id': 1} for i in ids]
+
+
+def create_rejected_table(engine, schema=None):
+    metadata = sa.MetaData(schema=schema)
+    table = sa.Table('people_rejected', metadata,
+                     sa.Column('row_id', sa.Integer, primary_key=True),
+                     sa.Column('id', sa.Integer),
+                     sa.Column('name', sa.String(20)),
+                     sa.Column('error', sa.Text))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    return table
+
+
+class TestBatchedWrites(unittest.TestCase):
+    def insert_records_batched(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        # ids 2 and 4 already exist.
+        records = new_people([5, 6, 2, 7, 8, 9, 4, 10, 11])
+        with SessionTable('people', engine, schema=schema) as sst:
+            rejected = sst.insert_records_batched(iter(records), batch_size=4)
+        self.assertEqual([rejection.record['id'] for rejection in rejected], [2, 4])
+        ids = [record['id'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
+
+    def test_insert_records_batched_sqlite(self):
+        self.insert_records_batched(sqlite_setup)
+
+    def test_insert_records_batched_postgres(self):
+        self.insert_records_batched(postgres_setup)
+
+    def test_insert_records_batched_schema(self):
+        self.insert_records_batched(postgres_setup, schema='local')
+
+    def quarantine(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        create_rejected_table(engine, schema=schema)
+        with sa_session.Session(engine) as session, session.begin():
+            rejected = insert_records_batched_session('people', new_people([5, 1, 6]), session,
+                                                      batch_size=2, schema=schema,
+                                                      quarantine='people_rejected')
+        self.assertEqual(len(rejected), 1)
+        quarantined = select_records('people_rejected', engine, schema=schema)
+        self.assertEqual([(record['id'], record['name']) for record in quarantined], [(1, 'name_1')])
+        self.assertTrue(quarantined[0]['error'])
+        self.assertEqual(len(select_records('people', engine, schema=schema)), 6)
+
+    def test_quarantine_sqlite(self):
+        self.quarantine(sqlite_setup)
+
+    def test_quarantine_postgres(self):
+        self.quarantine(postgres_setup)
+
+    def test_quarantine_schema(self):
+        self.quarantine(postgres_setup, schema='local')
+
+    def quarantine_unbindable(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        metadata = sa.MetaData(schema=schema)
+        visits = sa.Table('visits', metadata,
+                          sa.Column('id', sa.Integer, primary_key=True),
+                          sa.Column('day', sa.Date))
+        visits_rejected = sa.Table('visits_rejected', metadata,
+                                   sa.Column('row_id', sa.Integer, primary_key=True),
+                                   sa.Column('id', sa.Integer),
+                                   sa.Column('day', sa.String(20)),
+                                   sa.Column('error', sa.Text))
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        # 'not a date' can not be bound to a Date, {'id': 1} is a duplicate without a day.
+        records = [{'id': 1, 'day': datetime.date(2024, 1, 1)}, {'id': 2, 'day': 'not a date'}, {'id': 1}]
+        with sa_session.Session(engine) as session, session.begin():
+            rejected = insert_records_batched_session(visits, records, session, batch_size=3,
+                                                      schema=schema, quarantine=visits_rejected)
+        self.assertEqual([rejection.record for rejection in rejected], records[1:])
+        quarantined = select_records(visits_rejected, engine, schema=schema, sorted=True)
+        self.assertEqual([(record['id'], record['day']) for record in quarantined], [(2, 'not a date'), (1, None)])
+        self.assertEqual(len(select_records(visits, engine, schema=schema)), 1)
+
+    def test_quarantine_unbindable_sqlite(self):
+        self.quarantine_unbindable(sqlite_setup)
+
+    def test_quarantine_unbindable_postgres(self):
+        self.quarantine_unbindable(postgres_setup)
+
+    def test_quarantine_unbindable_schema(self):
+        self.quarantine_unbindable(postgres_setup, schema='local')
+
+    def batched_rollback(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        try:
+            with SessionTable('people', engine, schema=schema) as sst:
+                sst.update_records_batched([{'id': 1, 'age': 50}, {'id': 2, 'age': 51}], batch_size=1)
+                raise ForceFail
+        except ForceFail:
+            pass
+        # Released savepoints are still rolled back with the session.
+        ages = [record['age'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ages, [17, 18, 19, 20])
+
+    def test_batched_rollback_sqlite(self):
+        self.batched_rollback(sqlite_setup)
+
+    def test_batched_rollback_postgres(self):
+        self.batched_rollback(postgres_setup)
+
+    def test_batched_rollback_schema(self):
+        self.batched_rollback(postgres_setup, schema='local')
@@ -4,6 +4,7 @@ import sqlalchemy.orm.session as sa_session
 
 from setup_test import sqlite_setup, postgres_setup
 from sessionize.utils.select import select_records, select_existing_values, select_column_values
+from sessionize.utils.select import select_head_records, select_tail_records
 from sessionize.exceptions import ForceFail
 
 # TODO: Select tests
@@ -16,4 +17,21 @@ from sessionize.exceptions import ForceFail
 
 # select_column_values
 
-# select_column_values chunks
\ No newline at end of file
+# select_column_values chunks
+
+class TestSelectHeadTail(unittest.TestCase):
+    def select_head_tail(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        head = select_head_records('people', engine, 3, schema=schema, include_columns=['id', 'name'])
+        tail = select_tail_records('people', engine, 3, schema=schema, include_columns=['id', 'name'])
+        self.assertEqual(head, [{'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}])
+        self.assertEqual(tail, [{'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}, {'id': 4, 'name': 'Noah'}])
+
+    def test_select_head_tail_sqlite(self):
+        self.select_head_tail(sqlite_setup)
+
+    def test_select_head_tail_postgres(self):
+        self.select_head_tail(postgres_setup)
+
+    def test_select_head_tail_schema(self):
+        self.select_head_tail(postgres_setup, schema='local')
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.utils.features import get_table, get_table_names
+from sessionize.utils.alter import add_column
+from sessionize.orm.session_db import SessionDatabase
+from sessionize.utils.snapshot import enable_schema_snapshot, disable_schema_snapshot, SchemaSnapshot
+
+
+class TestSchemaSnapshot(unittest.TestCase):
+    def tearDown(self):
+        disable_schema_snapshot()
+
+    def schema_snapshot(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schema.pickle')
+            enable_schema_snapshot(path)
+            table = get_table('people', engine, schema=schema)
+            self.assertTrue(os.path.exists(path))
+            self.assertSetEqual(set(get_table_names(engine, schema=schema)), {'people', 'places'})
+
+            # a new process loads the snapshot from the file
+            snapshot = SchemaSnapshot(path)
+            statements = []
+            sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+            table = snapshot.get_table('people', engine, schema=schema)
+            self.assertEqual(len(statements), 1)
+            self.assertSetEqual(set(table.columns.keys()), {'id', 'name', 'age', 'address_id'})
+
+            # schema changes refresh the snapshot
+            add_column('people', 'email', str, engine, schema=schema)
+            table = get_table('people', engine, schema=schema)
+            self.assertSetEqual(set(table.columns.keys()), {'id', 'name', 'age', 'address_id', 'email'})
+
+    def test_schema_snapshot_sqlite(self):
+        self.schema_snapshot(sqlite_setup)
+
+    def test_schema_snapshot_postgres(self):
+        self.schema_snapshot(postgres_setup)
+
+    def test_schema_snapshot_schema(self):
+        self.schema_snapshot(postgres_setup, schema='local')
+
+    def test_no_fingerprint_sqlite(self):
+        # Databases without a fingerprint fall back to reflecting single tables.
+        engine, tbl1, tbl2 = sqlite_setup()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schema.pickle')
+            snapshot = enable_schema_snapshot(path)
+            with mock.patch('sessionize.utils.snapshot.get_schema_fingerprint', return_value=None):
+                self.assertIsNone(snapshot.get_metadata(engine))
+                table = get_table('people', engine)
+                self.assertSetEqual(set(get_table_names(engine)), {'people', 'places'})
+            self.assertSetEqual(set(table.columns.keys()), {'id', 'name', 'age', 'address_id'})
+            self.assertEqual(snapshot.entries, {})
+            self.assertFalse(os.path.exists(path))
+
+    def test_no_fingerprint_reflect_sqlite(self):
+        # SessionDatabase.reflect reflects the schema itself when the snapshot has nothing.
+        engine, tbl1, tbl2 = sqlite_setup()
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot = enable_schema_snapshot(os.path.join(directory, 'schema.pickle'))
+            with mock.patch('sessionize.utils.snapshot.get_schema_fingerprint', return_value=None):
+                sdb = SessionDatabase(engine)
+                self.assertSetEqual(set(sdb.reflect()), {'people', 'places'})
+            self.assertEqual(snapshot.entries, {})
@@ -0,0 +1,75 @@
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.select import select_records, select_records_all, select_column_values_all
+from sessionize.utils.spill import SpilledSequence, enable_spill, disable_spill
+
+
+class TestSpill(unittest.TestCase):
+    def tearDown(self):
+        disable_spill()
+
+    def spill_records(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        records = select_records_all('people', engine, schema=schema, sorted=True)
+        spilled = select_records_all('people', engine, schema=schema, sorted=True, memory_budget=1)
+        self.assertIsInstance(spilled, SpilledSequence)
+        self.assertEqual(len(spilled), 4)
+        self.assertEqual(spilled[0], records[0])
+        self.assertEqual(spilled[-1], records[-1])
+        self.assertEqual(spilled[1:3], records[1:3])
+        self.assertEqual(list(spilled), records)
+        with self.assertRaises(IndexError):
+            spilled[4]
+        spilled.close()
+        # Results under the budget stay lists.
+        kept = select_records_all('people', engine, schema=schema, sorted=True, memory_budget=10 ** 6)
+        self.assertEqual(kept, records)
+
+    def test_spill_records_sqlite(self):
+        self.spill_records(sqlite_setup)
+
+    def test_spill_records_postgres(self):
+        self.spill_records(postgres_setup)
+
+    def test_spill_records_schema(self):
+        self.spill_records(postgres_setup, schema='local')
+
+    def spill_selections(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        enable_spill(1)
+        values = select_column_values_all('people', engine, 'name', schema=schema)
+        self.assertIsInstance(values, SpilledSequence)
+        self.assertEqual(sorted(values), ['Emma', 'Liam', 'Noah', 'Olivia'])
+        with SessionTable('people', engine, schema=schema) as sst:
+            self.assertIsInstance(sst.records, SpilledSequence)
+            self.assertIsInstance(sst['age'].values, SpilledSequence)
+            self.assertEqual(list(sst['age'] > 18), [False, False, True, True])
+
+    def test_spill_selections_sqlite(self):
+        self.spill_selections(sqlite_setup)
+
+    def test_spill_selections_postgres(self):
+        self.spill_selections(postgres_setup)
+
+    def test_spill_selections_schema(self):
+        self.spill_selections(postgres_setup, schema='local')
+
+    def spill_column_arithmetic(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        enable_spill(1)
+        with SessionTable('people', engine, schema=schema) as sst:
+            sst['age'] += 1
+            sst['age'] - 10
+        ages = [record['age'] for record in select_records('people', engine, schema=schema, sorted=True)]
+        self.assertEqual(ages, [8, 9, 10, 11])
+
+    def test_spill_column_arithmetic_sqlite(self):
+        self.spill_column_arithmetic(sqlite_setup)
+
+    def test_spill_column_arithmetic_postgres(self):
+        self.spill_column_arithmetic(postgres_setup)
+
+    def test_spill_column_arithmetic_schema(self):
+        self.spill_column_arithmetic(postgres_setup, schema='local')
@@ -0,0 +1,45 @@
+import unittest
+
+from setup_test import sqlite_setup, postgres_setup
+from sessionize.orm.session_table import SessionTable
+from sessionize.utils.select import select_records
+from sessionize.utils.upsert import upsert_records
+
+
+class TestUpsertRecords(unittest.TestCase):
+    def upsert_records(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        upsert_records('people', [{'id': 1, 'name': 'Olive', 'age': 18, 'address_id': 1},
+                                  {'id': 5, 'name': 'Ava', 'age': 21, 'address_id': 3}], engine, schema=schema)
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual(records[0], {'id': 1, 'name': 'Olive', 'age': 18, 'address_id': 1})
+        self.assertEqual(records[4], {'id': 5, 'name': 'Ava', 'age': 21, 'address_id': 3})
+        self.assertEqual(len(records), 5)
+
+    def test_upsert_records_sqlite(self):
+        self.upsert_records(sqlite_setup)
+
+    def test_upsert_records_postgres(self):
+        self.upsert_records(postgres_setup)
+
+    def test_upsert_records_schema(self):
+        self.upsert_records(postgres_setup, schema='local')
+
+    def upsert_records_session_table(self, setup_function, schema=None):
+        engine, tbl1, tbl2 = setup_function(schema=schema)
+        with SessionTable('people', engine, schema=schema) as sst:
+            sst.upsert_records([{'id': 2, 'age': 30}, {'id': 6, 'name': 'Mia', 'age': 22, 'address_id': 3}])
+            sst.upsert_one_record({'id': 3, 'name': 'Emma'})
+        records = select_records('people', engine, schema=schema, sorted=True)
+        self.assertEqual(records[1], {'id': 2, 'name': 'Liam', 'age': 30, 'address_id': 1})
+        self.assertEqual(records[2], {'id': 3, 'name': 'Emma', 'age': 19, 'address_id': 2})
+        self.assertEqual(records[4], {'id': 6, 'name': 'Mia', 'age': 22, 'address_id': 3})
+
+    def test_upsert_records_session_table_sqlite(self):
+        self.upsert_records_session_table(sqlite_setup)
+
+    def test_upsert_records_session_table_postgres(self):
+        self.upsert_records_session_table(postgres_setup)
+
+    def test_upsert_records_session_table_schema(self):
+        self.upsert_records_session_table(postgres_setup, schema='local')